@@ -0,0 +1,45 @@
+""" 解析ループの比較（ParserSpec._scan と、cl_parse_codegen で生成したもの）
+
+    python bench/bench_codegen.py
+"""
+import pathlib
+import sys
+import timeit
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from lib import cl_parse as cl      # noqa: E402
+
+options = [
+    ["help", "-h, --help", "使い方を表示する"],
+    ["all", "-a, --all", "すべて出力"],
+    ["verbose", "-v, --verbose", "詳細表示", ["COUNT"]],
+    ["name", "-n, --name", "使用者名を指定する//<名前>", str],
+    ["count", "-c, --count", "数量を指定する//<数(整数)>", int],
+    ["tag", "-t, --tag", "タグ//<タグ>", [str, "APPEND"]],
+    ["level", "-l, --level", "レベル//<数>", [int, "OPTIONAL"]],
+]
+
+cases = {
+    "short": "-avv --name=Taro -c 10 FILE1 FILE2".split(),
+    "mixed": ("-a --verbose -t x -tY --tag=z --count 3 --lev=2 --na Hanako "
+              "-vvv A B C D E F G H").split(),
+    "100k params": ["-a", "-c", "1"] + [f"path/to/file{i}.txt" for i in range(100_000)],
+}
+
+
+def main() -> None:
+    spec = cl.ParserSpec(options)
+    print(f"{'case':<12} {'interpreted':>12} {'codegen':>12} {'ratio':>7}")
+    for name, args in cases.items():
+        number = 3 if len(args) > 1000 else 20000
+        results = []
+        for codegen in (False, True):
+            ps = spec.parse(args, codegen=codegen)
+            assert not ps.is_error, ps.get_errormessage()
+            t = min(timeit.repeat(lambda: spec.parse(args, codegen=codegen), number=number, repeat=5))
+            results.append(t / number * 1e6)
+        print(f"{name:<12} {results[0]:>10.1f}us {results[1]:>10.1f}us {results[0] / results[1]:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+""" cl_parse の import 時間を測る（python -X importtime）
+
+    python bench/bench_import.py [--repeat 回数] [--save-baseline 基準.json]
+                                 [--baseline 基準.json] [--threshold 比] [--budget 上限(ms)]
+
+    import 時間（累計、回数分の最小値）は、同じ環境の argparse の import 時間との比でも表す。
+    --save-baseline で今回の結果を基準として書き、--baseline でその基準と比べる
+    （argparse との比が、基準の比より --threshold を超えて大きくなったら NG）。
+    import 時に読み込んではいけないモジュール（遅延 import しているもの）が読み込まれた時、
+    基準と比べて NG の時、または --budget（ms）を超えた時は、終了コード 1 で終わる
+"""
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# 必要になるまで import しないモジュール
+DEFERRED = ("glob", "pathlib", "platform", "dataclasses", "unicodedata", "inspect",
+            "cl_parse_debugmodule", "cl_parse_codegen", "locale", "mmap", "hashlib", "importlib.util")
+
+
+def import_times(code: str = f"import sys; sys.path.insert(0, {str(ROOT)!r}); from lib import cl_parse"
+                 ) -> dict[str, int]:
+    """ 新しいプロセスで code（省略時は cl_parse の import）を実行して、
+        モジュール名 -> 累計 import 時間（us）を返す
+    """
+    # バイトコードを書かない設定（PYTHONDONTWRITEBYTECODE）では、毎回ソースのコンパイルを測ってしまう
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, check=True, env=env)
+    times: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def deferred_loaded(times: dict[str, int]) -> list[str]:
+    """ import 時に読み込まれた、遅延 import しているはずのモジュール名を返す """
+    return sorted(name for name in DEFERRED if name in times)
+
+
+def measure(repeat: int = 5) -> tuple[dict[str, float], dict[str, int]]:
+    """ cl_parse と argparse の import 時間（回数分の最小値）を測って、
+        (結果, 最初の回のモジュール名 -> 累計 import 時間（us）) を返す
+    """
+    import_times()          # バイトコード（__pycache__）を作っておく
+    runs = [import_times() for _ in range(repeat)]
+    best = min(run["lib.cl_parse"] for run in runs) / 1000
+    ap = min(import_times("import argparse")["argparse"] for _ in range(repeat)) / 1000
+    return {"cl_parse_ms": best, "argparse_ms": ap, "ratio": best / ap}, runs[0]
+
+
+def compare(result: dict[str, float], base: dict[str, float], threshold: float) -> bool:
+    """ 基準と比べて表示する。argparse との比が threshold を超えて大きくなっていたら False """
+    ratio = result["ratio"] / base["ratio"]
+    print(f"baseline: lib.cl_parse {base['cl_parse_ms']:.2f}ms, {base['ratio']:.2f}x argparse"
+          f" -> {ratio:.2f}x")
+    return ratio <= 1 + threshold
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save-baseline", type=pathlib.Path, help="今回の結果を書く基準（JSONファイル）")
+    parser.add_argument("--baseline", type=pathlib.Path, help="比べる基準（JSONファイル）")
+    parser.add_argument("--threshold", type=float, default=0.2, help="遅くなったとする比（+20%% なら 0.2）")
+    parser.add_argument("--budget", type=float, help="import 時間の上限（ms。省略時は見ない）")
+    args = parser.parse_args()
+
+    result, times = measure(args.repeat)
+    best = result["cl_parse_ms"]
+    print(f"lib.cl_parse: {best:.2f}ms ({result['ratio']:.2f}x argparse {result['argparse_ms']:.2f}ms)")
+    top = sorted(times.items(), key=lambda item: -item[1])[:10]
+    for name, us in top:
+        print(f"  {us / 1000:8.2f}ms  {name}")
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(result, indent=1, sort_keys=True) + "\n")
+
+    failed = False
+    loaded = deferred_loaded(times)
+    if loaded:
+        print(f"NG: imported at import time: {', '.join(loaded)}")
+        failed = True
+    if args.baseline and not compare(result, json.loads(args.baseline.read_text()), args.threshold):
+        print("NG: import time over baseline")
+        failed = True
+    if args.budget is not None and best > args.budget:
+        print(f"NG: import time over budget ({args.budget:.2f}ms)")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+""" 解析１回あたりのメモリ使用量を測る
+
+    python bench/bench_memory.py [オプション数 ...]
+"""
+import pathlib
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from lib import cl_parse as cl      # noqa: E402
+
+
+def make_options(n: int) -> list[list[object]]:
+    """ n 個のオプション（引数なし、int、APPEND、COUNT の繰り返し）を作る """
+    options: list[list[object]] = []
+    for n0 in range(n):
+        i = f"{n0:05d}"         # 省略形で、ほかのオプションと一致しないように
+        kind = n0 % 4
+        if kind == 0:
+            options.append([f"flag{i}", f"--flag{i}", f"flag {i}"])
+        elif kind == 1:
+            options.append([f"num{i}", f"--num{i}", f"num {i}", int])
+        elif kind == 2:
+            options.append([f"list{i}", f"--list{i}", f"list {i}", [str, "APPEND"]])
+        else:
+            options.append([f"count{i}", f"--count{i}", f"count {i}", ["COUNT"]])
+    return options
+
+
+def measure(n: int, repeat: int = 100) -> tuple[float, float]:
+    """ n 個のオプションで、Parse １個あたりの（保持、ピーク）バイト数を返す """
+    spec = cl.ParserSpec(make_options(n))
+    args = ["prog", "--flag00000", "--num00001", "10",
+            "--list00002", "a", "--list00002", "b", "--count00003", "p"]
+    spec.parse(args)        # 初回の遅延処理を済ませておく
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    keep = [spec.parse(args) for _ in range(repeat)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert all(ps.OPT_num00001.value == 10 for ps in keep)
+    return (current - base) / repeat, (peak - base) / repeat
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 100, 1000, 5000]
+    print(f"{'options':>8} {'bytes/parse':>12} {'peak/parse':>12} {'bytes/option':>13}")
+    for n in sizes:
+        kept, peak = measure(n)
+        print(f"{n:>8} {kept:>12.0f} {peak:>12.0f} {kept / n:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+""" 大きなオプション情報、長いコマンドラインでの性能を測る（argparse との比較付き）
+
+    python bench/bench_suite.py [--options 10 100 ...] [--tokens 10 1000 ...] [--quick]
+                                [--json 結果.json] [--compare 前の結果.json]
+
+    オプション数ごとにコンパイル時間と、コンパイルしない１回だけの解析（Parse(args, options)）の時間、
+    キャッシュファイル（ParserSpec.cached()）の大きさと読み込み時間を、
+    （オプション数, コマンドラインの要素数）ごとに
+    解析時間、要素数/秒、ピークメモリ（tracemalloc）を、同じ内容の argparse と並べて測る。
+    --json の結果はキーを並べて書くので、コミット間で diff できる。
+    --compare を指定すると、前の結果との比（今回/前回。要素数/秒は前回/今回）を表示して、
+    --threshold を超えて遅くなったものがあれば、終了コード 1 で終わる
+"""
+import argparse
+import json
+import pathlib
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from lib import cl_parse as cl      # noqa: E402
+from bench_import import measure   # noqa: E402
+
+SHORTS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+KINDS = ("flag", "num", "list", "count", "ratio")   # 引数なし、int、APPEND、COUNT、float
+
+# 比較する値と、大きい方が良いかどうか
+METRICS = {"compile_s": False, "parse_s": False, "tokens_per_s": True, "peak_bytes": False,
+           "argparse_build_s": False, "argparse_parse_s": False, "argparse_peak_bytes": False,
+           "oneshot_s": False, "argparse_oneshot_s": False, "cl_parse_ms": False,
+           "cache_bytes": False, "cache_load_s": False}
+
+
+# -----------------------------------------------------
+# 合成オプション情報、コマンドライン
+# -----------------------------------------------------
+class Spec:
+    """ n 個の合成オプション（cl_parse 用と argparse 用を同じ内容で作る）。
+        オプションの種類は KINDS の繰り返し、先頭の SHORTS の数だけ 1文字オプションも付ける。
+        50個ごとに、引数なしオプション２つの排他グループを作る
+    """
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.names = [f"{KINDS[i % len(KINDS)]}{i:05d}" for i in range(n)]
+        self.exclusive = [[self.names[i], self.names[i + 5]] for i in range(0, n - 5, 50)]
+        excluded = {pair[1] for pair in self.exclusive}
+        self.usable = [i for i in range(n) if self.names[i] not in excluded]
+
+    def kind(self, i: int) -> str:
+        return KINDS[i % len(KINDS)]
+
+    def short(self, i: int) -> str:
+        return SHORTS[i] if i < len(SHORTS) else ""
+
+    def cl_options(self) -> list[list[Any]]:
+        afuncs: dict[str, Any] = {"num": int, "list": [str, "APPEND"], "count": ["COUNT"],
+                                  "ratio": float}
+        options: list[list[Any]] = []
+        for i, name in enumerate(self.names):
+            ostr = f"-{self.short(i)}, --{name}" if self.short(i) else f"--{name}"
+            option: list[Any] = [name, ostr, f"{name}//<{self.kind(i)}>"]
+            if self.kind(i) in afuncs:
+                option.append(afuncs[self.kind(i)])
+            options.append(option)
+        return options
+
+    def argparser(self) -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(add_help=False)
+        groups: dict[str, Any] = {}
+        for first, second in self.exclusive:
+            groups[first] = groups[second] = parser.add_mutually_exclusive_group()
+        for i, name in enumerate(self.names):
+            target = groups.get(name, parser)
+            ostrs = [f"-{self.short(i)}", f"--{name}"] if self.short(i) else [f"--{name}"]
+            kind = self.kind(i)
+            if kind == "flag":
+                target.add_argument(*ostrs, dest=name, action="store_true")
+            elif kind == "num":
+                target.add_argument(*ostrs, dest=name, type=int)
+            elif kind == "list":
+                target.add_argument(*ostrs, dest=name, action="append")
+            elif kind == "count":
+                target.add_argument(*ostrs, dest=name, action="count")
+            else:
+                target.add_argument(*ostrs, dest=name, type=float)
+        parser.add_argument("params", nargs="*")
+        return parser
+
+    def argv(self, ntokens: int, seed: int = 0) -> list[str]:
+        """ 約 ntokens 個の要素のコマンドライン（オプションが先、後ろの 1/5 がコマンド引数） """
+        rnd = random.Random(seed)
+        args: list[str] = []
+        nparams = ntokens // 5
+        while len(args) < ntokens - nparams:
+            i = rnd.choice(self.usable)
+            name, short, kind = self.names[i], self.short(i), self.kind(i)
+            value = {"num": str(rnd.randrange(1000)), "list": f"v{rnd.randrange(100)}",
+                     "ratio": f"{rnd.random():.3f}"}.get(kind)
+            style = rnd.randrange(3) if short else rnd.randrange(2)
+            if value is None:
+                args.append(f"-{short * rnd.randint(1, 3)}" if style == 2 and kind == "count"
+                            else f"-{short}" if style == 2 else f"--{name}")
+            elif style == 0:
+                args.append(f"--{name}={value}")
+            elif style == 1:
+                args += [f"--{name}", value]
+            else:
+                args += [f"-{short}", value]
+        args += [f"file{k}.txt" for k in range(ntokens - len(args))]
+        return args
+
+
+# -----------------------------------------------------
+# 測定
+# -----------------------------------------------------
+def best_time(func: Callable[[], Any], repeat: int, min_time: float = 0.2) -> float:
+    """ func １回あたりの時間（秒。min_time 以上かかる回数ずつ、repeat 回測った最小値） """
+    start = time.perf_counter()
+    func()
+    once = time.perf_counter() - start
+    number = max(1, int(min_time / once)) if once > 0 else 1000
+    best = once
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """ func 実行中のピークメモリ（バイト。実行前からの増分） """
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak - base
+
+
+def bench_compile(n: int, repeat: int) -> dict[str, Any]:
+    """ コンパイル時間と、コンパイルしない１回だけの解析（Parse(args, options)、要素数 10）の時間 """
+    spec = Spec(n)
+    options = spec.cl_options()
+    argv = spec.argv(10, seed=n)
+    return {
+        "compile_s": best_time(lambda: cl.ParserSpec(options, spec.exclusive), repeat),
+        "argparse_build_s": best_time(spec.argparser, repeat),
+        "oneshot_s": best_time(lambda: cl.Parse(argv, options, spec.exclusive), repeat),
+        "argparse_oneshot_s": best_time(lambda: spec.argparser().parse_args(argv), repeat),
+    }
+
+
+def bench_cache(n: int, repeat: int) -> dict[str, Any]:
+    """ キャッシュファイルの大きさと、読み込み時間（指紋の計算を含む） """
+    spec = Spec(n)
+    options = spec.cl_options()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_file = pathlib.Path(tmpdir, "spec.cache")
+        cl.ParserSpec.cached(cache_file, options, spec.exclusive).parse(spec.argv(10, seed=n))
+        return {
+            "cache_bytes": cache_file.stat().st_size,
+            "cache_load_s": best_time(lambda: cl.ParserSpec.cached(cache_file, options, spec.exclusive),
+                                      repeat),
+        }
+
+
+def bench_parse(n: int, ntokens: int, repeat: int, argparse_max: int) -> dict[str, Any]:
+    spec = Spec(n)
+    cl_spec = cl.ParserSpec(spec.cl_options(), spec.exclusive)
+    parser = spec.argparser()
+    argv = spec.argv(ntokens, seed=n)
+
+    ps = cl_spec.parse(argv)
+    assert not ps.is_error, ps.get_errormessage()
+    result: dict[str, Any] = {"tokens": len(argv)}
+    result["parse_s"] = best_time(lambda: cl_spec.parse(argv), repeat)
+    result["tokens_per_s"] = len(argv) / result["parse_s"]
+    result["peak_bytes"] = peak_memory(lambda: cl_spec.parse(argv))
+
+    if len(argv) <= argparse_max:
+        ns = parser.parse_args(argv)
+        assert len(ns.params) == len(ps.params), "argparse と結果が違う"
+        result["argparse_parse_s"] = best_time(lambda: parser.parse_args(argv), repeat)
+        result["argparse_peak_bytes"] = peak_memory(lambda: parser.parse_args(argv))
+    return result
+
+
+def bench_import(repeat: int) -> dict[str, Any]:
+    result, _ = measure(repeat)
+    return {"cl_parse_ms": result["cl_parse_ms"], "argparse_ms": result["argparse_ms"]}
+
+
+def environment() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "machine": platform.machine(), "system": platform.system(),
+            "cl_parse": cl.__version__, "commit": commit}
+
+
+# -----------------------------------------------------
+# 表示、比較
+# -----------------------------------------------------
+def fmt_time(seconds: Any) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.3f}s"
+
+
+def fmt_bytes(size: Any) -> str:
+    if size is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+
+def compare(results: dict[str, Any], base: dict[str, Any], threshold: float) -> bool:
+    """ 前の結果と比べて表示する。threshold を超えて遅くなったものがあれば False """
+    ok = True
+    print()
+    print(f"compare with {base.get('environment', {}).get('commit')}")
+    for key, values in results["results"].items():
+        old = base.get("results", {}).get(key)
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if values.get(metric) is None or not old.get(metric):
+                continue
+            ratio = values[metric] / old[metric]
+            if higher_is_better:
+                ratio = 1 / ratio
+            mark = ""
+            if ratio > 1 + threshold and not metric.startswith("argparse"):
+                mark = "  NG"
+                ok = False
+            print(f"  {key:<28} {metric:<20} {ratio:6.2f}x{mark}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--options", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--tokens", type=int, nargs="+", default=[10, 1000, 100_000, 1_000_000])
+    parser.add_argument("--quick", action="store_true", help="オプション数 10、1000、要素数 10、10000 だけ")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--argparse-max", type=int, default=10_000,
+                        help="argparse で解析する要素数の上限")
+    parser.add_argument("--json", type=pathlib.Path, help="結果を書く JSONファイル")
+    parser.add_argument("--compare", type=pathlib.Path, help="比べる前の結果（JSONファイル）")
+    parser.add_argument("--threshold", type=float, default=0.2, help="遅くなったとする比（+20%% なら 0.2）")
+    args = parser.parse_args()
+    if args.quick:
+        args.options, args.tokens = [10, 1000], [10, 10_000]
+
+    results: dict[str, Any] = {}
+    results["import"] = bench_import(args.repeat)
+    print(f"import: cl_parse {results['import']['cl_parse_ms']:.2f}ms, "
+          f"argparse {results['import']['argparse_ms']:.2f}ms")
+
+    print()
+    print(f"{'options':>8} {'compile':>10} {'argparse':>10} {'oneshot':>10} {'argparse':>10}")
+    for n in args.options:
+        results[f"compile/options={n}"] = r = bench_compile(n, args.repeat)
+        print(f"{n:>8} {fmt_time(r['compile_s']):>10} {fmt_time(r['argparse_build_s']):>10} "
+              f"{fmt_time(r['oneshot_s']):>10} {fmt_time(r['argparse_oneshot_s']):>10}")
+
+    print()
+    print(f"{'options':>8} {'cache':>9} {'load':>10}")
+    for n in args.options:
+        results[f"cache/options={n}"] = r = bench_cache(n, args.repeat)
+        print(f"{n:>8} {fmt_bytes(r['cache_bytes']):>9} {fmt_time(r['cache_load_s']):>10}")
+
+    print()
+    print(f"{'options':>8} {'tokens':>8} {'parse':>10} {'tokens/s':>10} {'peak':>9} "
+          f"{'argparse':>10} {'peak':>9} {'ratio':>6}")
+    for n in args.options:
+        for ntokens in args.tokens:
+            r = bench_parse(n, ntokens, args.repeat, args.argparse_max)
+            results[f"parse/options={n}/tokens={ntokens}"] = r
+            ap = r.get("argparse_parse_s")
+            ratio = f"{ap / r['parse_s']:.2f}x" if ap else "-"
+            print(f"{n:>8} {r['tokens']:>8} {fmt_time(r['parse_s']):>10} {r['tokens_per_s']:>10.0f} "
+                  f"{fmt_bytes(r['peak_bytes']):>9} {fmt_time(ap):>10} "
+                  f"{fmt_bytes(r.get('argparse_peak_bytes')):>9} {ratio:>6}")
+
+    output = {"environment": environment(), "results": results}
+    if args.json:
+        args.json.write_text(json.dumps(output, indent=1, sort_keys=True) + "\n")
+    if args.compare:
+        return 0 if compare(output, json.loads(args.compare.read_text()), args.threshold) else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,38 +7,61 @@
 # -------------------------------------------------------------
 from __future__ import annotations
 
-import glob
-import pathlib
-import platform
+import itertools
+import keyword
+import operator
 import sys
-from collections.abc import Callable, Iterable, Iterator
+import weakref
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from enum import Enum, EnumMeta, Flag, IntFlag, auto
-from typing import Any, Optional, Sequence, TextIO, Union
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple, Optional, Sequence, TextIO, Union
+
+if TYPE_CHECKING:
+    import pathlib
+    import re
+
+__version__ = "1.0.0"
 
-exist_debugmodule = False
 # -------------------------------------------------------------
 # デバッグ用モジュール（cl_parse_debug）読み込み
-# モジュールが不要であれば、下の節を削除してください。
+# 3ハイフン（---）オプションが指定された時に、初めて読み込む。
+# モジュールが不要であれば、cl_parse_debugmodule.py を削除してください。
 # -------------------------------------------------------------
-sys.path.append(str(pathlib.Path(__file__).parent))
-try:
-    import cl_parse_debugmodule as cld
-    exist_debugmodule = True
+_debugmodule: Any = None        # 読み込んだモジュール（無ければ False）
+
+
+def _load_debugmodule() -> Any:
+    """ デバッグ用モジュールを読み込んで返す（無ければ False） """
+    global _debugmodule
+    if _debugmodule is None:
+        import os
+        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+        try:
+            import cl_parse_debugmodule
+            _debugmodule = cl_parse_debugmodule
+        except ModuleNotFoundError:
+            _debugmodule = False
+    return _debugmodule
 
-except ModuleNotFoundError:
-    exist_debugmodule = False
+
+def __getattr__(name: str) -> Any:
+    """ exist_debugmodule、cld は、参照された時にデバッグ用モジュールを読み込む """
+    if name == 'exist_debugmodule':
+        return bool(_load_debugmodule())
+    if name == 'cld' and _load_debugmodule():
+        return _debugmodule
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # -------------------------------------------------------------
 # 日本語混じり文字列を整形するクラスの一部の超簡易版 for tabprint
 # tabplintが不要なら、両方削ってください。
 # -------------------------------------------------------------
-import unicodedata
-
-
 class Wstr(str):
     def width(self) -> int:
         """ 日本語混じり文字列の表示幅を取得する """
+        import unicodedata
         return sum([(2 if unicodedata.east_asian_width(c) in 'FWA' else 1) for c in self])
 
     def ljust(self, __width: int, __fillchar: str = " ") -> 'Wstr':     # type: ignore
@@ -113,6 +136,16 @@ def tabprint(lines: list[str], tablist: list[int] = [8],
 # -------------------------------------------------------------
 # こまかいの（一応汎用）
 # -------------------------------------------------------------
+def _path_name(path: str, stem: bool = False) -> str:
+    """ パスのファイル名（stem なら拡張子を除いたもの）を返す（pathlib.PurePath の name、stem と同じ） """
+    import os
+    name = os.path.basename(path.rstrip('/\\') if isWin else path.rstrip('/'))
+    if stem:
+        root, ext = os.path.splitext(name)
+        return root if ext else name
+    return name
+
+
 def split2(text: str, sp: str) -> tuple[str, Optional[str]]:
     """ 文字列をspで２分割してタプルで返す """
     """ セパレータ(sp) 以降が無ければ、ret[1]は空文字、
@@ -124,11 +157,10 @@ def split2(text: str, sp: str) -> tuple[str, Optional[str]]:
 
 def count_prefix(text: str, prefix_char: str, max_count: int = 0) -> int:
     ''' プリフィックス文字の数を返す（max_count > 0 のとき、max_countが最大値） '''
-    count = 0
-    iter_text = iter(text[0:len(text) if max_count <= 0 else max_count])
-    while next(iter_text, None) == prefix_char:
-        count += 1
-    return count
+    if len(prefix_char) != 1:       # １文字でなければ、一致しない
+        return 0
+    head = text if max_count <= 0 else text[:max_count]
+    return len(head) - len(head.lstrip(prefix_char))
 
 
 class LooseTuplet:
@@ -188,61 +220,767 @@ class Turn(Enum):
 
 
 # -------------------------------------------------------------
-# ワイルドカード展開モジュール（Windows汎用）
+# ワイルドカード展開モジュール（汎用）
 # -------------------------------------------------------------
 
 # Windowsかどうか判定
-isWin = True if platform.system() == 'Windows' else False
+isWin = sys.platform == 'win32'
 
 
-def __getWild(wild: str) -> list[str]:
-    """ ホームディレクトリ '~'、ワイルドカードを展開して、リストで返す。
-        頭にハイフンが付いているもの、ワイルドカードに展開できないものはそのまま返す
-        （その時は、「要素が1つ」のリストになる）
+class _DirCache:
+    """ ディレクトリ一覧のキャッシュ（展開１回分）。
+        同じディレクトリは一度だけ os.scandir で読んで、全部のパターンで使い回す
+        （「**」で大きなツリーを辿っても、保持するのは MAXSIZE ディレクトリ分まで）
     """
-    ret: list[str] = []
-    if wild.startswith(' ') or wild.startswith('\\'):
-        ret.append(wild[1:])
-        return ret
-    if wild.startswith('~'):
-        wild = str(pathlib.Path.home()) + wild[1:]
-
-    if '*' in wild or '?' in wild or ('[' in wild and len(wild) > 1):
-        for w in glob.glob(wild):
-            ret.append(w)
-        if not ret:
-            ret.append(wild)
+    MAXSIZE = 1024
+
+    def __init__(self) -> None:
+        self.__listing: dict[str, list[tuple[str, bool]]] = {}
+
+    def listdir(self, dirname: str, dironly: bool = False) -> list[str]:
+        """ ディレクトリ中の名前のリストを返す（dironly なら、ディレクトリのみ） """
+        entries = self.__listing.get(dirname)
+        if entries is None:
+            import os
+            entries = []
+            try:
+                with os.scandir(dirname or os.curdir) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        entries.append((entry.name, is_dir))
+            except OSError:
+                pass
+            if len(self.__listing) >= self.MAXSIZE:    # 古いものから捨てる
+                del self.__listing[next(iter(self.__listing))]
+            self.__listing[dirname] = entries
+        if dironly:
+            return [name for name, is_dir in entries if is_dir]
+        return [name for name, _ in entries]
+
+
+_MAGIC: Optional[re.Pattern[str]] = None      # 最初に使う時にコンパイルする
+
+
+def _has_magic(text: str) -> bool:
+    global _MAGIC
+    if _MAGIC is None:
+        import re
+        _MAGIC = re.compile(r'[*?[]')
+    return _MAGIC.search(text) is not None
+
+
+def _iglob(pathname: str, recursive: bool, dironly: bool, cache: _DirCache) -> Iterator[str]:
+    """ glob.glob() と同じ規則で展開する（ディレクトリ一覧は cache から取得） """
+    import os
+    dirname, basename = os.path.split(pathname)
+    if not _has_magic(pathname):
+        if (os.path.isdir(pathname) if dironly else os.path.lexists(pathname)):
+            yield pathname
+        return
+    if not dirname:
+        if recursive and basename == '**':
+            yield from _glob2(dirname, basename, dironly, cache)
+        else:
+            yield from _glob1(dirname, basename, dironly, cache)
+        return
+    # ドライブ、ルート（"/" や "C:\"）は、split しても変わらない
+    if dirname != pathname and _has_magic(dirname):
+        dirs: Iterable[str] = _iglob(dirname, recursive, True, cache)
     else:
-        ret.append(wild)
-    return ret
+        dirs = [dirname]
+    if not _has_magic(basename):
+        glob_in_dir = _glob0
+    elif recursive and basename == '**':
+        glob_in_dir = _glob2
+    else:
+        glob_in_dir = _glob1
+    for dirname in dirs:
+        for name in glob_in_dir(dirname, basename, dironly, cache):
+            yield os.path.join(dirname, name)
+
+
+def _glob0(dirname: str, basename: str, dironly: bool, cache: _DirCache) -> list[str]:
+    """ ワイルドカードを含まない名前 """
+    import os
+    if not basename:        # パターンの最後が区切り文字（ディレクトリのみ）
+        return [basename] if os.path.isdir(dirname) else []
+    return [basename] if os.path.lexists(os.path.join(dirname, basename)) else []
+
+
+def _glob1(dirname: str, pattern: str, dironly: bool, cache: _DirCache) -> list[str]:
+    """ ワイルドカードを含む名前（ドットで始まる名前は、パターンもドットで始まる時のみ）"""
+    import fnmatch
+    names = cache.listdir(dirname, dironly)
+    if pattern[0] != '.':
+        names = [name for name in names if name[0] != '.']
+    return fnmatch.filter(names, pattern)
+
+
+def _glob2(dirname: str, pattern: str, dironly: bool, cache: _DirCache) -> Iterator[str]:
+    """ 再帰的なワイルドカード（**）。自分自身（空文字）と、その下の全部 """
+    yield ''
+    yield from _rlistdir(dirname, dironly, cache)
+
+
+def _rlistdir(dirname: str, dironly: bool, cache: _DirCache) -> Iterator[str]:
+    import os
+    for name in cache.listdir(dirname, dironly):
+        if name[0] != '.':
+            yield name
+            for sub in _rlistdir(os.path.join(dirname, name), dironly, cache):
+                yield os.path.join(name, sub)
+
+
+# -------------------------------------------------------------
+# ブレース展開（汎用）
+# {a,b,c}、{1..10}、{001..100..2}、{a..z}、入れ子 {a,b{1,2}} など
+# 組み合わせは順に作って返すので、展開の数が膨大でもメモリ使用量は一定
+# -------------------------------------------------------------
+_BRACE_NUM: Optional[re.Pattern[str]] = None   # 数の範囲（最初に使う時にコンパイルする）
+_BRACE_CHAR: Optional[re.Pattern[str]] = None  # 文字の範囲
+
+
+class _BraceRange:
+    """ ブレース展開の範囲指定（{1..10}、{a..z} など） """
+    __slots__ = ('range', 'width', 'char')
+
+    def __init__(self, start: int, stop: int, step: int, width: int = 0, char: bool = False) -> None:
+        step = abs(step) or 1
+        self.range = range(start, stop + 1, step) if start <= stop else range(start, stop - 1, -step)
+        self.width = width      # ゼロ詰めの桁数
+        self.char = char        # 文字の範囲
+
+    def __iter__(self) -> Iterator[str]:
+        if self.char:
+            return map(chr, self.range)
+        if self.width:
+            return (f"{n:0{self.width}d}" for n in self.range)
+        return map(str, self.range)
+
+    def __len__(self) -> int:
+        return len(self.range)
+
+
+# ブレース展開の部品：文字列、_BraceRange、選択肢（部品の列のリスト）
+_BraceNode = Union[str, _BraceRange, list[list[Any]]]
+
+
+def _zero_padded(num: str) -> bool:
+    return num.lstrip('-').startswith('0') and len(num.lstrip('-')) > 1
+
+
+def _brace_range(inner: str) -> Optional[_BraceRange]:
+    """ 範囲指定なら _BraceRange を返す """
+    global _BRACE_NUM, _BRACE_CHAR
+    if _BRACE_NUM is None or _BRACE_CHAR is None:
+        import re
+        _BRACE_NUM = re.compile(r'(-?\d+)\.\.(-?\d+)(?:\.\.(-?\d+))?\Z')
+        _BRACE_CHAR = re.compile(r'([a-zA-Z])\.\.([a-zA-Z])(?:\.\.(-?\d+))?\Z')
+    m = _BRACE_NUM.match(inner)
+    if m:
+        start, stop, step = m.groups()
+        width = max(len(start), len(stop)) if _zero_padded(start) or _zero_padded(stop) else 0
+        return _BraceRange(int(start), int(stop), int(step or 1), width)
+    m = _BRACE_CHAR.match(inner)
+    if m:
+        start, stop, step = m.groups()
+        return _BraceRange(ord(start), ord(stop), int(step or 1), char=True)
+    return None
+
+
+def _find_brace(text: str, i: int, end: int) -> tuple[int, list[int]]:
+    """ text[i] の '{' に対応する '}' の位置と、その中の（入れ子でない）',' の位置を返す。
+        対応する '}' が無ければ -1
+    """
+    depth = 0
+    commas: list[int] = []
+    for j in range(i, end):
+        c = text[j]
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return j, commas
+        elif c == ',' and depth == 1:
+            commas.append(j)
+    return -1, commas
+
+
+def _parse_braces(text: str, i: int = 0, end: Optional[int] = None) -> list[_BraceNode]:
+    """ text[i:end] を、ブレース展開の部品の列にする。
+        ',' も範囲指定も無い {...} や、対応の取れない '{' はそのままの文字
+    """
+    if end is None:
+        end = len(text)
+    nodes: list[_BraceNode] = []
+    start = i
+    while i < end:
+        if text[i] != '{':
+            i += 1
+            continue
+        close, commas = _find_brace(text, i, end)
+        if close < 0:
+            break
+        node: Optional[_BraceNode] = None
+        if commas:
+            bounds = [i] + commas + [close]
+            node = [_parse_braces(text, a + 1, b) for a, b in zip(bounds, bounds[1:])]
+        else:
+            node = _brace_range(text[i + 1:close])
+        if node is None:        # 展開しない '{'（中の {...} は展開する）
+            i += 1
+            continue
+        if start < i:
+            nodes.append(text[start:i])
+        nodes.append(node)
+        i = start = close + 1
+    if start < end:
+        nodes.append(text[start:end])
+    return nodes
+
+
+def _iter_nodes(nodes: list[_BraceNode], k: int = 0) -> Iterator[str]:
+    """ 部品の列 nodes[k:] の組み合わせを、順に作って返す """
+    if k == len(nodes):
+        yield ''
+        return
+    node = nodes[k]
+    if isinstance(node, str):
+        heads: Iterable[str] = (node, )
+    elif isinstance(node, _BraceRange):
+        heads = node
+    else:
+        heads = itertools.chain.from_iterable(map(_iter_nodes, node))
+    if k + 1 == len(nodes):
+        yield from heads
+        return
+    for head in heads:
+        for tail in _iter_nodes(nodes, k + 1):
+            yield head + tail
+
+
+def _count_nodes(nodes: list[_BraceNode]) -> int:
+    """ 部品の列の組み合わせの数 """
+    count = 1
+    for node in nodes:
+        if isinstance(node, _BraceRange):
+            count *= len(node)
+        elif not isinstance(node, str):
+            count *= sum(map(_count_nodes, node))
+    return count
+
+
+def _has_braces(nodes: list[_BraceNode]) -> bool:
+    return not (len(nodes) <= 1 and all(isinstance(node, str) for node in nodes))
+
+
+def iter_braces(text: str) -> Iterator[str]:
+    """ 文字列をブレース展開して、順に返す（展開するものが無ければ、そのまま） """
+    nodes = _parse_braces(text)
+    return _iter_nodes(nodes) if _has_braces(nodes) else iter((text, ))
+
+
+def count_braces(text: str) -> int:
+    """ ブレース展開の結果の数を返す（展開はしない） """
+    return _count_nodes(_parse_braces(text))
+
+
+class WildcardLimitError(ValueError):
+    """ ワイルドカード展開（ブレース展開）の結果の数が、上限（max_matches）を超えた """
+    def __init__(self, arg: str) -> None:
+        super().__init__(_error_message('E41', arg=arg))
+        self.arg = arg
+
+
+class _Expander:
+    """ コマンド引数のブレース展開、ワイルドカード展開。
+        ディレクトリの一覧と、展開した数（max_matches > 0 なら、その数まで）を全部の引数で共有する
+    """
+    def __init__(self, recursive: bool, max_matches: int = 0,
+                 wildcard: bool = True, brace: bool = False) -> None:
+        self.recursive = recursive
+        self.max_matches = max_matches
+        self.wildcard = wildcard        # ワイルドカード展開する
+        self.brace = brace              # ブレース展開する
+        self.count = 0                  # これまでに展開した数
+        self.cache = _DirCache()
+
+    def __call__(self, wild: str) -> Iterator[str]:
+        """ ブレース、ホームディレクトリ '~'、ワイルドカードを展開して、順に返す。
+            頭に '\\' かスペースが付いているもの（それは取り除く）、
+            ワイルドカードに展開できないものはそのまま返す
+        """
+        if wild.startswith(' ') or wild.startswith('\\'):
+            yield wild[1:]
+            return
+        nodes = _parse_braces(wild) if self.brace else None
+        if nodes is None or not _has_braces(nodes):
+            yield from self.__glob(wild, wild, False)
+            return
+        for word in _iter_nodes(nodes):
+            yield from self.__glob(word, wild, True)
+
+    def __glob(self, wild: str, arg: str, counted: bool) -> Iterator[str]:
+        """ ワイルドカードを展開する（counted なら、展開しなくても数える。arg は元の引数） """
+        if not self.wildcard:
+            self.__count(arg, counted)
+            yield wild
+            return
+        if wild.startswith('~'):
+            import os
+            wild = os.path.expanduser('~') + wild[1:]
+
+        if not ('*' in wild or '?' in wild or ('[' in wild and len(wild) > 1)):
+            self.__count(arg, counted)
+            yield wild
+            return
+        it = _iglob(wild, self.recursive, False, self.cache)
+        if self.recursive and wild == '**':
+            next(it)                # 「**」単独の時は、自分自身（空文字）は返さない
+        found = False
+        for name in it:
+            self.__count(arg, True)
+            found = True
+            yield name
+        if not found:
+            self.__count(arg, counted)
+            yield wild
+
+    def __count(self, arg: str, counted: bool) -> None:
+        if counted:
+            self.count += 1
+            if self.max_matches and self.count > self.max_matches:
+                raise WildcardLimitError(arg)
+
+    def expand(self, args: Iterable[str]) -> Iterator[str]:
+        for p in args:
+            yield from self(p)
+
+
+def iter_wildcards(args: Iterable[str], recursive: bool = True,
+                   max_matches: int = 0) -> Iterator[str]:
+    """ 渡された文字列の、ワイルドカード（recursive なら「**」も）を展開しながら順に返す。
+        一致した数が max_matches（> 0 の時）を超えたら、WildcardLimitError
+    """
+    return _Expander(recursive, max_matches).expand(args)
+
+
+def expand_wildcards(args: Iterable[str], recursive: bool = True,
+                     max_matches: int = 0) -> list[str]:
+    """ 渡された文字列の、ワイルドカード（recursive なら「**」も）を展開する。
+        展開中は、ディレクトリの一覧を全部の文字列で共有する
+    """
+    return list(iter_wildcards(args, recursive, max_matches))
 
 
 def _wArgs(__args: list[str]) -> list[str]:
-    """ 渡されたリスト中の項目をワイルドカード展開する """
-    ret: list[str] = []
-    for p in __args:
-        ret += __getWild(p)
-    return ret
+    """ 渡されたリスト中の項目をワイルドカード展開する（Windows用、「**」は展開しない） """
+    return expand_wildcards(__args, recursive=False)
+
+
+def _param_expander(wildcard: bool, winexpand: bool, max_matches: int = 0,
+                    brace: bool = False) -> Optional[_Expander]:
+    """ コマンド引数を展開する _Expander を返す（展開しないなら None）。
+        ワイルドカードは、wildcard なら全環境で「**」も展開、そうでなければ Windows のみ。
+        ブレースは、brace なら全環境で展開
+    """
+    glob = wildcard or (isWin and winexpand)
+    if not glob and not brace:
+        return None
+    return _Expander(wildcard, max_matches, glob, brace)
+
+
+class LazyParams(Sequence[str]):
+    """ 参照した分だけワイルドカードを展開する、コマンド引数のシーケンス。
+        展開したものは保持するので、何度でも先頭から参照できる。
+        一致した数が上限を超えたら、その時点で WildcardLimitError（以降も同じ）
+    """
+    def __init__(self, it: Iterator[str],
+                 on_error: Optional[Callable[[WildcardLimitError], None]] = None) -> None:
+        self.__it: Optional[Iterator[str]] = it
+        self.__items: list[str] = []
+        self.__on_error = on_error
+        self.__error: Optional[WildcardLimitError] = None
+
+    def __next_item(self) -> bool:
+        """ １つ展開する（もう無ければ False） """
+        if self.__error is not None:
+            raise self.__error
+        if self.__it is None:
+            return False
+        try:
+            self.__items.append(next(self.__it))
+        except StopIteration:
+            self.__it = None
+            return False
+        except WildcardLimitError as e:
+            self.__it = None
+            self.__error = e
+            if self.__on_error is not None:
+                self.__on_error(e)
+            raise
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        i = 0
+        while i < len(self.__items) or self.__next_item():
+            yield self.__items[i]
+            i += 1
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice) or index < 0:
+            self.__fill()
+        else:
+            while index >= len(self.__items) and self.__next_item():
+                pass
+        return self.__items[index]
+
+    def __len__(self) -> int:
+        self.__fill()
+        return len(self.__items)
+
+    def __fill(self) -> None:
+        while self.__next_item():
+            pass
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, LazyParams)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        more = ", ..." if self.__it is not None else ""
+        return f"{type(self).__name__}({self.__items!r}{more})"
 
 
 # -------------------------------------------------------------
 # ファイル展開モジュール（ほとんど cl_parse専用）
 # 使い物になるか（コマンドラインで @xxxx を取得できるか）要検証★★★
 # -------------------------------------------------------------
-def file_expand(args: list[str]) -> list[str]:
-    """ リスト中の、”@<ファイル名>" の要素を展開する """
-    ret: list[str] = []
+class RecursiveIncludeError(ValueError):
+    """ ファイル展開中のファイルを、その中から再び @<ファイル名> で指定した """
+
+
+# ファイル中のブロック（空白区切り）。"..." '...' で囲んだ部分は空白を含めてそのまま
+# （引用符は取り除く）。引用符の閉じ忘れは、ファイルの終わりまでとする
+# （最初にファイルを読む時にコンパイルする）
+_FILE_BLOCK: Optional[re.Pattern[bytes]] = None
+_FILE_QUOTED: Optional[re.Pattern[bytes]] = None
+
+
+def _unquote(m: re.Match[bytes]) -> bytes:
+    return m.group(1) if m.group(1) is not None else m.group(2)
+
+
+def file_expand(args: list[str], encoding: Optional[str] = None,
+                cache: Optional[FileCache] = None) -> list[str]:
+    """ リスト中の、”@<ファイル名>" の要素を展開する（cache があれば、読んだブロックをキャッシュする） """
+    return list(_iter_file_expand(args, encoding, cache))
+
+
+def _iter_file_expand(args: Iterable[str], encoding: Optional[str] = None,
+                      cache: Optional[FileCache] = None) -> Iterator[str]:
+    """ ”@<ファイル名>" の要素を展開しながら、順に返す（ファイルは少しずつ読み込む）
+        （ファイルが無ければ FileNotFoundError(<要素>)、循環していれば RecursiveIncludeError(<要素>)、
+          ディレクトリなどで開けなければ OSError（filename は <要素>））
+    """
+    if encoding is None:
+        import locale
+        encoding = locale.getpreferredencoding(False)
+    active: set[tuple[int, int]] = set()    # 展開中のファイル（循環チェック用）
     for item in args:
         if item.startswith("@"):
-            try:
-                with open(item[1:]) as f:
-                    text = f.read().split()
-            except FileNotFoundError:
-                raise Exception(item)
-            ret += text
+            yield from _iter_file_blocks(item, encoding, active, cache)
         else:
-            ret += [item]
-    return ret
+            yield item
+
+
+def _iter_file_blocks(item: str, encoding: str, active: set[tuple[int, int]],
+                      cache: Optional[FileCache]) -> Iterator[str]:
+    """ "@<ファイル名>" のファイルのブロックを順に返す。
+        ファイル中の @<ファイル名>（_read_file_entries() 参照）は、さらに展開する
+    """
+    import os
+    try:
+        f = open(item[1:], 'rb')
+    except FileNotFoundError:
+        raise FileNotFoundError(item)
+    except OSError as e:
+        raise OSError(e.errno, e.strerror, item)
+    with f:
+        st = os.fstat(f.fileno())
+        key = (st.st_dev, st.st_ino)
+        if key in active:
+            raise RecursiveIncludeError(item)
+        if st.st_size == 0:
+            return
+        active.add(key)
+        try:
+            entries = cache._load(item[1:], st, encoding) if cache is not None else None
+            if entries is None:
+                entries = _read_file_entries(f, encoding)
+                if cache is not None:
+                    entries = cache._record(entries, item[1:], st, encoding)
+            for include, block in entries:
+                if include:
+                    yield from _iter_file_blocks(block, encoding, active, cache)
+                else:
+                    yield block
+        finally:
+            active.discard(key)
+
+
+def _read_file_entries(f: BinaryIO, encoding: str) -> Iterator[tuple[bool, str]]:
+    """ ファイルを mmap で開いて、(@<ファイル名>かどうか, ブロック) を順に返す。
+        NUL文字を含むファイルは NUL区切り（引用符、@<ファイル名> はそのまま）、
+        それ以外は空白区切りで、引用符で囲んでいない @<ファイル名> は展開の対象にする
+    """
+    import mmap
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm.find(b"\0") >= 0:         # NUL区切り（find -print0 など）
+            pos, size = 0, len(mm)
+            while pos < size:
+                end = mm.find(b"\0", pos)
+                if end < 0:
+                    end = size
+                yield False, mm[pos:end].decode(encoding)
+                pos = end + 1
+            return
+
+        global _FILE_BLOCK, _FILE_QUOTED
+        if _FILE_BLOCK is None or _FILE_QUOTED is None:
+            import re
+            _FILE_BLOCK = re.compile(rb'''(?:[^\s"']+|"[^"]*(?:"|\Z)|'[^']*(?:'|\Z))+''')
+            _FILE_QUOTED = re.compile(rb'''"([^"]*)"?|'([^']*)'?''')
+        start = 3 if mm[:3] == b"\xef\xbb\xbf" else 0   # UTF-8 の BOM は飛ばす
+        for m in _FILE_BLOCK.finditer(mm, start):
+            block = m.group()
+            if b'"' in block or b"'" in block:
+                yield False, _FILE_QUOTED.sub(_unquote, block).decode(encoding)
+            else:
+                yield block[:1] == b"@", block.decode(encoding)
+
+
+# -----------------------------------------------------
+# ファイル展開のキャッシュ
+# -----------------------------------------------------
+class FileCache:
+    """ ファイル展開（@<ファイル名>）で読んだブロックを、ファイルごとにキャッシュディレクトリに保存する。
+        ファイルのパス、更新時刻（ns）、サイズが同じなら、次からはファイルを解析せずにキャッシュから読む
+        （別のプロセスからも使える。合計が maxsize バイトを超えたら、古いものから消す）
+    """
+    MAGIC = b"cl_parse file cache 1\n"
+
+    def __init__(self, directory: Union[str, pathlib.Path, None] = None,
+                 maxsize: int = 64 * 1024 * 1024,   # キャッシュディレクトリの最大サイズ（バイト）
+                 min_filesize: int = 64 * 1024,     # これより小さいファイルはキャッシュしない
+                 ) -> None:
+        import pathlib
+        self.directory = pathlib.Path(directory) if directory is not None else _default_cache_dir()
+        self.maxsize = maxsize
+        self.min_filesize = min_filesize
+        self.hits = 0           # キャッシュから読んだ回数
+        self.misses = 0         # ファイルを解析して、キャッシュに書いた回数
+        self.evictions = 0      # maxsize を超えて消したキャッシュファイルの数
+
+    def __path(self, path: str, encoding: str) -> pathlib.Path:
+        """ ファイル（のパス）、エンコーディング -> キャッシュファイル """
+        import hashlib
+        import os
+        name = hashlib.sha256(f"{os.path.realpath(path)}\0{encoding}".encode(
+            'utf-8', 'surrogatepass')).hexdigest()[:32]
+        return self.directory / (name + ".tok")
+
+    @staticmethod
+    def __header(st: Any, encoding: str) -> bytes:
+        return FileCache.MAGIC + f"{st.st_mtime_ns} {st.st_size} {encoding}\n".encode()
+
+    def _load(self, path: str, st: Any, encoding: str) -> Optional[Iterator[tuple[bool, str]]]:
+        """ キャッシュが有効なら、(@<ファイル名>かどうか, ブロック) のイテレータを返す（無効なら None） """
+        if st.st_size < self.min_filesize:
+            return None
+        target = self.__path(path, encoding)
+        header = self.__header(st, encoding)
+        try:
+            f = open(target, 'rb')
+        except OSError:
+            self.misses += 1
+            return None
+        if f.read(len(header)) != header:       # 更新時刻かサイズが違う（古いキャッシュ）
+            f.close()
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            import os
+            os.utime(target)                    # 最近使ったものとして残す
+        except OSError:
+            pass
+        return self.__iter_entries(f, len(header))
+
+    @staticmethod
+    def __iter_entries(f: BinaryIO, start: int) -> Iterator[tuple[bool, str]]:
+        """ キャッシュファイルから、(@<ファイル名>かどうか, ブロック) を順に返す """
+        import mmap
+        import os
+        with f:
+            if os.fstat(f.fileno()).st_size <= start:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos, size = start, len(mm)
+                while pos < size:
+                    end = mm.find(b"\0", pos)
+                    if end < 0:
+                        end = size
+                    yield mm[pos:pos + 1] == b"I", mm[pos + 1:end].decode('utf-8', 'surrogatepass')
+                    pos = end + 1
+
+    def _record(self, entries: Iterator[tuple[bool, str]], path: str, st: Any,
+                encoding: str) -> Iterator[tuple[bool, str]]:
+        """ entries をそのまま返しながら、キャッシュファイルに書く（最後まで読まれた時だけ残す） """
+        import os
+        if st.st_size < self.min_filesize:
+            yield from entries
+            return
+        target = self.__path(path, encoding)
+        import threading
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        out: Optional[BinaryIO] = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            out = open(tmp, 'wb')
+            out.write(self.__header(st, encoding))
+        except OSError:                         # 書けなければ、キャッシュしない
+            out = None
+        try:
+            for include, block in entries:
+                if out is not None:
+                    try:
+                        out.write((b"I" if include else b"T") +
+                                  block.encode('utf-8', 'surrogatepass') + b"\0")
+                    except OSError:
+                        out.close()
+                        out = None
+                yield include, block
+            if out is not None:
+                out.close()
+                out = None
+                os.replace(tmp, target)
+                self.__evict()
+        finally:
+            if out is not None:
+                out.close()
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    def __evict(self) -> None:
+        """ キャッシュディレクトリの合計が maxsize を超えていたら、古いものから消す """
+        files = []
+        total = 0
+        for p in self.directory.glob("*.tok"):
+            try:
+                stat = p.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, p))
+            total += stat.st_size
+        files.sort()
+        for _, size, p in files:
+            if total <= self.maxsize:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """ キャッシュファイルをすべて消す """
+        for p in self.directory.glob("*.tok"):
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+def _default_cache_dir() -> pathlib.Path:
+    """ 既定のキャッシュディレクトリ（環境変数 CL_PARSE_CACHE_DIR があればそこ） """
+    import os
+    import pathlib
+    base = os.environ.get("CL_PARSE_CACHE_DIR")
+    if base:
+        return pathlib.Path(base)
+    if isWin:
+        root = os.environ.get("LOCALAPPDATA") or str(pathlib.Path.home())
+    else:
+        root = os.environ.get("XDG_CACHE_HOME") or str(pathlib.Path.home() / ".cache")
+    return pathlib.Path(root) / "cl_parse" / "files"
+
+
+_default_file_cache: Optional[FileCache] = None
+
+
+def _get_file_cache(file_cache: Union[bool, FileCache]) -> Optional[FileCache]:
+    """ file_cache 引数（True は既定の FileCache、False はキャッシュしない）から FileCacheを返す """
+    global _default_file_cache
+    if isinstance(file_cache, FileCache):
+        return file_cache
+    if not file_cache:
+        return None
+    if _default_file_cache is None:
+        _default_file_cache = FileCache()
+    return _default_file_cache
+
+
+class _ExpandError(Exception):
+    """ 解析中のファイル展開エラー（eno はエラー番号、str() はエラー理由の arg） """
+    def __init__(self, eno: str, arg: str) -> None:
+        super().__init__(arg)
+        self.eno = eno
+
+
+def _iter_file_expand_checked(args: Iterable[str], cache: Optional[FileCache]) -> Iterator[str]:
+    """ _iter_file_expand() と同じ。展開のエラーは、_ExpandError にして上げる """
+    try:
+        yield from _iter_file_expand(args, cache=cache)
+    except RecursiveIncludeError as e:
+        raise _ExpandError('E02', str(e))
+    except FileNotFoundError as e:
+        raise _ExpandError('E01', str(e))
+    except OSError as e:                # ディレクトリ、権限が無いなど
+        raise _ExpandError('E03', e.filename if e.filename else str(e))
+    except Exception as e:              # 読めない（デコードできない）など
+        raise _ExpandError('E03', str(e))
+
+
+def _recorded(args: Iterable[str], record: list[str]) -> Iterator[str]:
+    """ args を順に返しながら、record に追加する """
+    for arg in args:
+        record.append(arg)
+        yield arg
+
+
+def read_args(file: TextIO = sys.stdin, sep: str = "\0", bufsize: int = 65536) -> Iterator[str]:
+    """ ファイル（標準入力など）から、sep 区切りの引数を少しずつ読み込んで順に返す
+        （find -print0 の出力などを、全部メモリに読み込まずに解析するため）
+    """
+    rest = ""
+    while True:
+        buf = file.read(bufsize)
+        if not buf:
+            break
+        items = (rest + buf).split(sep)
+        rest = items.pop()      # 最後の要素は、次の読み込みに続くかもしれない
+        yield from items
+    if rest:
+        yield rest
 
 
 # -----------------------------------------------------
@@ -268,12 +1006,134 @@ def cnv_enum(afunc: EnumMeta, ename: str) -> Any:
         raise ValueError(f"option argument {e} must be a member of {wmembers}")
 
 
+def _convert_one(afunc: Any, optarg: str) -> Any:
+    """ オプション引数を１つの処理タイプで変換する（変換エラーは ValueError） """
+    # 「str」の時はそのまま格納
+    if afunc is str:
+        return optarg
+
+    # Enum、Flag類
+    elif isinstance(afunc, EnumMeta):
+        return cnv_enum(afunc, optarg)
+
+    # 直接変換呼び出しできるもの
+    return afunc(optarg)
+
+
+def _convert_optarg(afuncs: list[Any], optarg: str,
+                    cache: Optional[ConvertCache] = None) -> tuple[bool, Any, list[str]]:
+    """ オプション引数を変換する。(成否, 変換後の値, 変換エラーメッセージ) を返す
+        （afuncs を順に試して、最初に変換できたものを採用する）
+    """
+    emsgs: list[str] = []
+    for __afunc in afuncs:
+        if callable(__afunc):
+            try:
+                if cache is None or __afunc is str:
+                    return True, _convert_one(__afunc, optarg), []
+                return True, cache.convert(__afunc, optarg), []
+
+            except ValueError as e:     # 変換エラー
+                emsgs.append(str(e))
+    return False, None, emsgs
+
+
+# -----------------------------------------------------
+# 変換結果のキャッシュ
+# -----------------------------------------------------
+# 変換結果を覚えてよい（変更できない）型。Enum、datetime などは _immutable() で見る
+_IMMUTABLE_TYPES = frozenset((type(None), bool, int, float, complex, str, bytes, range))
+_IMMUTABLE_MODULES = frozenset(('datetime', 'decimal', 'fractions', 'uuid', 'ipaddress'))
+
+
+def _immutable(value: Any) -> bool:
+    """ 変更できない値か（複数の解析で同じオブジェクトを返してもよいか） """
+    cls = type(value)
+    if cls in _IMMUTABLE_TYPES or isinstance(value, Enum):
+        return True
+    if cls is tuple or cls is frozenset:
+        return all(map(_immutable, value))
+    return cls.__module__ in _IMMUTABLE_MODULES
+
+
+class ConvertCache:
+    """ 変換関数の結果を (変換関数, オプション引数) をキーにして覚えておく、大きさ制限付きのキャッシュ。
+        古いもの（最近使われていないもの）から捨てる。
+        覚えた結果は複数の解析で同じオブジェクトを返すので、変更できない型（_immutable()）の結果だけ覚える
+    """
+    def __init__(self, maxsize: int = 1024, exclude: Iterable[Any] = ()) -> None:
+        import collections
+        self.maxsize = maxsize              # 覚えておく最大数
+        self.hits = 0                       # キャッシュにあった回数
+        self.misses = 0                     # キャッシュになかった回数（変換して覚えた）
+        self.skips = 0                      # 変換したが、変更できる結果なので覚えなかった回数
+        self.__exclude = set(exclude)       # キャッシュしない変換関数（副作用があるものなど）
+        self.__data: collections.OrderedDict[Any, tuple[bool, Any]] = collections.OrderedDict()
+
+    def exclude(self, afunc: Any) -> None:
+        """ この変換関数の結果は覚えないようにする """
+        self.__exclude.add(afunc)
+        for key in [key for key in self.__data if key[0] is afunc]:
+            del self.__data[key]
+
+    def clear(self) -> None:
+        """ 覚えている結果と、回数をクリアする """
+        self.__data.clear()
+        self.hits = self.misses = self.skips = 0
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def convert(self, afunc: Any, optarg: str) -> Any:
+        """ afunc で optarg を変換する。覚えていれば、その結果（変換エラーも）を返す """
+        key = (afunc, optarg)
+        try:
+            if afunc in self.__exclude:
+                return _convert_one(afunc, optarg)
+            ok, value = self.__data[key]
+        except TypeError:                   # hashできない変換関数は覚えない
+            return _convert_one(afunc, optarg)
+        except KeyError:
+            try:
+                value = _convert_one(afunc, optarg)
+                ok = True
+            except ValueError as e:
+                ok, value = False, str(e)
+            if ok and not _immutable(value):   # 変更できる結果（list など）は覚えない
+                self.skips += 1
+                return value
+            self.misses += 1
+            self.__data[key] = (ok, value)
+            if len(self.__data) > self.maxsize:
+                self.__data.popitem(last=False)
+        else:
+            self.hits += 1
+            self.__data.move_to_end(key)
+        if not ok:
+            raise ValueError(value)
+        return value
+
+
+class _LazyValue:
+    """ 遅延変換モードで格納する、未変換のオプション引数 """
+    __slots__ = ('afuncs', 'optarg', 'reason', 'cache')
+
+    def __init__(self, afuncs: list[Any], optarg: str, reason: dict[str, str],
+                 cache: Optional[ConvertCache]) -> None:
+        self.afuncs = afuncs        # オプション引数の処理タイプ
+        self.optarg = optarg        # 入力されたオプション引数（文字列）
+        self.reason = reason        # 変換エラー時のエラー理由
+        self.cache = cache          # 変換結果のキャッシュ
+
+
 # -----------------------------------------------------
 # エラーメッセージのテンプレート
 # -----------------------------------------------------
 emsg = {
     "N00": "no error",
     "E01": "{eno}: FileNotFoundError at {arg}",
+    "E02": "{eno}: recursive file expansion at {arg}",
+    "E03": "{eno}: cannot read file {arg}",
     "E11": "{eno}: argument required for option {arg}",
     "E12": "{eno}: illegal argument specified for option {arg}",
     "E13": "{eno}: unnecessary argument specified for option {arg}",
@@ -282,10 +1142,35 @@ emsg = {
     "E22": "{eno}: illegal argument specified for option {opt} in {arg}",
     "E23": "{eno}: illegal option {opt} in {arg}",
     "E31": "{eno}: option ({ext0}) and ({ext1}) cannot be specified together",
+    "E32": "{eno}: option ({ext0}) requires option ({ext1})",
+    "E33": "{eno}: one of the options ({ext0}) must be specified",
+    "E41": "{eno}: too many expansions at {arg}",
+    "E51": "{eno}: unknown subcommand {arg}",
     "E99": "{eno}: unknown error opt={opt}, arg={arg}, ext0={ext0}, ext1={ext1}",
 }
 
 
+def _error_message(eno: str, arg: str = "???", opt: str = "???",
+                   ext0: str = "ext0", ext1: str = "ext1",
+                   messages: Mapping[str, str] = {}) -> str:
+    """ 解析エラーメッセージを作成する（messages は、オプション情報ごとの emsg の上書き） """
+    templates = {**emsg, **messages} if messages else emsg
+    template = templates[eno] if eno in templates else templates["E99"]
+    return template.format(eno=eno, arg=arg, opt=opt, ext0=ext0, ext1=ext1)
+
+
+def _error_reason(eno: str, emsgs: list[str] = [], arg: str = "???", opt: str = "???",
+                  ext0: str = "ext0", ext1: str = "ext1") -> tuple[dict[str, str], list[str]]:
+    """ 解析エラーの理由と、追加のエラーメッセージの組を作る """
+    return {"eno": eno, "arg": arg, "opt": opt, "ext0": ext0, "ext1": ext1}, list(emsgs)
+
+
+def _error_text(reason: dict[str, str], emsgs: list[str],
+                messages: Mapping[str, str] = {}) -> str:
+    """ エラー理由から、エラーメッセージ（追加のエラーメッセージ付き）を作る """
+    return "\n  -- ".join([_error_message(**reason, messages=messages)] + emsgs)
+
+
 # -----------------------------------------------------
 # オプション引数のタイプ
 # -----------------------------------------------------
@@ -302,6 +1187,12 @@ _OATYPE_SET = {
         "COUNT":    At.COUNT
     }
 
+# ロング名オプションの省略形の索引（ParserSpec._long_abbrev()）は、この回数だけ探してから作る
+_ABBREV_AFTER = 16
+
+# At のビット（_Opref を作る時に、Flag の演算をしないで済ませる）
+_AT_OPTIONAL, _AT_APPEND, _AT_COUNT = At.OPTIONAL.value, At.APPEND.value, At.COUNT.value
+
 
 # -----------------------------------------------------
 # 解析用条件
@@ -355,47 +1246,277 @@ def check_blocktype(blk: Optional[str], prefix: str) -> Bt:
     return Bt.LOPT          # LOPT（"--xxxx"）
 
 
+# コマンドライン・ブロックの分類コード（解析ループでは Bt の代わりにこちらを使う）
+_BK_NORMAL = 0      # 通常ブロック
+_BK_SOPTn = 1       # １文字オプションブロックで、最初が数字（ここまではオプション引数にできる）
+_BK_SOPTs = 2       # １文字オプションブロックで、最初が数字以外
+_BK_LOPT = 3        # ロング名オプションブロック（"--" のみも含む。長さで区別する）
+_BK_SONLY = 4       # "-" のみ
+_BK_BLANK = 5       # 空ブロック
+_BK_NONE = 6        # None（次のブロックが無い）
+
+_NO_BLOCK = (_BK_NONE, None)        # 次のブロックが無い時の（分類コード, ブロック）
+_head2 = operator.itemgetter(slice(None, 2))
+
+
+class _BlockTable(dict[str, int]):
+    """ ブロックの先頭２文字 -> 分類コード（初めての先頭２文字は、その時に求めて覚える） """
+    MAXSIZE = 4096          # 覚えておく先頭２文字の数
+
+    def __init__(self, prefix: str) -> None:
+        super().__init__()
+        self.prefix = prefix
+
+    def __missing__(self, head: str) -> int:
+        prefix = self.prefix
+        if not head:
+            code = _BK_BLANK
+        elif head[0] != prefix:
+            code = _BK_NORMAL
+        elif len(head) == 1:
+            code = _BK_SONLY
+        elif head[1] == prefix:
+            code = _BK_LOPT
+        else:
+            code = _BK_SOPTn if head[1].isdecimal() else _BK_SOPTs
+        if len(self) < self.MAXSIZE:
+            self[head] = code
+        return code
+
+
+_block_tables: dict[str, _BlockTable] = {}     # オプション文字列のプリフィックス -> _BlockTable
+
+
+def _classify(args: Iterable[str], prefix: str) -> Iterator[tuple[int, str]]:
+    """ コマンドラインの各ブロックに分類コードを付けて、(分類コード, ブロック) を順に返す。
+        先頭２文字で表を引くだけなので、ブロックごとの Pythonの処理はない
+    """
+    table = _block_tables.get(prefix)
+    if table is None:
+        table = _block_tables.setdefault(prefix, _BlockTable(prefix))
+    if isinstance(args, (list, tuple)):
+        return zip(map(table.__getitem__, map(_head2, args)), args)
+    args1, args2 = itertools.tee(args)
+    return zip(map(table.__getitem__, map(_head2, args1)), args2)
+
+
+# -----------------------------------------------------
+# 解析イベント
+# -----------------------------------------------------
+class Ev(Enum):
+    """ 解析イベントの種別 """
+    OPTION = auto()     # オプションが指定された
+    VALUE = auto()      # オプション引数（変換後の値）
+    COUNT = auto()      # オプションのカウント（COUNTタイプ）
+    CANCEL = auto()     # オプションのキャンセル
+    PARAM = auto()      # コマンド引数
+    SEGMENT = auto()    # 解析モード（Smode）による区切り
+    ERROR = auto()      # 解析エラー
+
+
+class Event(NamedTuple):
+    """ 逐次解析（iter_events）で返すイベント """
+    kind: Ev            # イベントの種別
+    name: str           # オプション名（Ev.ERROR ではエラー番号、その他は空文字）
+    value: Any          # オプション引数、コマンド引数、エラーメッセージなど
+
+
 # -----------------------------------------------------
 # 定義されたオプションセット格納用クラス
 # -----------------------------------------------------
-import dataclasses
+class Opdef(NamedTuple):
+    """ オプションの定義（コンパイル後は変更しないので、スレッド間で共有できる） """
+    l_options: tuple[str, ...]          # ロング名オプション文字列
+    s_options: tuple[str, ...]          # 1文字オプション文字列
+    comment: str                        # コメント
+    acomment: str                       # オプション引数のコメント
+    afunc: Optional[tuple[Any, ...]]    # オプション引数の処理タイプ
+    atype: At                           # オプション引数のタイプ
+
+
+class _Result:
+    """ １回の解析結果（オプションの番号順に、有効/無効とオプション引数を格納する） """
+    __slots__ = ('enabled', 'values', 'pending', 'mask')
+
+    def __init__(self, size: int) -> None:
+        self.enabled: list[bool] = [False] * size   # オプション有効/無効
+        self.values: list[Any] = [None] * size      # オプション引数
+        self.pending: set[int] = set()              # 未変換のオプション引数があるオプションの番号
+        self.mask = 0                               # 有効なオプションのビットマスク（制約チェック用）
+
+    def clear(self) -> None:
+        """ 解析結果をクリアする """
+        size = len(self.enabled)
+        self.enabled = [False] * size
+        self.values = [None] * size
+        self.pending = set()
+        self.mask = 0
+
+    def resolve(self, index: int, append: bool) -> Optional[tuple[dict[str, str], list[str]]]:
+        """ 未変換（遅延変換モード）のオプション引数を変換する。変換エラー時はエラー理由を返す """
+        if index not in self.pending:
+            return None
+        values = self.values[index] if append else [self.values[index]]
+        for i, value in enumerate(values):
+            if type(value) is _LazyValue:
+                ok, cvalue, emsgs = _convert_optarg(value.afuncs, value.optarg, value.cache)
+                if not ok:
+                    return value.reason, emsgs
+                values[i] = cvalue
+        self.values[index] = values if append else values[0]
+        self.pending.discard(index)
+        return None
+
+    def resolve_all(self, opdefs: Sequence[Opdef]) -> Optional[tuple[dict[str, str], list[str]]]:
+        """ 未変換のオプション引数をすべて変換する。変換エラー時は最初のエラー理由を返す """
+        for index in sorted(self.pending):
+            error = self.resolve(index, At.APPEND in opdefs[index].atype)
+            if error:
+                return error
+        return None
 
 
-@dataclasses.dataclass
 class Opset:
-    l_options: list[str]            # ロング名オプション文字列（リスト）
-    s_options: list[str]            # 1文字オプション文字列（リスト）
-    comment: str                    # コメント
-    acomment: str                   # オプション引数のコメント
-    afunc: Optional[list[Any]]      # オプション引数の処理タイプ
-    atype: At                       # オプション引数のタイプ
+    """ オプションセット（オプションの定義と、その解析結果を見せる） """
+    __slots__ = ('__opdef', '__result', '__index')
 
-    __isEnable: bool = dataclasses.field(default=False, init=False)     # オプション有効/無効
-    __value: Any = dataclasses.field(default=None, init=False)          # オプション引数
+    def __init__(self, opdef: Opdef, result: _Result, index: int) -> None:
+        self.__opdef = opdef
+        self.__result = result
+        self.__index = index
 
     @property
-    def isEnable(self) -> bool:             # オプションが有効（指定された）かどうか
-        return self.__isEnable
+    def l_options(self) -> tuple[str, ...]:     # ロング名オプション文字列
+        return self.__opdef.l_options
+
+    @property
+    def s_options(self) -> tuple[str, ...]:     # 1文字オプション文字列
+        return self.__opdef.s_options
+
+    @property
+    def comment(self) -> str:                   # コメント
+        return self.__opdef.comment
+
+    @property
+    def acomment(self) -> str:                  # オプション引数のコメント
+        return self.__opdef.acomment
+
+    @property
+    def afunc(self) -> Optional[tuple[Any, ...]]:   # オプション引数の処理タイプ
+        return self.__opdef.afunc
+
+    @property
+    def atype(self) -> At:                      # オプション引数のタイプ
+        return self.__opdef.atype
 
-    def _set_isEnable(self, isenable: bool):
-        self.__isEnable = isenable
+    @property
+    def isEnable(self) -> bool:             # オプションが有効（指定された）かどうか
+        return self.__result.enabled[self.__index]
 
     @property
     def value(self) -> Any:                 # 指定されたオプション引数を取得する
-        return self.__value
+        if self.__index in self.__result.pending:   # 遅延変換モードなら、ここで変換する
+            error = self._resolve()
+            if error:
+                raise ValueError(_error_text(*error))
+        return self.__result.values[self.__index]
 
-    def _store_value(self, value: Any):     # 指定されたオプション引数を格納する
-        if At.APPEND in self.atype:
-            if self.__value is None:
-                self.__value = []
-            self.__value.append(value)
-        else:
-            self.__value = value
+    def _resolve(self) -> Optional[tuple[dict[str, str], list[str]]]:
+        """ 未変換（遅延変換モード）のオプション引数を変換する。変換エラー時はエラー理由を返す """
+        return self.__result.resolve(self.__index, At.APPEND in self.__opdef.atype)
+
+    def __repr__(self) -> str:
+        return (f'Opset({self.__opdef!r}, isEnable={self.isEnable!r}, '
+                f'value={self.__result.values[self.__index]!r})')
+
+
+class _OptionView(Mapping[str, Opset]):
+    """ OPT_["option"] で取得する、オプション名 -> Opset（初めて参照した時に作り、同じものを返す） """
+    __slots__ = ('__spec', '__result', '__opsets')
+
+    def __init__(self, spec: ParserSpec, result: _Result) -> None:
+        self.__spec = spec
+        self.__result = result
+        self.__opsets: dict[int, Opset] = {}    # オプションの番号 -> 作った Opset
+
+    def __opset(self, index: int) -> Opset:
+        opset = self.__opsets.get(index)
+        if opset is None:
+            opset = self.__opsets[index] = Opset(self.__spec._opdefs[index], self.__result, index)
+        return opset
+
+    def __getitem__(self, opname: str) -> Opset:
+        return self.__opset(self.__spec._opname_index[opname])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__spec._opnames)
+
+    def __len__(self) -> int:
+        return len(self.__spec._opnames)
+
+    def _by_attr(self, opt_name: str) -> Optional[Opset]:
+        """ オプション属性名（OPT_xxx）から Opsetを返す（なければ None） """
+        index = self.__spec._attr_index.get(opt_name)
+        if index is None:
+            return None
+        return self.__opset(index)
+
+
+# -----------------------------------------------------
+# 解析結果クラスの生成
+# -----------------------------------------------------
+def _make_result_class(name: str, fields: list[tuple[str, bool]]) -> type:
+    """ オプションごとの属性（__slots__）を持つ解析結果クラスを生成する。
+        fields は（属性名, value を格納するか（Falseなら isEnable））の、オプションの番号順のリスト
+    """
+    lines = ["def __init__(self, enabled, values):"]
+    for i, (field, is_value) in enumerate(fields):
+        lines.append(f"    self.{field} = {'values' if is_value else 'enabled'}[{i}]")
+    if not fields:
+        lines.append("    pass")
+    namespace: dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+
+    names = tuple(field for field, _ in fields)
+
+    def __repr__(self: Any) -> str:
+        return f"{name}({', '.join(f'{f}={getattr(self, f)!r}' for f in names)})"
+
+    return type(name, (), {"__slots__": names, "__init__": namespace["__init__"],
+                           "__repr__": __repr__, "__module__": __name__})
+
+
+def _make_result_dataclass(name: str, fields: list[tuple[str, bool]]) -> type:
+    """ 解析結果の frozen dataclass を生成する（fields は _make_result_class() と同じ） """
+    import dataclasses
+    return dataclasses.make_dataclass(name, [(field, Any) for field, _ in fields], frozen=True)
+
+
+# ParserSpec の、解析で作る索引の初期値（pickle には含めない）
+_SPEC_INDEXES: dict[str, Any] = {'_refs': None, '_s_dispatch': None, '_l_abbrev': None,
+                                 '_l_lookups': 0}
+
+# 生成した解析結果クラス（ParserSpec -> {frozen: クラス}）
+_result_classes: weakref.WeakKeyDictionary[ParserSpec, dict[bool, type]] = \
+    weakref.WeakKeyDictionary()
+
+
+# -----------------------------------------------------
+# オプション文字列から引く、解析用のオプション情報
+# -----------------------------------------------------
+class _Opref:
+    """ オプション文字列 -> オプションの番号と、解析時に必要なフラグ """
+    __slots__ = ('index', 'bit', 'afunc', 'has_arg', 'optional', 'append', 'count')
 
-    def _count_value(self, value: int):     # 指定されたオプションをカウントする
-        if self.__value is None:
-            self.__value = 0
-        self.__value += value
+    def __init__(self, index: int, opdef: Opdef) -> None:
+        self.index = index                          # オプションの番号（定義順）
+        self.bit = 1 << index                       # 有効なオプションのビットマスク用
+        atype = opdef.atype.value
+        self.afunc = opdef.afunc                    # オプション引数の処理タイプ
+        self.has_arg = bool(opdef.afunc)            # オプション引数をとる
+        self.optional = bool(atype & _AT_OPTIONAL)  # オプション引数省略可能
+        self.append = bool(atype & _AT_APPEND)      # オプション引数をリストに格納
+        self.count = bool(atype & _AT_COUNT)        # オプションをカウントする
 
 
 # class Opset:
@@ -485,80 +1606,798 @@ TExclusiveset = Union[Sequence[str],
                       Sequence[Sequence[str]]
                       ]
 
+# (オプション名, そのオプションが必要とする（有効にする）オプション名、またはそのリスト)
+TRequire = tuple[str, Union[str, Sequence[str]]]
+TRequireset = Union[TRequire,
+                    Sequence[TRequire]
+                    ]
 
-class Parse:
-    """Parseのドキュメント"""
-    def __init__(self,
-                 args: list[str],                   # 解析するコマンドライン
-                 options: TOptions,                 # オプション情報
-                 exclusive: TExclusiveset = [],     # 排他オプションリスト
-                 cancelable: bool = False,          # オプションキャンセル可能モード
-                 smode: Smode = Smode.NONE,         # 解析モード
-                 winexpand: bool = True,            # Windowsで、ワイルドカードを展開するかどうか
-                 file_expand: bool = False,         # コマンド引数の @<filename> を展開するかどうか
-                 emessage_header: str = "@name",    # エラーメッセージの頭に付けるコマンド名
-                 comment_sp: str = '//',            # オプションコメントのセパレータ
-                 debug: bool = False,               # デバッグ機能を有効にする
-                 option_name_prefix: str = "OPT_",  # オプション属性を生成する時のprefix
-                 option_string_prefix: str = "-",   # オプションの前に付ける - とか --
-                 ) -> None:
-        """ コマンドラインパーサー """
+# サブコマンドのオプション情報の読み込み方（"モジュール名[:属性名]"、または呼び出すと返す関数）
+# 返すのは TOptions、または ParserSpec() の引数（options、exclusive など）の dict
+TSubcommand = Union[str, Callable[[], Any]]
 
-        self.__args = args
-        self.__cancelable = cancelable
-        self.__smode = smode
-        self.__winexpand = winexpand
-        self.__filexpand = file_expand
-        self.__commentsp = comment_sp
-        self.__debug = debug
-        self.__option_name_prefix = option_name_prefix
-        self.__option_string_prefix = option_string_prefix[0:1]
 
-        self.__debugmode: str = ""              # デバッグモードを格納
+def _as_groups(items: Any) -> list[Any]:
+    """ exclusive、requires などの、１組だけの指定をリストにする """
+    if not items:
+        return []
+    return [items] if isinstance(items[0], str) else list(items)
 
-        self.__options: list[str] = []          # 設定されたオプション属性リスト
-        self.__options_and_comments: list[str] = []          # 設定されたオプション属性リスト
-        self.__exclusive: list[set[str]] = []  # 読み込まれた排他リスト
-        self.__ltoOPS: dict[str, str] = {}
-        self.__stoOPS: dict[str, str] = {}
 
-        # エラーメッセージの頭に付けるプログラム名を格納
-        if emessage_header == "@name":
-            self.__emessage_header = pathlib.Path(sys.argv[0]).name
-        elif emessage_header == "@stem":
-            self.__emessage_header = pathlib.Path(sys.argv[0]).stem
-        else:
-            self.__emessage_header = emessage_header
+_SPEC_KEYS = ('options', 'exclusive', 'requires', 'implies', 'at_least_one', 'subcommands', 'emsg')
 
-        # オプション情報（dict タイプ）
-        self.__D_option: dict[str, Opset] = {}  # OPT_["option"] で取得する
 
-        # オプションセット読み込み処理実行
+def _load_subcommand(loader: TSubcommand) -> dict[str, Any]:
+    """ サブコマンドのオプション情報を読み込んで、ParserSpec() の引数の dict にする。
+        モジュール名の場合は、モジュールの属性 options（と exclusive、requires、implies、
+        at_least_one、subcommands があればそれも）を使う
+    """
+    if isinstance(loader, str):
+        import importlib
+        modname, _, attr = loader.partition(':')
+        module = importlib.import_module(modname)
+        if attr:
+            loaded = getattr(module, attr)
+            loaded = loaded() if callable(loaded) else loaded
+        else:
+            loaded = {key: getattr(module, key) for key in _SPEC_KEYS if hasattr(module, key)}
+    else:
+        loaded = loader()
+    return dict(loaded) if isinstance(loaded, Mapping) else {'options': loaded}
+
+
+# -----------------------------------------------------
+# オプション情報ファイル（JSON、TOML）
+# -----------------------------------------------------
+def _import_name(name: str) -> Any:
+    """ 名前（"module.attr"、"module:attr"）のオブジェクトを import して返す """
+    import importlib
+    if ':' in name:
+        modname, _, attrs = name.partition(':')
+        parts = [modname] + attrs.split('.')
+        start = 1
+    else:
+        parts = name.split('.')
+        start = len(parts) - 1
+    for i in range(start, 0, -1):       # モジュール名は、できるだけ長く取る
+        modname = '.'.join(parts[:i])
+        try:
+            obj = importlib.import_module(modname)
+        except ModuleNotFoundError as e:
+            if i > 1 and e.name is not None and (modname + '.').startswith(e.name + '.'):
+                continue                # モジュールではない（クラスの属性など）
+            raise
+        try:
+            for attr in parts[i:]:
+                obj = getattr(obj, attr)
+        except AttributeError:
+            raise ImportError(f"cannot import name {name!r}") from None
+        return obj
+    raise ImportError(f"cannot import name {name!r}")
+
+
+class LazyConverter:
+    """ 名前（"module.attr"、"module:attr"）で指定する変換関数。
+        最初に変換する時（そのオプションが指定された時）に import するので、
+        使われなかったオプションの変換関数のモジュールは読み込まない
+    """
+    __slots__ = ('name', '_target')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._target: Any = None        # import した変換関数
+
+    def resolve(self) -> Any:
+        """ 変換関数を import して返す（２回目からは、import したものを返す） """
+        if self._target is None:
+            self._target = _import_name(self.name)
+        return self._target
+
+    def __call__(self, optarg: str) -> Any:
+        try:
+            target = self.resolve()
+        except ImportError as e:    # 名前の間違い（オプション情報ファイルなど）も、解析エラーにする
+            raise ValueError(f"cannot import converter {self.name!r} ({e})") from e
+        return _convert_one(target, optarg)
+
+    def __repr__(self) -> str:
+        return f"LazyConverter({self.name!r})"
+
+
+_SPEC_FILE_KEYS = _SPEC_KEYS + ('comment_sp', 'option_name_prefix', 'option_string_prefix')
+_OPTION_KEYS = ("opname", "opstrings", "comment", "actions")
+
+
+def _file_action(item: Any, converters: dict[str, Any]) -> Any:
+    """ ファイル中のアクション（"APPEND" などのタイプか、変換関数の名前）を、オプション情報のものにする。
+        "int"、"float" などのドットの無い名前は組み込み関数、それ以外は LazyConverter
+        （同じ名前は、同じ変換関数にする）
+    """
+    if not isinstance(item, str) or item in _OATYPE_SET:
+        return item
+    converter = converters.get(item)
+    if converter is None:
+        if '.' in item or ':' in item:
+            converter = LazyConverter(item)
+        else:
+            import builtins
+            converter = getattr(builtins, item, None)
+            assert callable(converter), f'illegal "option/ option argument type" [{item}]'
+        converters[item] = converter
+    return converter
+
+
+def _file_option(entry: Any, converters: dict[str, Any]) -> Any:
+    """ ファイル中のオプション（リストか、opname、opstrings、comment、actions の表）を、
+        オプション情報の tuple にする
+    """
+    if isinstance(entry, Mapping):
+        assert set(entry) <= set(_OPTION_KEYS), f'illegal option keys {sorted(entry)} in {entry}'
+        entry = [entry.get(key) for key in _OPTION_KEYS]
+    if isinstance(entry, str) or len(entry) < 4 or entry[3] is None:
+        return entry if isinstance(entry, str) else tuple(entry[:3])
+    actions = entry[3]
+    if isinstance(actions, list):
+        actions = [_file_action(item, converters) for item in actions]
+    else:
+        actions = _file_action(actions, converters)
+    return (*entry[:3], actions)
+
+
+def load_spec_file(path: Union[str, pathlib.Path]) -> dict[str, Any]:
+    """ オプション情報ファイル（JSON、拡張子が .toml なら TOML）を読み込んで、ParserSpec() の引数の dict にする。
+        キーは options、exclusive、requires、implies、at_least_one、subcommands、emsg、
+        comment_sp、option_name_prefix、option_string_prefix（options 以外は省略可）。
+        変換関数は名前で書いて、LazyConverter（使う時に import する）にする
+    """
+    import os
+    if os.fspath(path).lower().endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:             # Python 3.10 以前
+            import tomli as tomllib     # type: ignore[no-redef]
+        with open(path, 'rb') as f:
+            conf = tomllib.load(f)
+    else:
+        import json
+        with open(path, encoding='utf-8') as f:
+            conf = json.load(f)
+    assert isinstance(conf, dict) and 'options' in conf, f'"options" is not found in {path}'
+    unknown = set(conf) - set(_SPEC_FILE_KEYS)
+    assert not unknown, f'illegal keys {sorted(unknown)} in {path}'
+    converters: dict[str, Any] = {}
+    conf['options'] = [_file_option(entry, converters) for entry in conf['options']]
+    return conf
+
+
+# -----------------------------------------------------
+# コンパイル済みオプション情報のキャッシュ用
+# -----------------------------------------------------
+def _fingerprint_items(obj: Any) -> Any:
+    """ オプション情報などから、プロセスをまたいで変わらない比較用の値を作る
+        （関数やクラスは名前で、Mu などのインスタンスは中身で比較する）
+    """
+    cls = type(obj)
+    if cls is str or obj is None:           # オプション情報のほとんどは文字列（速くするため）
+        return obj
+    if cls is tuple or cls is list:
+        return tuple(map(_fingerprint_items, obj))
+    if isinstance(obj, (str, int, float)):
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return tuple(_fingerprint_items(item) for item in obj)
+    if isinstance(obj, dict):
+        return tuple((key, _fingerprint_items(value)) for key, value in obj.items())
+    if isinstance(obj, EnumMeta):
+        return (obj.__module__, obj.__qualname__, tuple(obj.__members__.keys()))
+    if hasattr(obj, '__qualname__'):        # 関数、クラス、メソッド
+        return (getattr(obj, '__module__', None), obj.__qualname__)
+    if hasattr(obj, '__dict__'):            # Mu、Mu2 などのインスタンス
+        return (type(obj).__module__, type(obj).__qualname__, _fingerprint_items(vars(obj)))
+    return (type(obj).__qualname__, repr(obj))
+
+
+def _iter_converters(options: TOptions) -> Iterator[Any]:
+    """ オプション情報中の変換関数（callable）を、定義順に取り出す """
+    for iopset in options:
+        if isinstance(iopset, str) or \
+                not isinstance(iopset, (tuple, list)) and not isinstance(iopset, Sequence) or \
+                len(iopset) < 4:
+            continue
+        actions = iopset[3]
+        if type(actions) not in [list, tuple]:
+            actions = [actions]
+        for item in actions:
+            if callable(item):
+                yield item
+
+
+# -----------------------------------------------------
+# コンパイル済みオプション情報
+# -----------------------------------------------------
+class ParserSpec:
+    """ オプション情報、排他リストを一度だけ検証、索引化したもの。
+        複数の Parse で使い回すことができる（解析結果は Parse 側に持つ）。
+        コンパイル後は変更しないので、複数のスレッドから同時に解析してもよい
+    """
+    def __init__(self,
+                 options: TOptions,                 # オプション情報
+                 exclusive: TExclusiveset = [],     # 排他オプションリスト
+                 comment_sp: str = '//',            # オプションコメントのセパレータ
+                 option_name_prefix: str = "OPT_",  # オプション属性を生成する時のprefix
+                 option_string_prefix: str = "-",   # オプションの前に付ける - とか --
+                 requires: TRequireset = [],        # 必要なオプションのリスト
+                 implies: TRequireset = [],         # 一緒に有効になるオプションのリスト
+                 at_least_one: TExclusiveset = [],  # どれか一つは必要なオプションのリスト
+                 subcommands: Mapping[str, TSubcommand] = {},   # サブコマンド名 -> 読み込み方
+                 emsg: Mapping[str, str] = {},      # エラーメッセージの上書き（エラー番号 -> テンプレート）
+                 ) -> None:
+        """ オプション情報をコンパイルする """
+        self._commentsp = comment_sp
+        self._option_name_prefix = option_name_prefix
+        self._option_string_prefix = option_string_prefix[0:1]
+        self._emsg: dict[str, str] = dict(emsg)  # このオプション情報だけの、エラーメッセージの上書き
+
+        self._options: list[str] = []           # 設定されたオプション属性リスト
+        self._options_and_comments: list[str] = []  # 設定されたオプション属性リスト（コメント行含む）
+        self._opnames: list[str] = []           # オプション名リスト（OPT_["option"] 用）
+        self._opdefs: list[Opdef] = []          # オプションの定義（オプションの番号順）
+        self._exclusive: tuple[frozenset[str], ...] = ()    # 読み込まれた排他リスト
+        # 制約（オプションの番号のビットマスク）
+        self._ex_groups: tuple[tuple[int, tuple[int, ...]], ...] = ()       # (排他セット, 番号)
+        self._requires: tuple[tuple[int, int, int, tuple[int, ...]], ...] = ()  # (番号, ビット, 必要, 番号)
+        self._implies: tuple[tuple[int, int], ...] = ()                     # (ビット, 有効にする)
+        self._at_least_one: tuple[tuple[int, tuple[int, ...]], ...] = ()    # (セット, 番号)
+        self._ltoOPS: dict[str, str] = {}
+        self._stoOPS: dict[str, str] = {}
+
+        # サブコマンド（オプション情報は、指定された時に読み込んでコンパイルする）
+        self._subcommands: dict[str, TSubcommand] = dict(subcommands)
+        self._sub_specs: dict[str, ParserSpec] = {}
+        self._source: Optional[dict[str, Any]] = None   # サブコマンドに引き継ぐオプション情報
+        if subcommands:
+            options = tuple(options)
+            self._source = {'options': options, 'exclusive': _as_groups(exclusive),
+                            'requires': _as_groups(requires), 'implies': _as_groups(implies),
+                            'at_least_one': _as_groups(at_least_one)}
+
+        # オプションセット読み込み処理実行
         self.__set_options(options)
+
+        self._s_options = list(self._stoOPS.keys())     # 1文字オプション一覧
+        self._l_options = list(self._ltoOPS.keys())     # ロング名オプション一覧
+
+        # オプション名、オプション属性名 -> オプションの番号
+        self._opname_index = {opname: i for i, opname in enumerate(self._opnames)}
+        self._attr_index = {opt_name: i for i, opt_name in enumerate(self._options)}
+
         # 排他リスト読み込み処理を実行
         if exclusive:
             self.__set_exclusive(exclusive)
+        # 制約リスト読み込み処理を実行
+        if requires:
+            self._requires = tuple((index, 1 << index, group, members) for index, (group, members)
+                                   in self.__read_requires(requires, "requires"))
+        if implies:
+            self.__set_implies(implies)
+        if at_least_one:
+            self._at_least_one = self.__read_groups(at_least_one, "at_least_one")
+
+        # オプション文字列 -> _Opref の索引（解析で初めて必要になった時に作る。_short_dispatch()、
+        # _long_ref() 参照）。キャッシュファイル、プロセスプールには渡さない（_SPEC_INDEXES 参照）
+        self._refs: Optional[list[_Opref]] = None
+        self._s_dispatch: Optional[dict[str, _Opref]] = None
+        self._l_abbrev: Optional[dict[str, Optional[_Opref]]] = None
+        self._l_lookups = 0                     # 索引を作らずに、ロング名オプションを探した回数
+
+    @classmethod
+    def from_file(cls, path: Union[str, pathlib.Path],
+                  cache_file: Union[str, pathlib.Path, None] = None, **kwargs: Any) -> ParserSpec:
+        """ オプション情報ファイル（JSON、TOML）を読み込んでコンパイルする（load_spec_file() 参照）。
+            kwargs は ParserSpec() の引数（ファイルの指定より優先する）。
+            cache_file を指定すると、コンパイル結果をファイルにキャッシュする
+        """
+        conf = {**load_spec_file(path), **kwargs}
+        if cache_file is not None:
+            return cls.cached(cache_file, **conf)
+        return cls(**conf)
 
-        self.__s_options = list(self.__stoOPS.keys())     # 1文字オプション一覧
-        self.__l_options = list(self.__ltoOPS.keys())     # ロング名オプション一覧
+    def parse(self, args: list[str], **kwargs: Any) -> Parse:
+        """ このオプション情報で、コマンドラインを解析する（新しい Parseを返す） """
+        return Parse(args, self, **kwargs)
 
-        # コマンドライン解析結果格納用 ---------------------------------
-        self.__params: list[str] = []           # コマンド引数リスト
-        self.__error: bool = True               # 解析エラーがあったかどうか
-        self.__error_reason: dict[str, str] = {"eno": "N00"}    # エラー理由
-        self.__additional_emsg: list[str] = []  # 追加のエラーメッセージ
-        self.__remain: list[str] = []           # 解析の残り
+    @property
+    def subcommands(self) -> list[str]:
+        """ サブコマンド名のリストを返す """
+        return list(self._subcommands)
 
-        # コマンドライン解析処理実行
-        self.__parse()
+    def subcommand_spec(self, name: str) -> ParserSpec:
+        """ サブコマンドのオプション情報を読み込んで、このオプション情報（グローバルオプション）と
+            合わせてコンパイルしたものを返す（一度コンパイルしたものは使い回す）
+        """
+        spec = self._sub_specs.get(name)
+        if spec is None:
+            assert self._source is not None
+            sub = _load_subcommand(self._subcommands[name])
+            spec = ParserSpec(
+                tuple(self._source['options']) + tuple(sub.get('options', ())),
+                self._source['exclusive'] + _as_groups(sub.get('exclusive')),
+                self._commentsp, self._option_name_prefix, self._option_string_prefix,
+                self._source['requires'] + _as_groups(sub.get('requires')),
+                self._source['implies'] + _as_groups(sub.get('implies')),
+                self._source['at_least_one'] + _as_groups(sub.get('at_least_one')),
+                sub.get('subcommands', {}), {**self._emsg, **sub.get('emsg', {})})
+            self._sub_specs[name] = spec
+        return spec
+
+    def iter_segments(self, args: Iterable[str], carry: bool = False,
+                      **kwargs: Any) -> Iterator[Parse]:
+        """ コマンドラインを解析モード（smode）の区切りごとに解析して、区切りごとの Parse を順に返す。
+            carry なら、前の区切りまでに指定されたオプションを引き継ぐ
+            （kwargs は Parse() の解析条件。デバッグ機能は使えない）
+        """
+        kwargs["debug"] = False
+        stats = kwargs.pop("stats", False)
+        return Parse([], self, **kwargs)._with_stats(stats)._iter_segments(args, carry)
+
+    def parse_many(self, argvs: Iterable[list[str]],
+                   workers: int = 1, chunksize: int = 256, **kwargs: Any) -> Iterator[ParseResult]:
+        """ 複数のコマンドラインを解析して、ParseResult を入力順に返す。
+            workers > 1 なら、chunksize 個ずつプロセスプールで解析する
+            （kwargs は Parse() の解析条件。デバッグ機能は使えない）
+        """
+        kwargs["debug"] = False
+        if workers <= 1:        # 1プロセスで、Parse を使い回して解析する
+            stats = kwargs.pop("stats", False)
+            ps = Parse([], self, **kwargs)._with_stats(stats)
+            for argv in argvs:
+                yield ps._reparse(argv)._compact()
+            return
 
-        if not self.__error:
-            # 排他チェック処理実行
-            self.__exclusive_check()
+        import collections
+        import concurrent.futures
+        import itertools
+
+        iargvs = iter(argvs)
+        with concurrent.futures.ProcessPoolExecutor(
+                workers, initializer=_parse_many_init, initargs=(self, kwargs)) as executor:
+            pending: collections.deque[Any] = collections.deque()
+            while True:
+                # 先読みするチャンクは workers の 2倍まで（入力を一度に読み込まない）
+                while len(pending) < workers * 2:
+                    chunk = list(itertools.islice(iargvs, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(executor.submit(_parse_many_chunk, chunk))
+                if not pending:
+                    break
+                yield from pending.popleft().result()
 
-        # デバッグモード
-        if self.__debugmode and exist_debugmodule:
-            cld.show_debug(self, str(self.__debugmode)[1:])
+    @property
+    def option_attrs(self) -> list[str]:
+        """ オプション属性リストを取得する """
+        return self._options
+
+    def iter_events(self, args: Iterable[str],
+                    cancelable: bool = False,
+                    smode: Smode = Smode.NONE,
+                    winexpand: bool = True,
+                    file_expand: bool = False,
+                    convert_cache: Optional[ConvertCache] = None,
+                    file_cache: Union[bool, FileCache] = True,
+                    wildcard: bool = False,
+                    max_matches: int = 0,
+                    brace: bool = False,
+                    ) -> Iterator[Event]:
+        """ コマンドライン（任意のイテレータ）を逐次解析して、解析イベントを順に返す。
+            解析結果をため込まないので、どんなに長いコマンドラインでもメモリ使用量は一定
+            （Smode による区切りでは Ev.SEGMENT を返して、続きを新たに解析する）
+        """
+        b_args: Iterator[str] = iter(args)
+        if file_expand:
+            b_args = _iter_file_expand_checked(b_args, _get_file_cache(file_cache))
+        blocks = _classify(b_args, self._option_string_prefix)
+        expand = _param_expander(wildcard, winexpand, max_matches, brace)
+        opnames = self._opnames
+        mask = 0                    # 有効なオプションのビットマスク（制約チェック用）
+
+        while True:
+            progress = False
+            try:
+                for kind, ref, value in self._scan(blocks, cancelable, smode,
+                                                   cache=convert_cache):
+                    if kind is Ev.ERROR:
+                        yield Event(Ev.ERROR, value[0]["eno"], _error_text(*value, self._emsg))
+                        return
+                    if kind is Ev.SEGMENT:
+                        break
+                    progress = True
+                    if kind is Ev.PARAM:
+                        if expand is not None:      # ワイルドカード展開
+                            for param in expand(value):
+                                yield Event(Ev.PARAM, "", param)
+                        else:
+                            yield Event(Ev.PARAM, "", value)
+                        continue
+                    name = opnames[ref.index]
+                    if kind is Ev.OPTION:
+                        mask |= ref.bit
+                    elif kind is Ev.CANCEL:
+                        mask &= ~ref.bit
+                    yield Event(kind, name, value)
+                else:
+                    value = None        # 最後まで解析した
+            except _ExpandError as e:
+                yield Event(Ev.ERROR, e.eno,
+                            _error_text(*_error_reason(e.eno, arg=str(e)), self._emsg))
+                return
+            except WildcardLimitError as e:
+                yield Event(Ev.ERROR, 'E41', str(e))
+                return
+
+            implied = self._implied(mask)
+            added = implied & ~mask
+            for i in range(added.bit_length()):     # implies で有効になったオプション
+                if added >> i & 1:
+                    yield Event(Ev.OPTION, opnames[i], None)
+            error = self._constraint_error(implied)
+            if error:
+                yield Event(Ev.ERROR, error[0]["eno"], _error_text(*error, self._emsg))
+                return
+            if value is None or not progress:   # 最後まで解析した（または "--" で終わった）
+                return
+            yield Event(Ev.SEGMENT, "", None)
+            mask = 0
+            # 区切りのブロックから、続きを解析する
+            blocks = itertools.chain(_classify([value], self._option_string_prefix), blocks)
+
+    def _opdef_by_name(self, opname: str) -> Opdef:
+        """ オプション名から、オプションの定義を返す """
+        return self._opdefs[self._opname_index[opname]]
+
+    def _implied(self, mask: int) -> int:
+        """ 有効なオプションのビットマスクに、implies で有効になるオプションを加える """
+        for bit, closure in self._implies:
+            if mask & bit:
+                mask |= closure
+        return mask
+
+    def _constraint_error(self, mask: int) -> Optional[tuple[dict[str, str], list[str]]]:
+        """ 制約チェック。有効なオプションのビットマスクが制約に違反していれば、エラー理由を返す
+            （排他セット中二つ以上：E31、requires が足りない：E32、at_least_one が一つも無い：E33）
+        """
+        for group, members in self._ex_groups:
+            m = mask & group
+            if m & (m - 1):
+                first, second = [i for i in members if mask >> i & 1][:2]
+                return _error_reason('E31', ext0=self.__index_options(first),
+                                     ext1=self.__index_options(second))
+        for index, bit, need, members in self._requires:
+            if mask & bit and mask & need != need:
+                missing = next(i for i in members if not mask >> i & 1)
+                return _error_reason('E32', ext0=self.__index_options(index),
+                                     ext1=self.__index_options(missing))
+        for group, members in self._at_least_one:
+            if not mask & group:
+                return _error_reason('E33', ext0=" | ".join(map(self.__index_options, members)))
+        return None
+
+    def __index_options(self, index: int) -> str:
+        return self.make_options(self._opdefs[index])
+
+    def make_options(self, op: Opset | Opdef) -> str:
+        """ オプションの、すべての文字列を取得する """
+        soption = ""
+        loption = ""
+        for s in op.s_options:
+            soption += self._option_string_prefix + s + ', '
+        for s in op.l_options:
+            loption += self._option_string_prefix * 2 + s + ', '
+
+        return (soption + loption).rstrip(', ')
+
+    # -----------------------------------------------------
+    # 解析結果クラス
+    # -----------------------------------------------------
+    def result_fields(self) -> list[tuple[str, bool]]:
+        """ 解析結果クラスの（属性名, value を格納するか）の、オプションの番号順のリストを返す。
+            属性名はオプション名（識別子として使えないものは、オプション属性名）。
+            オプション引数をとるもの、COUNTタイプのものは value、それ以外は isEnable を格納する
+        """
+        fields: list[tuple[str, bool]] = []
+        for opname, opt_name, opdef in zip(self._opnames, self._options, self._opdefs):
+            field = opname
+            if not field.isidentifier() or keyword.iskeyword(field) or field.startswith('__'):
+                field = opt_name
+            fields.append((field, bool(opdef.afunc) or At.COUNT in opdef.atype))
+        names = [field for field, _ in fields]
+        assert len(set(names)) == len(names), f'duplicated result field name in {names}'
+        return fields
+
+    def result_class(self, frozen: bool = False) -> type:
+        """ 解析結果を、オプションごとの属性で持つクラス（__slots__）を返す（初回に生成する）。
+            frozen=True なら、frozen dataclass を返す
+        """
+        classes = _result_classes.setdefault(self, {})
+        if frozen not in classes:
+            if frozen:
+                classes[frozen] = _make_result_dataclass("FrozenOptionResult", self.result_fields())
+            else:
+                classes[frozen] = _make_result_class("OptionResult", self.result_fields())
+        return classes[frozen]
+
+    def _compiled_scan(self, cancelable: bool, smode: Smode, lazy: bool = False,
+                       ) -> Callable[[Iterator[str], Optional[ConvertCache]],
+                                     Iterator[tuple[Ev, Optional[_Opref], Any]]]:
+        """ このオプション情報、解析条件専用に生成した解析関数（_scan() と同じ動作）を返す """
+        if __package__:
+            from . import cl_parse_codegen
+        else:
+            import cl_parse_codegen
+        return cl_parse_codegen.compile_scan(sys.modules[__name__], self, cancelable, smode, lazy)
+
+    # -----------------------------------------------------
+    # コマンドライン解析の本文（解析イベントを順に返す）
+    # -----------------------------------------------------
+    def _scan(self, blocks: Iterator[tuple[int, str]], cancelable: bool, smode: Smode,
+              lazy: bool = False, cache: Optional[ConvertCache] = None,
+              ) -> Iterator[tuple[Ev, Optional[_Opref], Any]]:
+        """ コマンドライン（_classify() で分類したもの）を解析して、(イベント種別, _Opref, 値) を順に返す。
+            解析エラーは Ev.ERROR（値は (エラー理由, 追加のエラーメッセージ)）で返して終了、
+            解析モードによる途中終了は Ev.SEGMENT（値は終了したブロック）で返して終了する
+            （lazy なら、オプション引数は変換せずに _LazyValue で返す。
+              cache があれば、変換結果をキャッシュする）
+        """
+        s_dispatch = self._short_dispatch()
+        l_abbrev = self._l_abbrev           # 索引が無ければ、_long_ref() で探す
+        t = CheckTurn()         # ターンチェック用
+
+        for blk_type, arg in blocks:
+            # コマンドラインの１ブロックずつ、分類コードで分岐
+            if blk_type == _BK_LOPT and len(arg) == 2:  # ロング名オプション・プリフィックス（"--"） のみ
+                if t.checkTurn(Turn.ARG):   # ターンチェック（コマンド引数）
+                    if (smode == Smode.ONEPAIR and t.isRepeat(Turn.ARG)) or \
+                       (smode == Smode.ARGFIRST and t.getTimes(Turn.OPT)):
+                        yield Ev.SEGMENT, None, arg
+                        return
+
+                wparam = next(blocks, _NO_BLOCK)[1]     # 次のブロックを取得
+                if wparam is None:              # 次のブロックが無ければ終了
+                    yield Ev.SEGMENT, None, arg
+                    return
+                yield Ev.PARAM, None, str(wparam)   # 次のブロックは無条件に「コマンド引数」
+                continue
+
+            elif blk_type == _BK_LOPT:  # ロング名オプションブロック（頭が「--」） =================
+                if t.checkTurn(Turn.OPT):   # ターンチェック（オプション）
+                    if (smode == Smode.ONEPAIR and t.isRepeat(Turn.OPT)) or \
+                       (smode == Smode.OPTFIRST and t.getTimes(Turn.ARG)):
+                        yield Ev.SEGMENT, None, arg
+                        return
+
+                opt, oarg = split2(arg[2:], '=')  # オプション名、引数を取得
+                # opt: 入力されたロング名オプション
+                # oarg: None 「=」が無い「--<opt> のみ」
+                # oarg: None以外 「=」に続いて入力されたオプション引数「--<opt>=<oarg>」
+
+                # オプションキャンセル処理
+                if cancelable and oarg is None and opt[-1] == "-":
+                    ref = (l_abbrev.get(opt[:-1]) if l_abbrev is not None else self._long_ref(opt[:-1])) \
+                        if opt[:-1] else None
+                    if ref:     # 正しいロング名オプション ----------
+                        yield Ev.CANCEL, ref, None
+                        continue
+                    else:       # ロング名オプションが正しくない ----
+                        yield Ev.ERROR, None, _error_reason('E14', arg=arg)
+                        return
+
+                ref = (l_abbrev.get(opt) if l_abbrev is not None else self._long_ref(opt)) if opt else None
+                if ref:         # 正しいロング名オプション ----------
+                    yield Ev.OPTION, ref, None
+
+                    if ref.has_arg:     # オプション引数が必要 ---------
+                        harg = arg  # for 'E12' error_reason
+                        if oarg is None:                    # オプション引数無し（= 以降が無い）
+                            if ref.optional:                  # オプション引数省略可能
+                                yield Ev.VALUE, ref, None
+                                continue
+                            else:
+                                blk_type, oarg = next(blocks, _NO_BLOCK)    # 次のブロックを引数として取得
+                                if blk_type > _BK_SOPTn:            # それも無ければエラー
+                                    yield Ev.ERROR, None, _error_reason('E11', arg=arg)
+                                    return
+
+                                # for 'E12' error_reason
+                                harg = harg + " " + ('"None"' if oarg is None else oarg)
+
+                        if lazy:        # 遅延変換モード（変換はアクセス時）
+                            yield Ev.VALUE, ref, _LazyValue(ref.afunc, oarg,
+                                                            _error_reason('E12', arg=harg)[0], cache)
+                            continue
+                        ok, value, emsgs = _convert_optarg(ref.afunc, oarg, cache)
+                        if not ok:      # オプション引数格納（変換）エラー
+                            yield Ev.ERROR, None, _error_reason('E12', emsgs, arg=harg)
+                            return
+                        yield Ev.VALUE, ref, value      # オプション引数を格納
+
+                    else:               # オプション引数が不要 ---------
+                        if oarg is not None:                     # オプション引数が不要なのに引数あり
+                            yield Ev.ERROR, None, _error_reason('E13', arg=arg)
+                            return
+                        if ref.count:
+                            yield Ev.COUNT, ref, 1
+
+                else:           # ロング名オプションが正しくない ----
+                    yield Ev.ERROR, None, _error_reason('E14', arg=arg)
+                    return
+
+            elif blk_type == _BK_SOPTs or blk_type == _BK_SOPTn:   # 1文字オプションブロック（頭が「-」）
+                if t.checkTurn(Turn.OPT):   # ターンチェック（オプション）
+                    if (smode == Smode.ONEPAIR and t.isRepeat(Turn.OPT)) or \
+                       (smode == Smode.OPTFIRST and t.getTimes(Turn.ARG)):
+                        yield Ev.SEGMENT, None, arg
+                        return
+
+                # オプションキャンセル処理
+                if cancelable and len(arg) == 3 and arg[-1] == "-":
+                    opt = arg[1]
+                    ref = s_dispatch.get(opt)
+                    if ref:                         # 正しい1文字オプション -----------
+                        yield Ev.CANCEL, ref, None
+                        continue
+                    else:                           # 1文字オプションが正しくない ------
+                        yield Ev.ERROR, None, _error_reason('E23', opt=opt, arg=arg)
+                        return
+
+                for i in range(1, len(arg)):
+                    opt = arg[i]
+                    ref = s_dispatch.get(opt)
+                    if ref:                         # 正しい1文字オプション -----------
+                        yield Ev.OPTION, ref, None
+
+                        if ref.has_arg:                 # オプション引数が必要か
+                            oparg = arg[i + 1:]             # 後続文字列からオプション引数を取得
+                            harg = arg  # for 'E22' error_reason
+
+                            if not oparg:               # 無ければ、
+                                blk_type, oparg = next(blocks, _NO_BLOCK)   # 次のブロックを取得
+                                if blk_type > _BK_SOPTn:
+                                    yield Ev.ERROR, None, _error_reason('E21', opt=opt, arg=arg)
+                                    return
+
+                                # for 'E22' error_reason
+                                harg = harg + " " + ('"None"' if oparg is None else oparg)
+
+                            if lazy:                    # 遅延変換モード（変換はアクセス時）
+                                yield Ev.VALUE, ref, _LazyValue(
+                                    ref.afunc, oparg,
+                                    _error_reason('E22', opt=opt, arg=harg)[0], cache)
+                                break
+                            ok, value, emsgs = _convert_optarg(ref.afunc, oparg, cache)
+                            if not ok:                  # オプション引数格納（変換）エラー
+                                yield Ev.ERROR, None, _error_reason('E22', emsgs, opt=opt, arg=harg)
+                                return
+                            yield Ev.VALUE, ref, value      # オプション引数を格納
+                            break                       # 後続文字列はオプション引数で消費済み
+                        elif ref.count:
+                            yield Ev.COUNT, ref, 1
+
+                    else:                           # 1文字オプションが正しくない ------
+                        yield Ev.ERROR, None, _error_reason('E23', opt=opt, arg=arg)
+                        return
+
+            else:   # コマンド引数ブロック（頭が「―」以外、または「-」単独）==========================
+                # _BK_NORMAL、_BK_SONLY、_BK_BLANK
+                if t.checkTurn(Turn.ARG):   # ターンチェック（コマンド引数）
+                    if (smode == Smode.ONEPAIR and t.isRepeat(Turn.ARG)) or \
+                       (smode == Smode.ARGFIRST and t.getTimes(Turn.OPT)):
+                        yield Ev.SEGMENT, None, arg
+                        return
+
+                yield Ev.PARAM, None, arg
+
+    # -----------------------------------------------------
+    # キャッシュファイルの読み書き
+    # -----------------------------------------------------
+    def __getstate__(self) -> dict[str, Any]:
+        """ pickle する内容（作り直せる索引は含めない） """
+        return {key: value for key, value in self.__dict__.items() if key not in _SPEC_INDEXES}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """ pickle から戻す（索引は、解析で必要になった時に作り直す） """
+        self.__dict__.update(state)
+        self.__dict__.update(_SPEC_INDEXES)
+
+    @staticmethod
+    def fingerprint(options: TOptions,
+                    exclusive: TExclusiveset = [],
+                    comment_sp: str = '//',
+                    option_name_prefix: str = "OPT_",
+                    option_string_prefix: str = "-",
+                    requires: TRequireset = [],
+                    implies: TRequireset = [],
+                    at_least_one: TExclusiveset = [],
+                    subcommands: Mapping[str, TSubcommand] = {},
+                    emsg: Mapping[str, str] = {},
+                    ) -> str:
+        """ オプション情報、排他リスト（制約）、cl_parseのバージョンから指紋（ハッシュ値）を作る
+            （cl_parse.py 自体が変わった時も作り直すように、ファイルの更新日時、サイズも含める）
+        """
+        import hashlib
+        import os
+        stat = os.stat(__file__)
+        items = (__version__, stat.st_mtime_ns, stat.st_size,
+                 _fingerprint_items(options), _fingerprint_items(exclusive),
+                 comment_sp, option_name_prefix, option_string_prefix,
+                 _fingerprint_items(requires), _fingerprint_items(implies),
+                 _fingerprint_items(at_least_one), _fingerprint_items(dict(subcommands)),
+                 _fingerprint_items(dict(emsg)))
+        return hashlib.sha256(repr(items).encode()).hexdigest()
+
+    @classmethod
+    def cached(cls,
+               cache_file: Union[str, pathlib.Path],
+               options: TOptions,
+               exclusive: TExclusiveset = [],
+               comment_sp: str = '//',
+               option_name_prefix: str = "OPT_",
+               option_string_prefix: str = "-",
+               requires: TRequireset = [],
+               implies: TRequireset = [],
+               at_least_one: TExclusiveset = [],
+               subcommands: Mapping[str, TSubcommand] = {},
+               emsg: Mapping[str, str] = {},
+               ) -> ParserSpec:
+        """ キャッシュファイルからコンパイル済みオプション情報を読み込む。
+            指紋が一致しなければ（オプション情報が変わっていれば）、コンパイルしてキャッシュに書く
+        """
+        import pickle
+        conds = (comment_sp, option_name_prefix, option_string_prefix,
+                 requires, implies, at_least_one, subcommands, emsg)
+        fprint = cls.fingerprint(options, exclusive, *conds)
+        converters = list(_iter_converters(options))
+
+        class _Unpickler(pickle.Unpickler):
+            def persistent_load(self, pid: Any) -> Any:     # 変換関数は、今の定義から参照し直す
+                return converters[pid]
+
+        try:
+            with open(cache_file, 'rb') as f:
+                unpickler = _Unpickler(f)
+                if unpickler.load() == fprint:
+                    spec = cls.__new__(cls)
+                    spec.__setstate__(unpickler.load())
+                    return spec
+        except Exception:       # キャッシュが無い、壊れている、読めない時は作り直す
+            pass
+
+        spec = cls(options, exclusive, *conds)
+        spec.save_cache(cache_file, fprint, converters)
+        return spec
+
+    def save_cache(self, cache_file: Union[str, pathlib.Path],
+                   fprint: str, converters: list[Any]) -> bool:
+        """ コンパイル済みオプション情報をキャッシュファイルに書く。失敗したら Falseを返す """
+        import os
+        import pickle
+        conv_ids = {id(conv): i for i, conv in enumerate(converters)}
+
+        class _Pickler(pickle.Pickler):
+            def persistent_id(self, obj: Any) -> Any:       # 変換関数は、参照（番号）だけ書く
+                return conv_ids.get(id(obj))
+
+        wfile = f'{cache_file}.{os.getpid()}.tmp'
+        try:
+            with open(wfile, 'wb') as f:
+                pickler = _Pickler(f, pickle.HIGHEST_PROTOCOL)
+                pickler.dump(fprint)
+                pickler.dump(self.__getstate__())
+            os.replace(wfile, cache_file)
+        except Exception:       # キャッシュは書けなくても困らない
+            if os.path.exists(wfile):
+                os.remove(wfile)
+            return False
+        return True
 
     # -----------------------------------------------------
     # オプションセット読み込み処理
@@ -569,52 +2408,59 @@ class Parse:
             """ １文字オプション文字列・文字種チェック """
             return text.replace("-", "").replace("_", "").isalnum() or text == "?"
 
+        drop_hyphens = str.maketrans("", "", "-_")
+
         def is_optionstringL(text: str) -> bool:
             """ ロング名オプション文字列・文字種チェック """
             return len(text) > 0 and\
                 text[-1] != "-" and\
-                text.translate(str.maketrans("", "", "-_")).isalnum()
+                text.translate(drop_hyphens).isalnum()
 
         def is_optionname(text: str) -> bool:
             """ オプション名・文字種チェック """
-            import keyword
             return text.isidentifier() and (not keyword.iskeyword(text))
 
+        opt_names: set[str] = {*self._options}      # 重複チェック用
         for iopset in options:
-            set = LooseTuplet(iopset, ["opname", "opstrings", "comment", "actions"])
+            # (opname, opstrings, comment, actions)。足りないものは None（LooseTuplet と同じ）
+            if isinstance(iopset, str) or \
+                    not isinstance(iopset, (tuple, list)) and not isinstance(iopset, Sequence):
+                iopset = (iopset, )
+            opname, opstrings, comment, actions = (*iopset[:4], None, None, None, None)[:4]
 
-            assert isinstance(set.opname, str), \
-                f'illegal type of option name(must be str) {set.opname} in {iopset}'
+            assert isinstance(opname, str), \
+                f'illegal type of option name(must be str) {opname} in {iopset}'
 
             # コメント行格納処理 ===============================================
-            if set.opname.startswith("#"):
-                self.__options_and_comments.append(set.opname)
+            if opname.startswith("#"):
+                self._options_and_comments.append(opname)
                 continue
 
             # オプション名の処理 ===============================================
-            opt_name = set.opname
-            if not opt_name.startswith(self.__option_name_prefix):     # 頭に prefixが付いてなかったら
-                opt_name = self.__option_name_prefix + opt_name            # 頭に prefixを付加
+            opt_name = opname
+            if not opt_name.startswith(self._option_name_prefix):     # 頭に prefixが付いてなかったら
+                opt_name = self._option_name_prefix + opt_name            # 頭に prefixを付加
 
             # Python変数としての文字種チェック
             assert is_optionname(opt_name),\
                 f'illegal option name [{opt_name}] in {iopset}'
             # 重複チェック
-            assert opt_name not in self.__options,\
+            assert opt_name not in opt_names,\
                 f'duplicated option name [{opt_name}] in {iopset}'
+            opt_names.add(opt_name)
 
             # オプション文字列の処理 ===========================================
-            assert isinstance(set.opstrings, str), \
-                f'illegal type of option strings(must be str) {set.opstrings} in {iopset}'
+            assert isinstance(opstrings, str), \
+                f'illegal type of option strings(must be str) {opstrings} in {iopset}'
             s_options: list[str] = []
             l_options: list[str] = []
             ioacomment: str = ""
 
             # 定義されたオプション文字列を個々に分割
-            option_strings = list(map(lambda x: x.strip(), set.opstrings.split(',')))
+            option_strings = [x.strip() for x in opstrings.split(',')]
             # 一個ずつチェックして格納
             for s in option_strings:
-                count = count_prefix(s, self.__option_string_prefix, max_count=0)
+                count = count_prefix(s, self._option_string_prefix, max_count=0)
                 if count == 1:      # 1文字オプション
                     assert is_optionstringS(s[1:]), f'illegal option string [{s}] in {iopset}'
                     s_options.append(s[1:])
@@ -627,53 +2473,101 @@ class Parse:
                     #     f'illegal option string [{s}] in {iopset}'
 
             # コメント
-            icomment = "" if set.comment is None else set.comment   # Noneだったら空文字列
+            icomment = "" if comment is None else comment   # Noneだったら空文字列
             assert isinstance(icomment, str), \
                 f'illegal type of "comment" (must be str or None){icomment} in {iopset}'
 
             # アクションタイプの処理 ===========================================
             iatype: At = At.NORMAL
-            if set.actions is not None:
+            if actions is not None:
                 ioafunc: Optional[list[Any]] = []
-                if type(set.actions) not in [list, tuple]:
-                    set.actions = [set.actions]
-                for item in set.actions:
-                    assert callable(item) or (item in _OATYPE_SET.keys()), \
-                        f'illegal "option/ option argument type" [{item}] in {iopset}'
-                    if item in _OATYPE_SET.keys():
-                        iatype = iatype | _OATYPE_SET[item]
-                    else:
+                if type(actions) not in [list, tuple]:
+                    actions = [actions]
+                for item in actions:
+                    if callable(item):
                         ioafunc.append(item)
+                    else:
+                        assert item in _OATYPE_SET, \
+                            f'illegal "option/ option argument type" [{item}] in {iopset}'
+                        iatype = iatype | _OATYPE_SET[item]
 
-                    assert At.COUNT == iatype or At.COUNT not in iatype, \
+                if At.COUNT in iatype:
+                    assert At.COUNT == iatype, \
                         f'"COUNT" and other types are exclusive." [{iatype}] in {iopset}'
-                    assert At.COUNT not in iatype or not ioafunc, \
+                    assert not ioafunc, \
                         f'"COUNT" and other functions are exclusive." [{iatype}] in {iopset}'
-                if not ioafunc and At.COUNT not in iatype:
+                elif not ioafunc:
                     ioafunc.append(str)
             else:
                 ioafunc = None
 
             # オプション属性を作成 =============================================
-            setattr(self, opt_name,
-                    Opset(l_options, s_options, icomment, ioacomment, ioafunc, iatype))
-
-            self.__D_option[iopset[0]] = getattr(self, opt_name)     # オプション情報 dictバージョン
-            self.__options.append(opt_name)
-            self.__options_and_comments.append(opt_name)
+            self._opdefs.append(Opdef(tuple(l_options), tuple(s_options), icomment, ioacomment,
+                                      tuple(ioafunc) if ioafunc is not None else None, iatype))
+            self._opnames.append(iopset[0])      # オプション情報 dictバージョンのキー
+            self._options.append(opt_name)
+            self._options_and_comments.append(opt_name)
             for s in l_options:
-                assert s not in self.__ltoOPS.keys(), f'duplicated option string --{s} in {iopset}'
-                self.__ltoOPS[s] = opt_name
+                assert s not in self._ltoOPS.keys(), f'duplicated option string --{s} in {iopset}'
+                self._ltoOPS[s] = opt_name
             for s in s_options:
-                assert s not in self.__stoOPS.keys(), f'duplicated option string -{s} in {iopset}'
-                self.__stoOPS[s] = opt_name
+                assert s not in self._stoOPS.keys(), f'duplicated option string -{s} in {iopset}'
+                self._stoOPS[s] = opt_name
+
+    # -----------------------------------------------------
+    # オプション文字列 -> _Opref の索引作成
+    # （一度だけの解析では使わないものもあるので、初めて必要になった時に作る。
+    #   複数のスレッドで同時に作っても、同じ内容になるだけ）
+    # -----------------------------------------------------
+    def __oprefs(self) -> list[_Opref]:
+        refs = self._refs
+        if refs is None:
+            refs = self._refs = [_Opref(i, opdef) for i, opdef in enumerate(self._opdefs)]
+        return refs
+
+    def _short_dispatch(self) -> dict[str, _Opref]:
+        """ 1文字オプション -> _Opref """
+        dispatch = self._s_dispatch
+        if dispatch is None:
+            refs, index = self.__oprefs(), self._attr_index
+            dispatch = self._s_dispatch = {s: refs[index[opt_name]]
+                                           for s, opt_name in self._stoOPS.items()}
+        return dispatch
+
+    def _long_ref(self, opt: str) -> Optional[_Opref]:
+        """ ロング名オプション（省略形を含む）の _Opref を返す（一致しない、または一意でなければ None）。
+            何度も探すまでは、索引を作らずにロング名オプションを順に調べる（一度だけの解析のため）
+        """
+        if self._l_abbrev is not None or self._l_lookups >= _ABBREV_AFTER:
+            return self._long_abbrev().get(opt)
+        self._l_lookups += 1
+        found = [lopt for lopt in self._ltoOPS if lopt.startswith(opt)]
+        if len(found) != 1:
+            return None
+        return self.__oprefs()[self._attr_index[self._ltoOPS[found[0]]]]
+
+    def _long_abbrev(self) -> dict[str, Optional[_Opref]]:
+        """ ロング名オプションの、すべての先頭部分（省略形）からオプションを引く索引。
+            複数のロング名オプションに一致する（一意でない）省略形は、None にしておく
+        """
+        abbrev = self._l_abbrev
+        if abbrev is None:
+            refs, index = self.__oprefs(), self._attr_index
+            abbrev = {}
+            for lopt, opt_name in self._ltoOPS.items():
+                ref = refs[index[opt_name]]
+                for i in range(1, len(lopt) + 1):
+                    head = lopt[:i]
+                    abbrev[head] = None if head in abbrev else ref
+            self._l_abbrev = abbrev
+        return abbrev
 
     # -----------------------------------------------------
     # 排他リスト読み込み処理
     # -----------------------------------------------------
     def __set_exclusive(self, exsv: TExclusiveset):
         """ 排他リスト読み込み処理 """
-        optionname_list = self.__D_option.keys()
+        optionname_list = self._opnames
         if isinstance(exsv[0], str):
             exsv = (exsv, )
     
@@ -688,241 +2582,663 @@ class Parse:
                     f'option name "{p}" supecified twice in exclusive set {exset}'
                 wset.add(p)
 
-            self.__exclusive.append(wset)
+            self._exclusive += (frozenset(wset), )
+        self._ex_groups = self.__read_groups(exsv, "exclusive")
         return
 
     # -----------------------------------------------------
-    # 排他チェック処理
+    # 制約リスト読み込み処理（オプション名を、オプションの番号のビットマスクにする）
     # -----------------------------------------------------
-    def __exclusive_check(self) -> None:
-        ''' 排他チェック処理
-            （オプションの排他セット中、二つ以上 Enableになったらエラー）
-        '''
-        for wset in self.__exclusive:
-            hotseat = ""
-            for p in wset:
-                if self.OPT_[p].isEnable:
-                    if hotseat:
-                        self.__set_error_reason(
-                            'E31', ext0=self.make_options(self.OPT_[hotseat]),
-                            ext1=self.make_options(self.OPT_[p]))
-                        self.__error = True
-                        return
-                    hotseat = p
+    def __group_mask(self, names: Sequence[str], where: str, item: Any) -> tuple[int, tuple[int, ...]]:
+        """ オプション名のリストを、(ビットマスク, オプションの番号のタプル) にする """
+        indexes: list[int] = []
+        for p in names:
+            assert isinstance(p, str), \
+                f'incollect format in {where} set {item}'
+            assert p in self._opname_index, \
+                f'incollect option name "{p}" in {where} set {item}'
+            index = self._opname_index[p]
+            assert index not in indexes, \
+                f'option name "{p}" supecified twice in {where} set {item}'
+            indexes.append(index)
+        return sum(1 << i for i in indexes), tuple(indexes)
+
+    def __read_groups(self, groups: TExclusiveset, where: str) -> tuple[tuple[int, tuple[int, ...]], ...]:
+        """ オプション名のリスト（またはそのリスト）を読み込む """
+        if isinstance(groups[0], str):
+            groups = (groups, )
+        return tuple(self.__group_mask(group, where, group) for group in groups)
+
+    def __read_requires(self, reqs: TRequireset, where: str
+                        ) -> list[tuple[int, tuple[int, tuple[int, ...]]]]:
+        """ (オプション名, オプション名のリスト) のリストを読み込む """
+        if isinstance(reqs[0], str):
+            reqs = (reqs, )         # type: ignore
+        ret: list[tuple[int, tuple[int, tuple[int, ...]]]] = []
+        for req in reqs:
+            assert len(req) == 2 and isinstance(req[0], str), \
+                f'incollect format in {where} set {req}'
+            _, (index, ) = self.__group_mask(req[0:1], where, req)
+            targets = (req[1], ) if isinstance(req[1], str) else req[1]
+            ret.append((index, self.__group_mask(targets, where, req)))
+        return ret
 
-    # -----------------------------------------------------
-    # コマンドライン解析の本文
-    # -----------------------------------------------------
-    def __parse(self) -> None:
-        """ コマンドラインを解析する """
-        t = CheckTurn()         # ターンチェック用
+    def __set_implies(self, implies: TRequireset) -> None:
+        """ implies リスト読み込み処理（implies の implies も、まとめて有効にする） """
+        direct: dict[int, int] = {}
+        for index, (group, _) in self.__read_requires(implies, "implies"):
+            direct[index] = direct.get(index, 0) | group
+        closure: dict[int, int] = {}
+        for index in direct:
+            mask, todo = 0, [index]
+            while todo:
+                group = direct.get(todo.pop(), 0) & ~mask
+                mask |= group
+                todo += [i for i in range(group.bit_length()) if group >> i & 1]
+            closure[index] = mask
+        self._implies = tuple((1 << index, mask) for index, mask in closure.items())
 
-        if self.__debug:        # デバッグモード指定を取得
-            wargs: list[str] = []
-            for item in self.__args:
-                if item.startswith("---"):
-                    self.__debugmode = "*" + item[3:]
-                else:
-                    wargs += [item]
-            self.__args = wargs
 
-        if self.__filexpand:    # ファイル展開
+# -----------------------------------------------------
+# 解析の統計（stats）
+# -----------------------------------------------------
+class ParseStats:
+    """ １回の解析の統計（Parse(stats=True) の時、Parse.stats で参照する。時間は秒）。
+        phases の段階は、file_expand（ファイル展開）、scan（解析ループ。ファイル展開、変換の時間は除く）、
+        convert（オプション引数の変換）、expand（ブレース、ワイルドカード展開）、
+        constraint（制約チェック）、total（解析全体）
+    """
+    def __init__(self, file_cache: Optional[FileCache] = None) -> None:
+        self.phases: dict[str, float] = {}          # 段階 -> 時間
+        self.converters: dict[str, list[Any]] = {}  # 変換関数名 -> [呼び出し回数, 累計時間]
+        self.tokens = 0                 # 解析したコマンドラインの要素数（ファイル展開後）
+        self.convert_hits = 0           # 変換結果のキャッシュ（ConvertCache）にあった回数
+        self.convert_misses = 0         # 変換結果のキャッシュになかった回数（覚えなかったものも含む）
+        self.file_hits = 0              # ファイル展開のキャッシュ（FileCache）から読んだ回数
+        self.file_misses = 0            # ファイル展開のキャッシュになかった回数
+        self.__file_cache = file_cache
+        self.__file_base = (file_cache.hits, file_cache.misses) if file_cache is not None else (0, 0)
+        self.__start = perf_counter()
+
+    def _done(self) -> None:
+        """ 解析の終わり（total、ファイル展開のキャッシュの回数を求める） """
+        self._add('total', perf_counter() - self.__start)
+        if self.__file_cache is not None:
+            self.file_hits = self.__file_cache.hits - self.__file_base[0]
+            self.file_misses = self.__file_cache.misses - self.__file_base[1]
+
+    def _add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def _nested(self) -> float:
+        """ 解析ループの中で計る段階（ファイル展開、変換）の、これまでの合計時間 """
+        return self.phases.get('file_expand', 0.0) + self.phases.get('convert', 0.0)
+
+    def _count(self, args: Iterable[str]) -> Iterator[str]:
+        """ args をそのまま返しながら、要素数を数える """
+        for arg in args:
+            self.tokens += 1
+            yield arg
+
+    def _timed(self, args: Iterable[str], phase: str) -> Iterator[str]:
+        """ args をそのまま返しながら、次の要素を取り出すのにかかった時間を phase に足す """
+        it = iter(args)
+        while True:
+            start = perf_counter()
             try:
-                self.__args = file_expand(self.__args)
-            except Exception as e:
-                self.__set_error_reason('E01', str(e))
+                arg = next(it)
+            except StopIteration:
                 return
+            finally:
+                self._add(phase, perf_counter() - start)
+            yield arg
+
+    def _merge(self, other: ParseStats) -> None:
+        """ サブコマンドの統計を足す（total、要素数は除く。残りの要素は親で数えている） """
+        for phase, seconds in other.phases.items():
+            if phase != 'total':
+                self._add(phase, seconds)
+        for name, (calls, seconds) in other.converters.items():
+            entry = self.converters.setdefault(name, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+        self.convert_hits += other.convert_hits
+        self.convert_misses += other.convert_misses
+
+    def __repr__(self) -> str:
+        phases = ", ".join(f"{phase}={seconds * 1000:.3f}ms" for phase, seconds in self.phases.items())
+        return f"ParseStats({phases}, tokens={self.tokens}, converters={len(self.converters)})"
+
+
+class _ConvertStats:
+    """ 変換関数ごとの呼び出し回数、時間を数える（ConvertCache の代わりに _convert_optarg() に渡す）。
+        （str は変換しないので数えない）
+    """
+    __slots__ = ('stats', 'cache')
+
+    def __init__(self, stats: ParseStats, cache: Optional[ConvertCache]) -> None:
+        self.stats = stats
+        self.cache = cache              # 本来の変換結果のキャッシュ
+
+    def convert(self, afunc: Any, optarg: str) -> Any:
+        cache = self.cache
+        hits, misses = (cache.hits, cache.misses + cache.skips) if cache is not None else (0, 0)
+        start = perf_counter()
+        try:
+            if cache is None:
+                return _convert_one(afunc, optarg)
+            return cache.convert(afunc, optarg)
+        finally:
+            seconds = perf_counter() - start
+            stats = self.stats
+            name = getattr(afunc, '__qualname__', None) or repr(afunc)
+            entry = stats.converters.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            stats._add('convert', seconds)
+            if cache is not None:
+                stats.convert_hits += cache.hits - hits
+                stats.convert_misses += cache.misses + cache.skips - misses
 
-        # ここから解析本文
-        b_args = iter(self.__args)      # コマンドライン（文字列のリスト）をイテレータに
-        for arg in b_args:
-            # コマンドラインの１ブロックずつ、ブロックタイプを判定
-            blk_type = check_blocktype(arg, self.__option_string_prefix)
 
-            if blk_type in Bt.LONLY:    # ロング名オプション・プリフィックス（"--"） のみ ==========
-                if t.checkTurn(Turn.ARG):   # ターンチェック（コマンド引数）
-                    if (self.__smode == Smode.ONEPAIR and t.isRepeat(Turn.ARG)) or \
-                       (self.__smode == Smode.ARGFIRST and t.getTimes(Turn.OPT)):
-                        break
+# -----------------------------------------------------
+# 一括解析（parse_many）用
+# -----------------------------------------------------
+class ParseResult(NamedTuple):
+    """ 一括解析の、１コマンドライン分の解析結果 """
+    enabled: tuple[str, ...]        # 指定されたオプション名
+    values: dict[str, Any]          # オプション名 -> オプション引数（None のものは除く）
+    params: list[str]               # コマンド引数リスト
+    eno: str                        # エラー番号（エラーなしは "N00"）
 
-                wparam = next(b_args, None)     # 次のブロックを取得
-                if wparam is None:              # 次のブロックが無ければ終了
-                    break
-                self.__params.append(str(wparam))   # 次のブロックは無条件に「コマンド引数」
-                continue
 
-            elif blk_type in Bt.LOPT:   # ロング名オプションブロック（頭が「--」） =================
-                if t.checkTurn(Turn.OPT):   # ターンチェック（オプション）
-                    if (self.__smode == Smode.ONEPAIR and t.isRepeat(Turn.OPT)) or \
-                       (self.__smode == Smode.OPTFIRST and t.getTimes(Turn.ARG)):
-                        break
+_worker_parse: Optional[Parse] = None      # ワーカープロセスで使い回す Parse
 
-                opt, oarg = split2(arg[2:], '=')  # オプション名、引数を取得
-                # opt: 入力されたロング名オプション
-                # oarg: None 「=」が無い「--<opt> のみ」
-                # oarg: None以外 「=」に続いて入力されたオプション引数「--<opt>=<oarg>」
 
-                # オプションキャンセル処理
-                if self.__cancelable and oarg is None and opt[-1] == "-":
-                    opt2 = self.__complete_l_option(opt[:-1])
-                    if opt2:    # 正しいロング名オプション ----------
-                        __ops = getattr(self, self.__ltoOPS[opt2])
-                        __ops._set_isEnable(False)
-                        __ops._set_value(None)
-                        continue
-                    else:       # ロング名オプションが正しくない ----
-                        self.__set_error_reason('E14', arg=arg)
-                        return
+def _parse_many_init(spec: ParserSpec, kwargs: dict[str, Any]) -> None:
+    """ ワーカープロセスの初期化 """
+    global _worker_parse
+    kwargs = dict(kwargs)
+    stats = kwargs.pop("stats", False)
+    _worker_parse = Parse([], spec, **kwargs)._with_stats(stats)
 
-                opt = self.__complete_l_option(opt)
-                if opt:         # 正しいロング名オプション ----------
-                    __ops = getattr(self, self.__ltoOPS[opt])
-                    __ops._set_isEnable(True)
 
-                    if __ops.afunc:     # オプション引数が必要 ---------
-                        harg = arg  # for 'E12' error_reason
-                        if oarg is None:                    # オプション引数無し（= 以降が無い）
-                            if At.OPTIONAL in __ops.atype:    # オプション引数省略可能
-                                self.__store_value(__ops, None)
-                                continue
-                            else:
-                                oarg = next(b_args, None)           # 次のブロックを引数として取得
-                                blk_type = check_blocktype(oarg, self.__option_string_prefix)
-                                if blk_type not in Bt.NORMAL | Bt.SOPTn:    # それも無ければエラー
-                                    self.__set_error_reason('E11', arg=arg)
-                                    return
+def _parse_many_chunk(chunk: list[list[str]]) -> list[ParseResult]:
+    """ ワーカープロセスで、チャンク分のコマンドラインを解析する """
+    assert _worker_parse is not None
+    return [_worker_parse._reparse(argv)._compact() for argv in chunk]
 
-                                # for 'E12' error_reason
-                                harg = harg + " " + ('"None"' if oarg is None else oarg)
 
-                        ret = self.__store_value(__ops, oarg)    # オプション引数を格納
-                        if not ret:     # オプション引数格納（変換）エラー
-                            self.__set_error_reason('E12', arg=harg)
-                            return
+class Parse:
+    """Parseのドキュメント"""
+    def __init__(self,
+                 args: list[str],                   # 解析するコマンドライン
+                 options: TOptions | ParserSpec,    # オプション情報（またはコンパイル済みのもの）
+                 exclusive: TExclusiveset = [],     # 排他オプションリスト
+                 cancelable: bool = False,          # オプションキャンセル可能モード
+                 smode: Smode = Smode.NONE,         # 解析モード
+                 winexpand: bool = True,            # Windowsで、ワイルドカードを展開するかどうか
+                 file_expand: bool = False,         # コマンド引数の @<filename> を展開するかどうか
+                 emessage_header: str = "@name",    # エラーメッセージの頭に付けるコマンド名
+                 comment_sp: str = '//',            # オプションコメントのセパレータ
+                 debug: bool = False,               # デバッグ機能を有効にする
+                 option_name_prefix: str = "OPT_",  # オプション属性を生成する時のprefix
+                 option_string_prefix: str = "-",   # オプションの前に付ける - とか --
+                 lazy: bool = False,                # オプション引数を、参照時に変換する
+                 convert_cache: Optional[ConvertCache] = None,  # 変換結果のキャッシュ
+                 codegen: bool = False,             # 専用に生成した解析ループを使う
+                 file_cache: Union[bool, FileCache] = True,     # ファイル展開のキャッシュ
+                 wildcard: bool = False,            # 全環境で、ワイルドカード（** も）を展開する
+                 max_matches: int = 0,              # ワイルドカード展開で一致する数の上限
+                 lazy_expand: bool = False,         # ワイルドカードを、参照時に展開する
+                 brace: bool = False,               # 全環境で、ブレース展開をする
+                 requires: TRequireset = [],        # 必要なオプションのリスト
+                 implies: TRequireset = [],         # 一緒に有効になるオプションのリスト
+                 at_least_one: TExclusiveset = [],  # どれか一つは必要なオプションのリスト
+                 subcommands: Mapping[str, TSubcommand] = {},   # サブコマンド名 -> 読み込み方
+                 stats: Union[bool, Callable[[ParseStats], Any]] = False,  # 解析の統計を取る
+                 emsg: Mapping[str, str] = {},      # エラーメッセージの上書き（エラー番号 -> テンプレート）
+                 ) -> None:
+        """ コマンドラインパーサー """
 
-                    else:               # オプション引数が不要 ---------
-                        if oarg is not None:                     # オプション引数が不要なのに引数あり
-                            self.__set_error_reason('E13', arg=arg)
-                            return
-                        if At.COUNT in __ops.atype:
-                            __ops._count_value(1)
+        # オプション情報のコンパイル（コンパイル済みなら、そのまま使う）
+        if isinstance(options, ParserSpec):
+            assert not (exclusive or requires or implies or at_least_one or subcommands or emsg), \
+                'exclusive must be specified at compile time when options is a ParserSpec'
+            self.__spec = options
+        else:
+            self.__spec = ParserSpec(options, exclusive, comment_sp,
+                                     option_name_prefix, option_string_prefix,
+                                     requires, implies, at_least_one, subcommands, emsg)
 
-                else:           # ロング名オプションが正しくない ----
-                    self.__set_error_reason('E14', arg=arg)
-                    return
+        self.__cancelable = cancelable
+        self.__smode = smode
+        self.__winexpand = winexpand
+        self.__wildcard = wildcard
+        self.__max_matches = max_matches
+        self.__lazy_expand = lazy_expand
+        self.__brace = brace
+        self.__filexpand = file_expand
+        self.__debug = debug
+        self.__lazy = lazy
+        self.__convert_cache = convert_cache
+        self.__codegen = codegen
+        self.__file_cache = _get_file_cache(file_cache) if file_expand else None
+        self.__stats_on = stats     # 関数なら、解析ごとに ParseStats を渡して呼ぶ
 
-            elif blk_type in Bt.SOPT:    # 1文字オプションブロック（頭が「-」）=======================
-                if t.checkTurn(Turn.OPT):   # ターンチェック（オプション）
-                    if (self.__smode == Smode.ONEPAIR and t.isRepeat(Turn.OPT)) or \
-                       (self.__smode == Smode.OPTFIRST and t.getTimes(Turn.ARG)):
-                        break
+        self.__options = self.__spec._options
+        self.__options_and_comments = self.__spec._options_and_comments
+        self.__exclusive = self.__spec._exclusive
 
-                # オプションキャンセル処理
-                if self.__cancelable and len(arg) == 3 and arg[-1] == "-":
-                    opt = arg[1]
-                    if opt in self.__s_options:     # 正しい1文字オプション -----------
-                        __ops = getattr(self, self.__stoOPS[opt])
-                        __ops._set_isEnable(False)
-                        __ops._set_value(None)
-                        continue
-                    else:                           # 1文字オプションが正しくない ------
-                        self.__set_error_reason('E23', opt=opt, arg=arg)
-                        return
+        # エラーメッセージの頭に付けるプログラム名を格納
+        if emessage_header == "@name":
+            self.__emessage_header = _path_name(sys.argv[0])
+        elif emessage_header == "@stem":
+            self.__emessage_header = _path_name(sys.argv[0], stem=True)
+        else:
+            self.__emessage_header = emessage_header
 
-                c_arg = iter(arg[1:])
-                for opt in c_arg:
-                    if opt in self.__s_options:     # 正しい1文字オプション -----------
-                        __ops = getattr(self, self.__stoOPS[opt])
-                        __ops._set_isEnable(True)
+        # 解析結果の格納先（オプションの定義は ParserSpec のものを共有する）
+        self.__result = _Result(len(self.__options))
+        self.__inherit: Optional[_Result] = None    # 親コマンドの解析結果（サブコマンドの時）
+        self.__segments = False                     # 区切りごとの解析（iter_segments）の時
+        # OPT_["option"]、OPT_xxx は、参照時に解析結果のビュー（Opset）を作る（解析し直しても同じもの）
+        self.__D_option = _OptionView(self.__spec, self.__result)
 
-                        if __ops.afunc:                 # オプション引数が必要か
-                            oparg = "".join([c for c in c_arg])    # 後続文字列からオプション引数を取得
-                            harg = arg  # for 'E22' error_reason
+        self._reparse(args)
 
-                            if not oparg:               # 無ければ、
-                                oparg = next(b_args, None)          # 次のブロックを取得
-                                blk_type = check_blocktype(oparg, self.__option_string_prefix)
-                                if blk_type not in Bt.NORMAL | Bt.SOPTn:
-                                    self.__set_error_reason('E21', opt=opt, arg=arg)
-                                    return
+    def _reparse(self, args: list[str]) -> Parse:
+        """ 同じオプション情報、解析条件で、別のコマンドラインを解析し直す（自身を返す） """
+        self.__begin(args)
+        self.__parse()
+        self.__finish()
+        return self
 
-                                # for 'E22' error_reason
-                                harg = harg + " " + ('"None"' if oparg is None else oparg)
+    def __begin(self, args: list[str]) -> None:
+        """ 解析結果をクリアする """
+        self.__result.clear()                   # 前回の解析結果をクリア
 
-                            ret = self.__store_value(__ops, oparg)  # オプション引数を格納
-                            if not ret:                 # オプション引数格納（変換）エラー
-                                self.__set_error_reason('E22', opt=opt, arg=harg)
-                                return
-                        elif At.COUNT in __ops.atype:
-                            __ops._count_value(1)
+        self.__args = args
+        self.__debugmode: str = ""              # デバッグモードを格納
 
-                    else:                           # 1文字オプションが正しくない ------
-                        self.__set_error_reason('E23', opt=opt, arg=arg)
-                        return
+        # コマンドライン解析結果格納用 ---------------------------------
+        self.__params: list[str] | LazyParams = []  # コマンド引数リスト
+        self.__error: bool = True               # 解析エラーがあったかどうか
+        self.__error_reason: dict[str, str] = {"eno": "N00"}    # エラー理由
+        self.__additional_emsg: list[str] = []  # 追加のエラーメッセージ
+        self.__remain: list[str] = []           # 解析の残り
+        self.__subcommand: Optional[str] = None # 指定されたサブコマンド名
+        self.__sub: Optional[Parse] = None      # サブコマンドの解析結果
+        self.__next_head: Optional[str] = None  # 次の区切りの先頭（iter_segments の時）
+        self.__stats: Optional[ParseStats] = ParseStats(self.__file_cache) if self.__stats_on else None
 
-            else:   # コマンド引数ブロック（頭が「―」以外、または「-」単独）==========================
-                # bt.LOPT、bt.LONLY、bt.SOPT、Bt.SONLY 以外（Bt.NORMAL、Bt.NONE、Bt.BLANK）
-                if t.checkTurn(Turn.ARG):   # ターンチェック（コマンド引数）
-                    if (self.__smode == Smode.ONEPAIR and t.isRepeat(Turn.ARG)) or \
-                       (self.__smode == Smode.ARGFIRST and t.getTimes(Turn.OPT)):
-                        break
+    def __finish(self) -> None:
+        """ 解析後の処理（引き継ぎ、制約チェック、サブコマンド、デバッグ表示） """
+        if self.__inherit is not None:
+            self.__inherit_options(self.__inherit, merge=not self.__segments)
 
-                self.__params.append(arg)
+        stats = self.__stats
+        if not self.__error:
+            if self.__subcommand is not None:
+                # サブコマンドの解析（制約チェックは、サブコマンド側でまとめて行う）
+                self.__parse_subcommand(self.__subcommand, self.__remain)
+            elif stats is None:
+                # 制約（排他など）チェック処理実行
+                self.__constraint_check()
+            else:
+                start = perf_counter()
+                self.__constraint_check()
+                stats._add('constraint', perf_counter() - start)
 
-        else:   # ループ終了
-            self.__error = False
-            if isWin and self.__winexpand:  # Windows用、ワイルドカード展開
-                self.__params = _wArgs(self.__params)
+        if stats is not None:
+            stats._done()
+            if callable(self.__stats_on):
+                self.__stats_on(stats)
 
-            return
+        # デバッグモード（デバッグ用モジュールは、ここで初めて読み込む）
+        if self.__debugmode and _load_debugmodule():
+            _debugmodule.show_debug(self, str(self.__debugmode)[1:])
 
-        # 途中終了
-        self.__remain = [arg] + [_arg for _arg in b_args]       # 残りのコマンドラインを格納
-        if isWin and self.__winexpand:  # Windows用、ワイルドカード展開
-            self.__params = _wArgs(self.__params)
-        self.__error = False
-        return
+    # -----------------------------------------------------
+    # 区切りごとの解析（iter_segments）
+    # -----------------------------------------------------
+    def __fresh(self) -> Parse:
+        """ 同じオプション情報、解析条件で、解析結果だけ新しい Parse を作る """
+        new = object.__new__(Parse)
+        new.__dict__.update(self.__dict__)
+        new.__result = _Result(len(self.__options))
+        new.__D_option = _OptionView(self.__spec, new.__result)
+        new.__inherit = None
+        return new
+
+    def _with_stats(self, stats: Union[bool, Callable[[ParseStats], Any]]) -> Parse:
+        """ 次の解析から、統計を取るようにする（最初の空の解析では取らない。自身を返す） """
+        self.__stats_on = stats
+        return self
+
+    def _iter_segments(self, args: Iterable[str], carry: bool = False) -> Iterator[Parse]:
+        """ コマンドラインを Smode の区切りごとに解析して、区切りごとの Parse を順に返す。
+            コマンドラインは１つのイテレータ（カーソル）で先に進めるだけで、残りをコピーしない。
+            carry なら、前の区切りまでに指定されたオプションを引き継ぐ（自身は解析条件として使う）
+        """
+        if self.__filexpand:
+            args = _iter_file_expand_checked(args, self.__file_cache)
+        if self.__stats_on and self.__filexpand:   # ファイル展開の時間は、その時に解析している区切りの統計に入れる
+            args = self.__iter_stats(args, lambda: seg.__stats)
+        prefix = self.__spec._option_string_prefix
+        rest = _classify(args, prefix)
+        blocks: Iterator[tuple[int, str]] = rest
+        prev: Optional[Parse] = None
+        pulled = 0                          # その区切りで読んだブロックの数
+
+        def counted(blocks: Iterator[tuple[int, str]]) -> Iterator[tuple[int, str]]:
+            nonlocal pulled
+            for block in blocks:
+                pulled += 1
+                yield block
+
+        while True:
+            seg = self.__fresh()
+            if carry and prev is not None:
+                seg.__inherit = prev.__result
+            seg.__begin([])
+            seg.__segments = True
+            pulled = 0
+            seg.__parse_blocks(counted(blocks))
+            if seg.__stats is not None:     # 先読みした次の区切りの先頭は、次の区切りで数える
+                lookahead = seg.__next_head is not None and pulled > 1
+                seg.__stats.tokens = pulled - lookahead
+            seg.__finish()
+            head = seg.__next_head
+            if head is not None and not seg.__error and pulled <= 1:
+                seg.__remain = [head]       # 先頭のブロックしか読めない（"--" のみ）なら、ここで終わり
+                head = None
+            yield seg
+            if head is None or seg.__error:
+                return
+            # 区切りの先頭のブロックを戻して、同じカーソルから続きを解析する
+            blocks = itertools.chain(_classify([head], prefix), rest)
+            prev = seg
+
+    def __iter_stats(self, args: Iterable[str],
+                     current: Callable[[], Optional[ParseStats]]) -> Iterator[str]:
+        """ args をそのまま返しながら、current() の統計にファイル展開の時間を足す """
+        it = iter(args)
+        while True:
+            start = perf_counter()
+            try:
+                arg = next(it)
+            except StopIteration:
+                return
+            stats = current()
+            if stats is not None:
+                stats._add('file_expand', perf_counter() - start)
+            yield arg
+
+    def _compact(self) -> ParseResult:
+        """ 解析結果を、コンパクトな ParseResult にして返す """
+        opnames = self.__spec._opnames
+        result = self.__result
+        if self.__lazy and not self.validate():
+            for i in sorted(result.pending):    # 変換エラー以外のオプション引数は変換しておく
+                result.resolve(i, At.APPEND in self.__spec._opdefs[i].atype)
+        indexes = [i for i, isenable in enumerate(result.enabled) if isenable]
+        enabled = tuple(opnames[i] for i in indexes)
+        # 変換エラーで未変換のまま（_LazyValue）のオプション引数は、None と同じに除く
+        values = {opnames[i]: result.values[i] for i in indexes
+                  if result.values[i] is not None and i not in result.pending}
+        params = self.__params
+        if isinstance(params, LazyParams):
+            try:
+                params = list(params)
+            except WildcardLimitError:
+                params = []
+        return ParseResult(enabled, values, params, self.__error_reason["eno"])
 
-    def __store_value(self, __ops: Opset, optarg: Any) -> bool:
-        """ このオプションのオプション引数を格納する。エラー時には Falseを返す """
-        if optarg is None:
-            __ops._store_value(optarg)
-            return True
-        for __afunc in __ops.afunc:
-            if callable(__afunc):
-                try:
-                    # 「str」の時はそのまま格納
-                    if __afunc is str:
-                        __ops._store_value(optarg)
+    @staticmethod
+    def parse_many(argvs: Iterable[list[str]],
+                   options: TOptions | ParserSpec,
+                   exclusive: TExclusiveset = [],
+                   workers: int = 1,
+                   chunksize: int = 256,
+                   **kwargs: Any) -> Iterator[ParseResult]:
+        """ 複数のコマンドラインを解析して、ParseResult を入力順に返す（ParserSpec.parse_many() 参照） """
+        spec = options if isinstance(options, ParserSpec) else ParserSpec(options, exclusive)
+        return spec.parse_many(argvs, workers, chunksize, **kwargs)
 
-                    # Enum、Flag類
-                    elif isinstance(__afunc, EnumMeta):
-                        __ops._store_value(cnv_enum(__afunc, optarg))
+    @staticmethod
+    def iter_segments(args: Iterable[str],
+                      options: TOptions | ParserSpec,
+                      exclusive: TExclusiveset = [],
+                      carry: bool = False,
+                      **kwargs: Any) -> Iterator[Parse]:
+        """ 区切りごとに解析して、Parse を順に返す（ParserSpec.iter_segments() 参照） """
+        spec = options if isinstance(options, ParserSpec) else ParserSpec(options, exclusive)
+        return spec.iter_segments(args, carry, **kwargs)
 
-                    # 直接変換呼び出しできるもの
-                    else:
-                        __ops._store_value(__afunc(optarg))
+    @staticmethod
+    def compile(options: TOptions,
+                exclusive: TExclusiveset = [],
+                comment_sp: str = '//',
+                option_name_prefix: str = "OPT_",
+                option_string_prefix: str = "-",
+                cache_file: Union[str, pathlib.Path, None] = None,
+                requires: TRequireset = [],
+                implies: TRequireset = [],
+                at_least_one: TExclusiveset = [],
+                subcommands: Mapping[str, TSubcommand] = {},
+                emsg: Mapping[str, str] = {},
+                ) -> ParserSpec:
+        """ オプション情報をコンパイルする（ParserSpec(...) と同じ）。
+            cache_file を指定すると、コンパイル結果をファイルにキャッシュする
+        """
+        constraints = (requires, implies, at_least_one, subcommands, emsg)
+        if cache_file is not None:
+            return ParserSpec.cached(cache_file, options, exclusive, comment_sp,
+                                     option_name_prefix, option_string_prefix, *constraints)
+        return ParserSpec(options, exclusive, comment_sp, option_name_prefix, option_string_prefix,
+                          *constraints)
 
-                    self.__additional_emsg = []
-                    return True
+    # -----------------------------------------------------
+    # サブコマンド
+    # -----------------------------------------------------
+    def __parse_subcommand(self, name: str, args: list[str]) -> None:
+        """ サブコマンドのオプション情報（グローバルオプション含む）で、残りを解析する """
+        sub = Parse([], self.__spec.subcommand_spec(name),
+                    cancelable=self.__cancelable, smode=self.__smode,
+                    winexpand=self.__winexpand, wildcard=self.__wildcard,
+                    max_matches=self.__max_matches, lazy_expand=self.__lazy_expand,
+                    brace=self.__brace, emessage_header=self.__emessage_header,
+                    lazy=self.__lazy, convert_cache=self.__convert_cache, codegen=self.__codegen,
+                    stats=self.__stats is not None)
+        sub.__inherit = self.__result
+        sub._reparse(args)
+        if self.__stats is not None and sub.__stats is not None:
+            self.__stats._merge(sub.__stats)
+        self.__sub = sub
+        self.__remain = []
+        if sub.__error:
+            self.__error_reason, self.__additional_emsg = \
+                sub.__error_reason, sub.__additional_emsg
+            self.__error = True
+
+    def __inherit_options(self, parent: _Result, merge: bool = False) -> None:
+        """ サブコマンドより前に指定されたグローバルオプションを引き継ぐ
+            （グローバルオプションは、サブコマンドのオプション情報の先頭に同じ順で並んでいる）
+            merge=True なら、両方で指定された COUNT は合計、APPEND は前の分の後ろに追加する
+        """
+        result = self.__result
+        opdefs = self.__spec._opdefs
+        for i, isenable in enumerate(parent.enabled):
+            if not isenable:
+                continue
+            if not result.enabled[i]:
+                result.enabled[i] = True
+                result.values[i] = parent.values[i]
+                result.mask |= 1 << i
+                if i in parent.pending:
+                    result.pending.add(i)
+            elif merge and At.COUNT in opdefs[i].atype:
+                result.values[i] += parent.values[i]
+            elif merge and At.APPEND in opdefs[i].atype:
+                result.values[i] = parent.values[i] + result.values[i]
+                if i in parent.pending:
+                    result.pending.add(i)
 
-                except ValueError as e:     # 変換エラー
-                    self.__additional_emsg.append(str(e))
-        return False
+    @property
+    def subcommand(self) -> Optional[str]:
+        """ 指定されたサブコマンド名を返す（無ければ None） """
+        return self.__subcommand
 
-    def __complete_l_option(self, opt: Optional[str]) -> str:
-        """ 入力のオプション（省略形を含む）から、完全なロング名オプションを探す
-            （一致しなければ空文字を返す）
-        """
-        if not opt:
-            return ""
-        keep = ""
-        for lopt in self.__l_options:
-            if lopt.startswith(opt):    # 先頭一致でロング名オプションリストを検索
-                if keep:                    # 二度以上一致したらエラー（一意でない）
-                    return ""
-                keep = lopt                 # 一致したら、ロング名オプションをkeep
-        return keep             # 一度だけ一致していたら、そのロング名オプションが入っている
+    @property
+    def sub(self) -> Optional[Parse]:
+        """ サブコマンドの解析結果を返す（グローバルオプションを含む。サブコマンドが無ければ None） """
+        return self.__sub
+
+    # -----------------------------------------------------
+    # 制約チェック処理
+    # -----------------------------------------------------
+    def __constraint_check(self) -> None:
+        ''' 制約チェック処理
+            （implies のオプションを有効にしてから、排他、requires、at_least_one をチェックする）
+        '''
+        result = self.__result
+        mask = self.__spec._implied(result.mask)
+        added = mask & ~result.mask
+        while added:            # implies で有効になったオプション
+            low = added & -added
+            result.enabled[low.bit_length() - 1] = True
+            added ^= low
+        result.mask = mask
+
+        error = self.__spec._constraint_error(mask)
+        if error:
+            self.__error_reason, self.__additional_emsg = error
+            self.__error = True
+
+    # -----------------------------------------------------
+    # コマンドライン解析の本文
+    # -----------------------------------------------------
+    def __parse(self) -> None:
+        """ コマンドラインを解析する """
+        if self.__debug:        # デバッグモード指定を取得
+            wargs: list[str] = []
+            for item in self.__args:
+                if item.startswith("---"):
+                    self.__debugmode = "*" + item[3:]
+                else:
+                    wargs += [item]
+            self.__args = wargs
+            if self.__debugmode == "*#t" and self.__stats is None:
+                self.__stats = ParseStats(self.__file_cache)
+
+        stats = self.__stats
+        args: Iterable[str] = self.__args
+        if self.__filexpand:    # ファイル展開（解析しながら、少しずつ読み込む）
+            args = _iter_file_expand_checked(args, self.__file_cache)
+            if stats is not None:
+                args = stats._timed(args, 'file_expand')
+            if self.__debugmode:    # デバッグ表示（---#）用に、展開した（解析で読んだ）引数を記録する
+                self.__args = []
+                args = _recorded(args, self.__args)
+        if stats is not None:
+            args = stats._count(args)
+
+        # コマンドライン（文字列のリスト）を、(分類コード, ブロック) のイテレータに
+        self.__parse_blocks(_classify(args, self.__spec._option_string_prefix))
+
+    def __parse_blocks(self, blocks: Iterator[tuple[int, str]]) -> None:
+        """ (分類コード, ブロック) のイテレータを解析する """
+        stats = self.__stats
+        cache: Any = self.__convert_cache
+        if stats is not None:           # 変換関数ごとに数える（解析ループの時間からは除く）
+            cache = _ConvertStats(stats, cache)
+            start, nested = perf_counter(), stats._nested()
+        if self.__codegen:
+            scan = self.__spec._compiled_scan(self.__cancelable, self.__smode, self.__lazy)
+            events = scan(blocks, cache)
+        else:
+            events = self.__spec._scan(blocks, self.__cancelable, self.__smode, self.__lazy, cache)
+        try:
+            ok = self.__store_events(events, blocks)
+        except _ExpandError as e:       # ファイル展開のエラー
+            self.__set_error_reason(e.eno, str(e))
+            ok = False
+        if stats is not None:
+            stats._add('scan', perf_counter() - start - (stats._nested() - nested))
+        if not ok:
+            return
+
+        # ブレース展開、ワイルドカード展開（wildcard なら全環境で「**」も、そうでなければ Windowsのみ）
+        expander = _param_expander(self.__wildcard, self.__winexpand, self.__max_matches,
+                                   self.__brace)
+        if expander is not None:
+            if self.__lazy_expand:      # 参照時に展開する
+                self.__params = LazyParams(expander.expand(self.__params), self.__expand_error)
+            else:
+                start = perf_counter()
+                try:
+                    self.__params = list(expander.expand(self.__params))
+                except WildcardLimitError as e:
+                    self.__set_error_reason('E41', e.arg)
+                    return
+                finally:
+                    if stats is not None:
+                        stats._add('expand', perf_counter() - start)
+        self.__error = False
+
+    def __expand_error(self, e: WildcardLimitError) -> None:
+        """ 参照時のワイルドカード展開で、一致した数が上限を超えた """
+        self.__set_error_reason('E41', e.arg)
+        self.__error = True
+
+    def __store_events(self, events: Iterator[tuple[Ev, Optional[_Opref], Any]],
+                       blocks: Iterator[tuple[int, str]]) -> bool:
+        """ 解析イベントを受け取って、解析結果を格納する（解析エラーなら Falseを返す） """
+        enabled = self.__result.enabled
+        values = self.__result.values
+        subcommands = self.__spec._subcommands
+        mask = 0                            # 有効なオプションのビットマスク
+        for kind, ref, value in events:
+            if kind is Ev.PARAM:            # コマンド引数
+                if subcommands:             # 最初のコマンド引数がサブコマンド名
+                    if value not in subcommands:
+                        self.__set_error_reason('E51', value)
+                        return False
+                    self.__subcommand = value
+                    self.__remain = [_arg for _, _arg in blocks]    # サブコマンドで解析する
+                    break
+                self.__params.append(value)
+            elif kind is Ev.OPTION:         # オプション指定
+                enabled[ref.index] = True
+                mask |= ref.bit
+            elif kind is Ev.VALUE:          # オプション引数
+                if type(value) is _LazyValue:
+                    self.__result.pending.add(ref.index)
+                if ref.append:
+                    if values[ref.index] is None:
+                        values[ref.index] = []
+                    values[ref.index].append(value)
+                else:
+                    values[ref.index] = value
+            elif kind is Ev.COUNT:          # オプションのカウント
+                values[ref.index] = (values[ref.index] or 0) + 1
+            elif kind is Ev.CANCEL:         # オプションのキャンセル
+                enabled[ref.index] = False
+                values[ref.index] = None
+                self.__result.pending.discard(ref.index)
+                mask &= ~ref.bit
+            elif kind is Ev.ERROR:          # 解析エラー
+                self.__error_reason, self.__additional_emsg = value
+                return False
+            elif kind is Ev.SEGMENT:        # 途中終了
+                if self.__segments:         # 残りは、次の区切りで同じイテレータから解析する
+                    self.__next_head = value
+                else:
+                    self.__remain = [value] + [_arg for _, _arg in blocks]  # 残りのコマンドラインを格納
+                break
+        self.__result.mask = mask
+        return True
 
     def __set_error_reason(self, eno: str, arg: str = "???", opt: str = "???",
                            ext0: str = "ext0", ext1: str = "ext1") -> None:
@@ -935,18 +3251,32 @@ class Parse:
     def __error_message(eno: str, arg: str = "???", opt: str = "???",
                         ext0: str = "ext0", ext1: str = "ext1") -> str:
         """ 解析エラーメッセージを作成する """
-        if eno in emsg.keys():
-            return emsg[eno].format(eno=eno, arg=arg, opt=opt, ext0=ext0, ext1=ext1)
-        return emsg["E99"].format(eno=eno, arg=arg, opt=opt, ext0=ext0, ext1=ext1)
+        return _error_message(eno, arg, opt, ext0, ext1)
+
+    @property
+    def spec(self) -> ParserSpec:
+        """ コンパイル済みのオプション情報を返す """
+        return self.__spec
 
     @property
-    def OPT_(self) -> dict[str, Opset]:
+    def OPT_(self) -> Mapping[str, Opset]:
         """ オプション情報（dict タイプ）を返す """
         return self.__D_option
 
+    def __getattr__(self, name: str) -> Opset:
+        """ オプション属性（OPT_xxx）を返す（インスタンスには設定せず、参照時に作る） """
+        options = self.__dict__.get('_Parse__D_option')
+        opset = options._by_attr(name) if options is not None else None
+        if opset is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        return opset
+
+    def __dir__(self) -> Iterable[str]:
+        return [*super().__dir__(), *self.__options]
+
     @property
-    def params(self) -> list[str]:
-        """ 入力されたコマンド引数のリストを返す """
+    def params(self) -> list[str] | LazyParams:
+        """ 入力されたコマンド引数のリストを返す（lazy_expand なら、LazyParams） """
         return self.__params
 
     @property
@@ -954,16 +3284,60 @@ class Parse:
         """ 残りのコマンドラインを返す """
         return self.__remain
 
+    @property
+    def stats(self) -> Optional[ParseStats]:
+        """ 解析の統計を返す（stats=True か、デバッグモード ---#t の時。それ以外は None） """
+        return self.__stats
+
     @property
     def is_error(self) -> bool:
         """ 解析エラーで中断時、Trueになる """
         return self.__error
 
+    def validate(self) -> bool:
+        """ 遅延変換モード（lazy=True）で、未変換のオプション引数をすべて変換する。
+            変換エラーがあれば解析エラー（E12、E22）にして Falseを返す
+        """
+        if self.__error:
+            return False
+        error = self.__result.resolve_all(self.__spec._opdefs)
+        if error:
+            self.__error_reason, self.__additional_emsg = error
+            self.__error = True
+            return False
+        return True
+
+    def result(self, frozen: bool = False) -> Any:
+        """ 解析結果を、spec.result_class(frozen) のインスタンスにして返す。
+            （解析エラー時、遅延変換モードで変換エラーがあれば、ValueError）
+            APPENDタイプの値はコピー（frozen=True なら tuple）にするので、解析結果とは別物になる
+        """
+        if self.__error:
+            raise ValueError(self.get_errormessage())
+        error = self.__result.resolve_all(self.__spec._opdefs)
+        if error:
+            raise ValueError(_error_text(*error, self.__spec._emsg))
+        values = self.__result.values
+        copy = tuple if frozen else list
+        for i, opdef in enumerate(self.__spec._opdefs):
+            if At.APPEND in opdef.atype and isinstance(values[i], list):
+                if values is self.__result.values:
+                    values = list(values)
+                values[i] = copy(values[i])
+        obj = self.__spec.result_class()(self.__result.enabled, values)
+        if frozen:
+            import dataclasses
+            cls = self.__spec.result_class(frozen=True)
+            return cls(*[getattr(obj, field.name) for field in dataclasses.fields(cls)])
+        return obj
+
     def get_errormessage(self, level: int = 0) -> str:
         """ 解析エラーが生じた時のエラーメッセージを返す。
             level=0、1(追加メッセージ含む)、以下もしかしたら追加予定
         """
-        __message = self.__error_message(**self.__error_reason)
+        # サブコマンドのエラーは、サブコマンドのオプション情報の emsg で作る
+        spec = self.__sub.__spec if self.__sub is not None else self.__spec
+        __message = _error_message(**self.__error_reason, messages=spec._emsg)
         if self.__emessage_header:
             __message = self.__emessage_header + " " + __message
 
@@ -979,14 +3353,7 @@ class Parse:
 
     def make_options(self, op: Opset) -> str:
         """ オプションの、すべての文字列を取得する """
-        soption = ""
-        loption = ""
-        for s in op.s_options:
-            soption += self.__option_string_prefix + s + ', '
-        for s in op.l_options:
-            loption += self.__option_string_prefix * 2 + s + ', '
-
-        return (soption + loption).rstrip(', ')
+        return self.__spec.make_options(op)
 
     def get_optionlist(self) -> list[str]:
         """ オプション設定一覧を取得する """
@@ -0,0 +1,263 @@
+# -------------------------------------------------------------
+# cl_parse用、解析ループ生成モジュール
+# （コンパイル済みオプション情報専用の解析ループを生成する）
+# -------------------------------------------------------------
+from __future__ import annotations
+
+import weakref
+from collections.abc import Callable, Iterator
+from types import CodeType, ModuleType
+from typing import Any, Optional
+
+
+# オプションのコード（解析ループの分岐用）
+C_FLAG = 0          # オプション引数なし
+C_COUNT = 1         # COUNTタイプ
+C_ARG = 2           # オプション引数が必要
+C_OPTIONAL = 3      # オプション引数省略可能（ロング名オプションのみ）
+
+
+class _Source:
+    """ インデント付きでソースを組み立てる """
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.level = 0
+
+    def __call__(self, *lines: str) -> None:
+        for line in lines:
+            self.lines.append("    " * self.level + line)
+
+    def indent(self, n: int = 1) -> None:
+        self.level += n
+
+    def dedent(self, n: int = 1) -> None:
+        self.level -= n
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _emit_turn(src: _Source, turn: str, smode: str) -> None:
+    """ ターンチェック（解析モードによる途中終了）を出力する。turn は "OPT" か "ARG" """
+    segment = ("yield SEGMENT, None, arg", "return")
+    if smode == "ONEPAIR":          # 同じターンが２回目になったら終了
+        code, count = ("1", "n_opt") if turn == "OPT" else ("2", "n_arg")
+        src(f"if turn != {code}:")
+        src.indent()
+        src(f"turn = {code}", f"{count} += 1", f"if {count} > 1:")
+        src.indent()
+        src(*segment)
+        src.dedent(2)
+    elif smode == "OPTFIRST":       # コマンド引数の後のオプションで終了
+        if turn == "OPT":
+            src("if seen_arg:")
+            src.indent()
+            src(*segment)
+            src.dedent()
+        else:
+            src("seen_arg = True")
+    elif smode == "ARGFIRST":       # オプションの後のコマンド引数で終了
+        if turn == "ARG":
+            src("if seen_opt:")
+            src.indent()
+            src(*segment)
+            src.dedent()
+        else:
+            src("seen_opt = True")
+
+
+def _emit_value(src: _Source, lazy: bool, var: str, eno: str, optarg: str, after: str) -> None:
+    """ オプション引数の変換と、Ev.VALUE を出力する """
+    if lazy:                        # 遅延変換モード（変換はアクセス時）
+        src(f"yield VALUE, ref, _LazyValue(ref.afunc, {var}, "
+            f"_error_reason({eno!r}{optarg}, arg=harg)[0], cache)")
+    else:
+        src(f"ok, value, emsgs = _convert_optarg(ref.afunc, {var}, cache)",
+            "if not ok:")
+        src.indent()
+        src(f"yield ERROR, None, _error_reason({eno!r}, emsgs{optarg}, arg=harg)", "return")
+        src.dedent()
+        src("yield VALUE, ref, value")
+    src(after)
+
+
+def generate_source(cl: ModuleType, cancelable: bool, smode: str, lazy: bool) -> str:
+    """ 解析ループのソースを生成する（smode は Smode のメンバー名）。
+        生成するのは _factory(S, L, env) で、解析関数 scan(blocks, cache) を返す。
+        S、L は 1文字オプション、ロング名オプション（省略形含む）-> (_Opref, オプションのコード)、
+        blocks は cl_parse._classify() で分類した (分類コード, ブロック) のイテレータ
+    """
+    src = _Source()
+    src("def _factory(S, L, env):")
+    src.indent()
+    src("OPTION, VALUE, COUNT, CANCEL, PARAM, SEGMENT, ERROR = env['events']",
+        "_error_reason = env['_error_reason']",
+        "_convert_optarg = env['_convert_optarg']",
+        "_LazyValue = env['_LazyValue']",
+        "NO_BLOCK = env['_NO_BLOCK']",
+        "",
+        "def scan(blocks, cache=None):")
+    src.indent()
+    if smode == "ONEPAIR":
+        src("turn = 0", "n_opt = 0", "n_arg = 0")
+    elif smode == "OPTFIRST":
+        src("seen_arg = False")
+    elif smode == "ARGFIRST":
+        src("seen_opt = False")
+    src("for code, arg in blocks:")
+    src.indent()
+
+    # コマンド引数ブロック（通常ブロック、「-」単独、空ブロック）==============
+    src(f"if code == {cl._BK_NORMAL} or code >= {cl._BK_SONLY}:")
+    src.indent()
+    _emit_turn(src, "ARG", smode)
+    src("yield PARAM, None, arg",
+        "continue")
+    src.dedent()
+
+    # ロング名オプションブロック（頭が「--」）=================================
+    src(f"if code == {cl._BK_LOPT}:")
+    src.indent()
+    src("if len(arg) == 2:")          # ロング名オプション・プリフィックス（"--"） のみ
+    src.indent()
+    _emit_turn(src, "ARG", smode)
+    src("wparam = next(blocks, NO_BLOCK)[1]",
+        "if wparam is None:",
+        "    yield SEGMENT, None, arg",
+        "    return",
+        "yield PARAM, None, str(wparam)",
+        "continue")
+    src.dedent()
+    _emit_turn(src, "OPT", smode)
+    src("opt, eq, oarg = arg[2:].partition('=')",
+        "if not eq:",
+        "    oarg = None")
+    if cancelable:                  # オプションキャンセル処理
+        src("if oarg is None and opt[-1] == '-':",
+            "    ent = L.get(opt[:-1]) if opt[:-1] else None",
+            "    if ent is None:",
+            "        yield ERROR, None, _error_reason('E14', arg=arg)",
+            "        return",
+            "    yield CANCEL, ent[0], None",
+            "    continue")
+    src("ent = L.get(opt) if opt else None",
+        "if ent is None:",
+        "    yield ERROR, None, _error_reason('E14', arg=arg)",
+        "    return",
+        "ref, ocode = ent",
+        "yield OPTION, ref, None",
+        f"if ocode >= {C_ARG}:")
+    src.indent()
+    src("harg = arg",
+        "if oarg is None:")
+    src.indent()
+    src(f"if ocode == {C_OPTIONAL}:",
+        "    yield VALUE, ref, None",
+        "    continue",
+        "code, oarg = next(blocks, NO_BLOCK)",
+        f"if code > {cl._BK_SOPTn}:",
+        "    yield ERROR, None, _error_reason('E11', arg=arg)",
+        "    return",
+        "harg = harg + ' ' + ('\"None\"' if oarg is None else oarg)")
+    src.dedent()
+    _emit_value(src, lazy, "oarg", "E12", "", "continue")
+    src.dedent()
+    src("if oarg is not None:",
+        "    yield ERROR, None, _error_reason('E13', arg=arg)",
+        "    return",
+        f"if ocode == {C_COUNT}:",
+        "    yield COUNT, ref, 1",
+        "continue")
+    src.dedent()
+
+    # 1文字オプションブロック（頭が「-」）===================================
+    _emit_turn(src, "OPT", smode)
+    if cancelable:                  # オプションキャンセル処理
+        src("if len(arg) == 3 and arg[-1] == '-':",
+            "    opt = arg[1]",
+            "    ent = S.get(opt)",
+            "    if ent is None:",
+            "        yield ERROR, None, _error_reason('E23', opt=opt, arg=arg)",
+            "        return",
+            "    yield CANCEL, ent[0], None",
+            "    continue")
+    src("for i in range(1, len(arg)):")
+    src.indent()
+    src("opt = arg[i]",
+        "ent = S.get(opt)",
+        "if ent is None:",
+        "    yield ERROR, None, _error_reason('E23', opt=opt, arg=arg)",
+        "    return",
+        "ref, ocode = ent",
+        "yield OPTION, ref, None",
+        f"if ocode >= {C_ARG}:")
+    src.indent()
+    src("oparg = arg[i + 1:]",
+        "harg = arg",
+        "if not oparg:",
+        "    code, oparg = next(blocks, NO_BLOCK)",
+        f"    if code > {cl._BK_SOPTn}:",
+        "        yield ERROR, None, _error_reason('E21', opt=opt, arg=arg)",
+        "        return",
+        "    harg = harg + ' ' + ('\"None\"' if oparg is None else oparg)")
+    _emit_value(src, lazy, "oparg", "E22", ", opt=opt", "break")
+    src.dedent()
+    src(f"if ocode == {C_COUNT}:",
+        "    yield COUNT, ref, 1")
+
+    src.dedent(3)
+    src("return scan")
+    return src.text()
+
+
+# -----------------------------------------------------
+# 生成した解析関数のキャッシュ
+# -----------------------------------------------------
+# ソースは解析条件だけで決まるので、コンパイル（バイトコード）はその組ごとに一度だけ行う
+_code_cache: dict[tuple[bool, str, bool], CodeType] = {}
+
+# ParserSpec -> {解析条件: 解析関数}
+_scan_cache: weakref.WeakKeyDictionary[Any, dict[tuple[bool, str, bool], Callable[..., Any]]] = \
+    weakref.WeakKeyDictionary()
+
+
+def _option_code(ref: Any) -> int:
+    """ _Opref からオプションのコードを求める """
+    if ref.has_arg:
+        return C_OPTIONAL if ref.optional else C_ARG
+    return C_COUNT if ref.count else C_FLAG
+
+
+def compile_scan(cl: ModuleType, spec: Any, cancelable: bool, smode: Any,
+                 lazy: bool) -> Callable[[Iterator[tuple[int, str]], Optional[Any]], Iterator[Any]]:
+    """ ParserSpec 専用の解析関数 scan(b_args, cache) を返す（ParserSpec._scan() と同じ動作）。
+        cl は cl_parse モジュール（二重に import しないように、呼び出し側から渡す）
+    """
+    scans = _scan_cache.setdefault(spec, {})
+    key = (cancelable, smode.name, lazy)
+    scan = scans.get(key)
+    if scan is not None:
+        return scan
+
+    code = _code_cache.get(key)
+    if code is None:
+        code = compile(generate_source(cl, cancelable, smode.name, lazy),
+                       f"<cl_parse scan {key}>", "exec")
+        _code_cache[key] = code
+    namespace: dict[str, Any] = {}
+    exec(code, namespace)
+
+    s_table = {s: (ref, _option_code(ref)) for s, ref in spec._short_dispatch().items()}
+    l_table = {lopt: (ref, _option_code(ref)) if ref is not None else None
+               for lopt, ref in spec._long_abbrev().items()}
+    env = {
+        'events': (cl.Ev.OPTION, cl.Ev.VALUE, cl.Ev.COUNT, cl.Ev.CANCEL,
+                   cl.Ev.PARAM, cl.Ev.SEGMENT, cl.Ev.ERROR),
+        '_error_reason': cl._error_reason,
+        '_convert_optarg': cl._convert_optarg,
+        '_LazyValue': cl._LazyValue,
+        '_NO_BLOCK': cl._NO_BLOCK,
+    }
+    scan = namespace['_factory'](s_table, l_table, env)
+    scans[key] = scan
+    return scan
@@ -3,11 +3,12 @@
 # （このモジュールが無ければ、デバッグ表示は無視されます）
 # -------------------------------------------------------------
 from __future__ import annotations
+from collections.abc import Mapping
 from typing import Any
 import cl_parse as cl
 
 
-def show_templatex(ps: cl.Parse, options: list[str] | dict[str, cl.Opset]):
+def show_templatex(ps: cl.Parse, options: list[str] | Mapping[str, cl.Opset]):
     """ テンプレートを表示する（デバッグ／ユーティリティ用） """
 
     def __show_one(stropt: str, objopt: Any):
@@ -25,11 +26,11 @@ def show_templatex(ps: cl.Parse, options: list[str] | dict[str, cl.Opset]):
     print('if ps.is_error:')
     print('    # ps.get_errormessage() 等を表示する')
     print('    exit(1)')
-    if type(options) is list:
+    if isinstance(options, list):
         for opt in options:
             opx = getattr(ps, opt)
             __show_one(opt, opx)
-    elif type(options) is dict:
+    elif isinstance(options, Mapping):      # OPT_ は dict ではなく、Mapping のビュー
         for opt in options.keys():
             __show_one(f'OPT_["{opt}"]', ps.OPT_[opt])
     print()
@@ -68,6 +69,23 @@ def show_result(ps: cl.Parse) -> None:
               f"=> {str(opx.isEnable).ljust(5)}  {strvalue}")
 
 
+def show_stats(ps: cl.Parse) -> None:
+    """ 解析の統計（段階ごとの時間、変換関数ごとの回数と時間、キャッシュ）を表示する（デバッグ用） """
+    stats = ps.stats
+    if stats is None:
+        print("統計なし")
+        return
+    for phase, seconds in stats.phases.items():
+        print(phase.ljust(12), f"{seconds * 1000:10.3f} ms")
+    print(f"tokens = {stats.tokens}")
+    print(f"convert cache: hits = {stats.convert_hits}, misses = {stats.convert_misses}")
+    print(f"file cache: hits = {stats.file_hits}, misses = {stats.file_misses}")
+    if stats.converters:
+        print("変換関数ごとの呼び出し回数、時間")
+    for name, (calls, seconds) in sorted(stats.converters.items(), key=lambda item: -item[1][1]):
+        print(f"    {name.ljust(24)} {calls:8d} {seconds * 1000:10.3f} ms")
+
+
 def show_errormessage() -> None:
     import cl_parse as cl
 
@@ -94,7 +112,7 @@ def show_debug(ps: cl.Parse, __dmode: str):
             exit()
         elif __dmode == "##2":
             print("テンプレート２")
-            show_templatex(ps, ps._Parse__D_option)
+            show_templatex(ps, ps.OPT_)
             exit()
         elif __dmode == "##e":
             print("エラーメッセージ一覧")
@@ -126,7 +144,11 @@ def show_debug(ps: cl.Parse, __dmode: str):
             else:
                 print("解析エラーなし")
             print()
-        if __dmode in ["#", "#1", "#2"]:
+        if __dmode == "#t":
+            print("解析の統計")
+            show_stats(ps)
+            print()
+        if __dmode in ["#", "#1", "#2", "#t"]:
             input('Hit any key for start program:')
             print("-------- START PROGRAM --------")
             return
@@ -140,5 +162,6 @@ def show_debug(ps: cl.Parse, __dmode: str):
     print('---#  :入力引数一覧、解析結果を表示して続行')
     print('---#1 :入力引数一覧を表示して続行')
     print('---#2 :解析結果を表示して続行')
+    print('---#t :解析の統計（段階ごとの時間など）を表示して続行')
     print()
     exit()
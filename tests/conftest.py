@@ -0,0 +1,7 @@
+""" テスト共通（リポジトリのルートから lib.cl_parse を import できるようにする） """
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
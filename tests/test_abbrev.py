@@ -0,0 +1,41 @@
+""" ロング名オプションの省略形 """
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("all", "-a, --all"), ("alpha", "--alpha"), ("brief", "--brief"),
+           ("number", "--number", "", int), ("num", "--num")]
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+@pytest.mark.parametrize("arg, name", [
+    ("--all", "all"), ("--alp", "alpha"), ("--b", "brief"), ("--brief", "brief"),
+    ("--numb=3", "number"), ("--number=3", "number"),
+])
+def test_unique_prefix(arg, name, codegen):
+    ps = cl.ParserSpec(OPTIONS).parse([arg], codegen=codegen)
+    assert not ps.is_error
+    assert [n for n, o in ps.OPT_.items() if o.isEnable] == [name]
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+@pytest.mark.parametrize("arg", ["--al", "--a", "--nu", "--num", "--c", "--allx"])
+def test_ambiguous_or_unknown(arg, codegen):
+    """ 他のオプションの頭と同じ完全な名前（--num）も、一意ではない """
+    ps = cl.ParserSpec(OPTIONS).parse([arg], codegen=codegen, emessage_header="")
+    assert ps.is_error and ps.get_errormessage() == f"E14: illegal option {arg}"
+
+
+def test_index_same_as_scan():
+    """ 索引を作る前（順に調べる）と、作った後で同じ結果になること """
+    args = ["--al", "--a", "--alp", "--b", "--nu", "--num", "--numb=1", "--c", "--all-", "--brief-"]
+    spec = cl.ParserSpec(OPTIONS)
+    before = [spec.parse([arg], cancelable=True, emessage_header="").get_errormessage()
+              for arg in args]
+    assert spec._l_abbrev is None
+    for _ in range(cl._ABBREV_AFTER):
+        spec.parse(["--all"])
+    assert spec._l_abbrev is not None
+    after = [spec.parse([arg], cancelable=True, emessage_header="").get_errormessage()
+             for arg in args]
+    assert before == after
@@ -0,0 +1,61 @@
+""" ブレース展開（brace、iter_braces、count_braces） """
+import itertools
+
+import pytest
+
+from lib import cl_parse as cl
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("a{b,c}d", ["abd", "acd"]),
+    ("{a,b{1,2}}", ["a", "b1", "b2"]),
+    ("x{1..3}", ["x1", "x2", "x3"]),
+    ("{3..1}", ["3", "2", "1"]),
+    ("{001..7..3}", ["001", "004", "007"]),
+    ("{a..e..2}", ["a", "c", "e"]),
+    ("{a,b}{1,2}", ["a1", "a2", "b1", "b2"]),
+    ("{a}", ["{a}"]),
+    ("{}", ["{}"]),
+    ("plain", ["plain"]),
+    ("{a,b", ["{a,b"]),
+])
+def test_iter_braces(text, expected):
+    assert list(cl.iter_braces(text)) == expected
+    if expected != [text]:
+        assert cl.count_braces(text) == len(expected)
+
+
+def test_count_without_expanding():
+    text = "{1..1000}{1..1000}{1..1000}"
+    assert cl.count_braces(text) == 10 ** 9
+    assert list(itertools.islice(cl.iter_braces(text), 3)) == ["111", "112", "113"]
+
+
+def test_parse_brace():
+    ps = cl.Parse(["-a", "f{1..3}.txt", "\\{x,y}", " {p,q}", "{r,s}"], [("a", "-a")],
+                  brace=True, winexpand=False)
+    assert list(ps.params) == ["f1.txt", "f2.txt", "f3.txt", "{x,y}", "{p,q}", "r", "s"]
+    ps = cl.Parse(["{r,s}"], [("a", "-a")], winexpand=False)
+    assert list(ps.params) == ["{r,s}"]             # 省略時は展開しない
+
+
+def test_lazy_and_limit():
+    ps = cl.Parse(["{1..1000000000}"], [], brace=True, lazy_expand=True, winexpand=False)
+    assert not ps.is_error
+    assert list(itertools.islice(ps.params, 3)) == ["1", "2", "3"]
+    ps = cl.Parse(["{1..3}", "{a..c}"], [], brace=True, max_matches=5, winexpand=False,
+                  emessage_header="")
+    assert ps.is_error and ps.get_errormessage() == "E41: too many expansions at {a..c}"
+    ps = cl.Parse(["{1..3}", "{a..c}"], [], brace=True, max_matches=5, lazy_expand=True,
+                  winexpand=False)
+    with pytest.raises(cl.WildcardLimitError):
+        list(ps.params)
+    assert ps.is_error
+
+
+def test_brace_then_wildcard(tmp_path):
+    for name in ("a1.txt", "a2.txt", "b1.log"):
+        (tmp_path / name).write_text("")
+    ps = cl.Parse([f"{tmp_path}/{{a,b}}*"], [], brace=True, wildcard=True)
+    names = [p.rsplit("/", 1)[-1] for p in ps.params]     # ブレースの順。同じ中は一覧の順
+    assert sorted(names[:2]) == ["a1.txt", "a2.txt"] and names[2:] == ["b1.log"]
@@ -0,0 +1,47 @@
+""" 専用の解析ループ（codegen）が、通常の解析と同じ結果になること """
+import itertools
+import random
+
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a, --all"), ("b", "-b, --brief"), ("n", "-n, --number", "", int),
+           ("t", "-t, --tag", "", [str, "APPEND"]), ("v", "-v, --verbose", "", "COUNT"),
+           ("o", "-o, --output", "", [str, "OPTIONAL"]), ("alpha", "--alpha")]
+TOKENS = ["-a", "-b", "-ab", "-a-", "-n", "-n3", "3", "x", "--all", "--al", "--a", "--number=4",
+          "--number", "--tag=q", "-t", "-vv", "-v", "--output", "--output=f", "-o", "--", "-",
+          "-z", "--zz", "--all=1", "-bn", "-nx", "--verbose"]
+
+
+def summary(ps):
+    if ps.is_error:         # 遅延変換モードでは、変換エラーのオプション引数は参照できない
+        return True, ps.get_errormessage(1)
+    return (False, "", [(name, o.isEnable, o.value) for name, o in ps.OPT_.items()],
+            list(ps.params), list(ps.remain))
+
+
+def corpus(n=400, seed=12):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield [rng.choice(TOKENS) for _ in range(rng.randint(0, 7))]
+
+
+@pytest.mark.parametrize("smode, cancelable, lazy", list(itertools.product(
+    cl.Smode, [False, True], [False, True])))
+def test_same_as_interpreted(smode, cancelable, lazy):
+    spec = cl.ParserSpec(OPTIONS, [["a", "b"]])
+    for args in corpus():
+        kwargs = dict(smode=smode, cancelable=cancelable, lazy=lazy, emessage_header="")
+        expected = spec.parse(args, **kwargs)
+        generated = spec.parse(args, codegen=True, **kwargs)
+        if lazy:
+            assert expected.validate() == generated.validate(), args
+        assert summary(generated) == summary(expected), args
+
+
+def test_generated_once_per_condition():
+    spec = cl.ParserSpec(OPTIONS)
+    first = spec.parse(["-a"], codegen=True)
+    second = spec.parse(["-b"], codegen=True)
+    assert first.OPT_a.isEnable and second.OPT_b.isEnable and not second.OPT_a.isEnable
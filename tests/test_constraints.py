@@ -0,0 +1,72 @@
+""" 制約（exclusive、requires、implies、at_least_one）。E31、E32、E33 """
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a"), ("b", "-b, --brief"), ("c", "-c"), ("out", "-o, --out", "", str),
+           ("fmt", "-f", "", str), ("user", "-u", "", str), ("host", "-H", "", str),
+           ("port", "-p", "", int), ("x", "-x"), ("y", "-y"), ("z", "-z")]
+CONSTRAINTS = dict(exclusive=[["a", "b"], ["b", "c"]],
+                   requires=[("out", "fmt"), ("user", ["host", "port"])],
+                   implies=[("x", "y"), ("y", "z")],
+                   at_least_one=[["a", "b", "c", "x"]])
+
+
+@pytest.fixture(params=["parse", "spec", "events"])
+def check(request):
+    """ args -> (エラー番号, メッセージ)。Parse()、ParserSpec、iter_events で同じになること """
+    def parse(args):
+        if request.param == "parse":
+            ps = cl.Parse(args, OPTIONS, emessage_header="", **CONSTRAINTS)
+        else:
+            spec = cl.ParserSpec(OPTIONS, **CONSTRAINTS)
+            if request.param == "events":
+                last = list(spec.iter_events(args))[-1:]
+                if last and last[0].kind is cl.Ev.ERROR:
+                    return last[0].name, last[0].value
+                return "N00", ""
+            ps = spec.parse(args, emessage_header="")
+        return (ps.get_errormessage()[:3], ps.get_errormessage()) if ps.is_error else ("N00", "")
+    return parse
+
+
+@pytest.mark.parametrize("args, eno, message", [
+    (["-a"], "N00", ""),
+    (["-a", "-b"], "E31", "E31: option (-a) and (-b, --brief) cannot be specified together"),
+    (["-c", "-b"], "E31", "E31: option (-b, --brief) and (-c) cannot be specified together"),
+    (["-a", "-c"], "N00", ""),
+    (["-a", "-o", "f"], "E32", "E32: option (-o, --out) requires option (-f)"),
+    (["-a", "-o", "f", "-f", "g"], "N00", ""),
+    (["-a", "-u", "me", "-H", "h"], "E32", "E32: option (-u) requires option (-p)"),
+    (["-a", "-u", "me", "-H", "h", "-p", "1"], "N00", ""),
+    ([], "E33", "E33: one of the options (-a | -b, --brief | -c | -x) must be specified"),
+    (["-x"], "N00", ""),
+])
+def test_constraints(check, args, eno, message):
+    got_eno, got_message = check(args)
+    assert got_eno == eno
+    if message:
+        assert got_message == message
+
+
+def test_implies():
+    ps = cl.Parse(["-x"], OPTIONS, **CONSTRAINTS)
+    assert not ps.is_error
+    assert ps.OPT_y.isEnable and ps.OPT_z.isEnable and ps.OPT_y.value is None
+    events = list(cl.ParserSpec(OPTIONS, **CONSTRAINTS).iter_events(["-x"]))
+    assert [ev.name for ev in events if ev.kind is cl.Ev.OPTION] == ["x", "y", "z"]
+
+
+def test_implied_option_is_checked():
+    ps = cl.Parse(["-x", "-a"], OPTIONS, [["a", "z"]], implies=[("x", "z")], emessage_header="")
+    assert ps.is_error and ps.get_errormessage().startswith("E31:")
+
+
+def test_cancel_before_check():
+    ps = cl.Parse(["-a", "-b", "-b-"], OPTIONS, cancelable=True, **CONSTRAINTS)
+    assert not ps.is_error
+
+
+def test_unknown_option_name():
+    with pytest.raises(AssertionError):
+        cl.ParserSpec(OPTIONS, requires=[("out", "nosuch")])
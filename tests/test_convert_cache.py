@@ -0,0 +1,109 @@
+""" 変換結果のキャッシュ（ConvertCache） """
+import datetime
+import enum
+
+import pytest
+
+from lib import cl_parse as cl
+
+calls = []
+
+
+def traced(s):
+    calls.append(s)
+    return int(s)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def test_hits_and_misses():
+    cache = cl.ConvertCache()
+    spec = cl.ParserSpec([("n", "-n", "", traced)])
+    for arg in ["1", "2", "1", "1"]:
+        assert spec.parse(["-n", arg], convert_cache=cache).OPT_n.value == int(arg)
+    assert calls == ["1", "2"]
+    assert (cache.hits, cache.misses, cache.skips, len(cache)) == (2, 2, 0, 2)
+
+
+def test_lru_eviction():
+    cache = cl.ConvertCache(maxsize=2)
+    for arg in ["a", "b", "a", "c"]:        # b が一番使われていない
+        cache.convert(str.upper, arg)
+    assert len(cache) == 2
+    cache.convert(str.upper, "a")
+    cache.convert(str.upper, "c")
+    assert cache.hits == 3
+    cache.convert(str.upper, "b")
+    assert cache.misses == 4
+
+
+def test_exclude_and_clear():
+    cache = cl.ConvertCache(exclude=[str.lower])
+    cache.convert(str.lower, "A")
+    assert len(cache) == 0 and cache.hits == cache.misses == 0
+    cache.convert(traced, "5")
+    cache.exclude(traced)                   # 覚えていたものも捨てる
+    assert len(cache) == 0
+    cache.convert(traced, "5")
+    assert calls == ["5", "5"]
+    cache.convert(str.upper, "x")
+    cache.convert(str.upper, "x")
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses, cache.skips) == (0, 0, 0, 0)
+
+
+def test_errors_are_cached():
+    cache = cl.ConvertCache()
+    spec = cl.ParserSpec([("n", "--num", "", traced)])
+    for _ in range(2):
+        ps = spec.parse(["--num=x"], convert_cache=cache, emessage_header="")
+        assert ps.is_error and ps.get_errormessage().startswith("E12:")
+    assert calls == ["x"] and cache.hits == 1
+
+
+class HashableList(list):
+    __hash__ = object.__hash__
+
+
+class Box:
+    def __init__(self, s):
+        self.items = [s]
+
+
+class Color(enum.Enum):
+    RED = 1
+
+
+@pytest.mark.parametrize("afunc", [lambda s: s.split(","), HashableList, Box,
+                                   lambda s: (1, [s]), lambda s: {s}])
+def test_mutable_results_are_not_shared(afunc):
+    cache = cl.ConvertCache()
+    spec = cl.ParserSpec([("v", "-v", "", afunc)])
+    first = spec.parse(["-v", "a"], convert_cache=cache).OPT_v.value
+    second = spec.parse(["-v", "a"], convert_cache=cache).OPT_v.value
+    assert first is not second
+    assert (cache.hits, cache.misses, cache.skips, len(cache)) == (0, 0, 2, 0)
+
+
+@pytest.mark.parametrize("afunc, arg", [
+    (int, "3"), (float, "1.5"), (Color.__getitem__, "RED"), (lambda s: (s, 1, (2.0, )), "t"),
+    (lambda s: datetime.date.fromisoformat(s), "2024-01-02"), (frozenset, "ab"),
+])
+def test_immutable_results_are_shared(afunc, arg):
+    cache = cl.ConvertCache()
+    first = cache.convert(afunc, arg)
+    assert cache.convert(afunc, arg) is first and cache.hits == 1
+
+
+def test_unhashable_converter():
+    cache = cl.ConvertCache()
+
+    class Conv:
+        __hash__ = None
+
+        def __call__(self, s):
+            return s * 2
+    assert cache.convert(Conv(), "a") == "aa" and len(cache) == 0
@@ -0,0 +1,54 @@
+""" デバッグ用モジュール（---##、---# の表示） """
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [
+    ["help", "-h, --help", "使い方を表示する"],
+    ["all", "-a, --all", "すべて出力"],
+    ["size", "-s, --size", "サイズ//<数>", int],
+]
+
+pytestmark = pytest.mark.skipif(not cl.exist_debugmodule, reason="cl_parse_debugmodule が無い")
+
+
+def debug_output(capsys, mode):
+    with pytest.raises(SystemExit):
+        cl.Parse(["x", "---" + mode], OPTIONS, debug=True)
+    return capsys.readouterr().out
+
+
+def test_template_by_attr(capsys):
+    out = debug_output(capsys, "##1")
+    assert "if ps.OPT_all.isEnable:" in out
+    assert "    value = ps.OPT_size.value" in out
+
+
+def test_template_by_name(capsys):
+    out = debug_output(capsys, "##2")
+    assert 'if ps.OPT_["all"].isEnable:' in out
+    assert '    value = ps.OPT_["size"].value' in out
+    assert 'if ps.OPT_["help"].isEnable:' in out
+
+
+def test_definition_list(capsys):
+    out = debug_output(capsys, "##")
+    assert "OPT_size" in out and "l_options = ('size',)" in out
+
+
+def test_stats_mode_continues(capsys, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda *args: "")
+    ps = cl.Parse(["x", "---#t"], OPTIONS, debug=True)
+    assert ps.stats is not None and ps.stats.tokens == 1
+    assert "解析の統計" in capsys.readouterr().out
+
+
+def test_input_list_shows_expanded_args(capsys, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("builtins.input", lambda *args: "")
+    (tmp_path / "args.txt").write_text("-a -s 3 y", encoding="utf-8")
+    ps = cl.Parse(["x", "@args.txt", "---#1"], OPTIONS, debug=True, file_expand=True)
+    assert ps.OPT_size.value == 3
+    out = capsys.readouterr().out
+    assert "arg[1]: -a\narg[2]: -s\narg[3]: 3\narg[4]: y\n" in out
+    assert "@args.txt" not in out
@@ -0,0 +1,83 @@
+""" ファイル展開のキャッシュ（FileCache） """
+import os
+
+from lib import cl_parse as cl
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return f"@{path}"
+
+
+def expand(args, cache):
+    return cl.file_expand(args, encoding="utf-8", cache=cache)
+
+
+def test_hit_across_instances(tmp_path):
+    item = write(tmp_path / "a.txt", '-a "x y" z\n' * 100)
+    first = cl.FileCache(tmp_path / "cache", min_filesize=0)
+    expected = expand([item], None)
+    assert expand([item], first) == expected and (first.hits, first.misses) == (0, 1)
+    second = cl.FileCache(tmp_path / "cache", min_filesize=0)      # 別のプロセスの代わり
+    assert expand([item], second) == expected and (second.hits, second.misses) == (1, 0)
+
+
+def test_invalidated_when_file_changes(tmp_path):
+    path = tmp_path / "a.txt"
+    item = write(path, "one two")
+    cache = cl.FileCache(tmp_path / "cache", min_filesize=0)
+    assert expand([item], cache) == ["one", "two"]
+    write(path, "one two three")
+    assert expand([item], cache) == ["one", "two", "three"]
+    assert cache.hits == 0 and cache.misses == 2
+    st = path.stat()
+    write(path, "four five six")                # 同じサイズ、違う更新時刻
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert expand([item], cache) == ["four", "five", "six"]
+
+
+def test_includes_are_expanded_each_time(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write(tmp_path / "inner.txt", "i1")
+    item = write(tmp_path / "outer.txt", "o1 @inner.txt o2")
+    cache = cl.FileCache(tmp_path / "cache", min_filesize=0)
+    assert expand([item], cache) == ["o1", "i1", "o2"]
+    write(tmp_path / "inner.txt", "i2 i3")
+    assert expand([item], cache) == ["o1", "i2", "i3", "o2"]
+    assert cache.hits == 1
+
+
+def test_small_files_not_cached(tmp_path):
+    item = write(tmp_path / "a.txt", "x")
+    cache = cl.FileCache(tmp_path / "cache")
+    expand([item], cache)
+    expand([item], cache)
+    assert cache.hits == 0 and not (tmp_path / "cache").exists()
+
+
+def test_partial_read_not_cached(tmp_path):
+    item = write(tmp_path / "a.txt", "x " * 1000)
+    cache = cl.FileCache(tmp_path / "cache", min_filesize=0)
+    blocks = cl._iter_file_expand([item], "utf-8", cache)
+    next(blocks)
+    blocks.close()
+    assert expand([item], cache) == ["x"] * 1000 and cache.hits == 0
+
+
+def test_eviction(tmp_path):
+    cache = cl.FileCache(tmp_path / "cache", maxsize=3000, min_filesize=0)
+    for i in range(5):
+        expand([write(tmp_path / f"{i}.txt", f"w{i} " * 300)], cache)
+    assert cache.evictions > 0
+    assert sum(p.stat().st_size for p in (tmp_path / "cache").iterdir()) <= 3000
+
+
+def test_default_directory_and_parse(tmp_path, monkeypatch):
+    monkeypatch.setenv("CL_PARSE_CACHE_DIR", str(tmp_path / "env"))
+    cache = cl.FileCache(min_filesize=0)
+    assert cache.directory == tmp_path / "env"
+    item = write(tmp_path / "a.txt", "-a p")
+    for _ in range(2):
+        ps = cl.Parse([item], [("a", "-a")], file_expand=True, file_cache=cache)
+        assert ps.OPT_a.isEnable and list(ps.params) == ["p"]
+    assert (cache.hits, cache.misses) == (1, 1)
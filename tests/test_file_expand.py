@@ -0,0 +1,84 @@
+""" ファイル展開（@<ファイル名>）。引用符、NUL区切り、インクルード、E01、E02、E03 """
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a"), ("n", "-n", "", int)]
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def parse(args):
+    return cl.Parse(args, OPTIONS, file_expand=True, file_cache=False, emessage_header="")
+
+
+def test_blocks_and_quoting(workdir):
+    (workdir / "args.txt").write_text('-a\n  -n 3\t"x y" \'p "q"\'\n\n@"at"  z', encoding="utf-8")
+    assert cl.file_expand(["b", "@args.txt", "c"], encoding="utf-8") == \
+        ["b", "-a", "-n", "3", "x y", 'p "q"', "@at", "z", "c"]
+    ps = parse(["@args.txt"])
+    assert ps.OPT_a.isEnable and ps.OPT_n.value == 3
+    assert list(ps.params) == ["x y", 'p "q"', "@at", "z"]
+
+
+def test_bom_and_empty_file(workdir):
+    (workdir / "bom.txt").write_bytes(b"\xef\xbb\xbf-a x")
+    (workdir / "empty.txt").write_bytes(b"")
+    assert cl.file_expand(["@bom.txt", "@empty.txt"], encoding="utf-8") == ["-a", "x"]
+
+
+def test_nul_separated(workdir):
+    (workdir / "list0").write_bytes(b"a b\0'q'\0@inc\0last")
+    assert cl.file_expand(["@list0"], encoding="utf-8") == ["a b", "'q'", "@inc", "last"]
+
+
+def test_includes(workdir):
+    (workdir / "inner.txt").write_text("-n 5 inner", encoding="utf-8")
+    (workdir / "outer.txt").write_text("-a @inner.txt outer", encoding="utf-8")
+    assert cl.file_expand(["@outer.txt", "@inner.txt"], encoding="utf-8") == \
+        ["-a", "-n", "5", "inner", "outer", "-n", "5", "inner"]
+
+
+def test_file_not_found():
+    ps = parse(["-a", "@nosuch.txt"])
+    assert ps.is_error and ps.get_errormessage() == "E01: FileNotFoundError at @nosuch.txt"
+
+
+def test_cannot_read(workdir):
+    (workdir / "dir").mkdir()
+    ps = parse(["-a", "@dir"])
+    assert ps.is_error and ps.get_errormessage() == "E03: cannot read file @dir"
+    (workdir / "outer.txt").write_text("x @dir", encoding="utf-8")
+    assert parse(["@outer.txt"]).get_errormessage() == "E03: cannot read file @dir"
+    with pytest.raises(OSError) as e:
+        cl.file_expand(["@dir"], encoding="utf-8")
+    assert not isinstance(e.value, FileNotFoundError) and e.value.filename == "@dir"
+    events = list(cl.ParserSpec(OPTIONS).iter_events(["@dir"], file_expand=True))
+    assert events[-1].kind is cl.Ev.ERROR and events[-1].name == "E03"
+
+
+def test_cannot_decode(workdir):
+    (workdir / "latin1.txt").write_bytes(b"-a \xff")
+    ps = cl.Parse(["@latin1.txt"], OPTIONS, file_expand=True, file_cache=False,
+                  emessage_header="")
+    assert ps.is_error and ps.get_errormessage().startswith("E03:")
+
+
+def test_recursive_include(workdir):
+    (workdir / "one.txt").write_text("x @two.txt", encoding="utf-8")
+    (workdir / "two.txt").write_text("y @one.txt", encoding="utf-8")
+    ps = parse(["@one.txt"])
+    assert ps.is_error and ps.get_errormessage() == "E02: recursive file expansion at @one.txt"
+    (workdir / "self.txt").write_text("@self.txt", encoding="utf-8")
+    assert parse(["@self.txt"]).get_errormessage().startswith("E02:")
+
+
+def test_streamed(workdir):
+    (workdir / "big.txt").write_text("p\n" * 100_000, encoding="utf-8")
+    blocks = cl._iter_file_expand(["@big.txt"], "utf-8")
+    assert next(blocks) == "p"
+    assert sum(1 for _ in blocks) == 99_999
@@ -0,0 +1,42 @@
+""" import 時に、遅延 import しているモジュールを読み込まないこと """
+import json
+import pathlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "bench"))
+import bench_import     # noqa: E402
+
+
+def test_deferred_modules_not_loaded():
+    times = bench_import.import_times()
+    assert "lib.cl_parse" in times
+    assert bench_import.deferred_loaded(times) == []
+
+
+@pytest.mark.parametrize("code, name", [
+    ("cl.ParserSpec([('a', '-a')]).parse(['-a', 'x'])", "cl_parse_codegen"),
+    ("cl.Parse(['-a', 'x'], [('a', '-a')], smode=cl.Smode.OPTFIRST).params", "cl_parse_debugmodule"),
+])
+def test_parse_does_not_load_deferred(code, name):
+    times = bench_import.import_times(
+        f"import sys; sys.path.insert(0, {str(bench_import.ROOT)!r}); "
+        f"from lib import cl_parse as cl; {code}")
+    assert name not in times
+
+
+def test_import_time_against_baseline():
+    """ 実際の import 時間（argparse との比）を、記録した基準（bench/import_baseline.json）と比べる。
+        （測定のばらつきが ±15% ほどあるので、ここでは +50% を超えたら失敗とする）
+    """
+    base = json.loads((bench_import.ROOT / "bench" / "import_baseline.json").read_text())
+    result, times = bench_import.measure(repeat=5)
+    assert bench_import.deferred_loaded(times) == []
+    assert bench_import.compare(result, base, threshold=0.5), result
+
+
+def test_compare_with_baseline():
+    base = {"cl_parse_ms": 10.0, "argparse_ms": 5.0, "ratio": 2.0}
+    assert bench_import.compare({"cl_parse_ms": 22.0, "argparse_ms": 10.0, "ratio": 2.2}, base, 0.2)
+    assert not bench_import.compare({"cl_parse_ms": 13.0, "argparse_ms": 5.0, "ratio": 2.6}, base, 0.2)
@@ -0,0 +1,69 @@
+""" 逐次解析（iter_events、read_args） """
+import io
+
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a, --all"), ("n", "-n, --num", "", int), ("t", "-t", "", [int, "APPEND"]),
+           ("v", "-v", "", "COUNT"), ("b", "-b")]
+E = cl.Event
+Ev = cl.Ev
+
+
+def kinds(events):
+    return [(ev.kind, ev.name, ev.value) for ev in events]
+
+
+def test_events_in_order():
+    spec = cl.ParserSpec(OPTIONS)
+    events = list(spec.iter_events(["x", "-an", "1", "-t", "2", "-t3", "-vv", "y"]))
+    assert [ev.kind for ev in events] == [
+        Ev.PARAM, Ev.OPTION, Ev.OPTION, Ev.VALUE, Ev.OPTION, Ev.VALUE, Ev.OPTION, Ev.VALUE,
+        Ev.OPTION, Ev.COUNT, Ev.OPTION, Ev.COUNT, Ev.PARAM]
+    assert [ev.value for ev in events if ev.kind is Ev.VALUE] == [1, 2, 3]
+    assert [ev.value for ev in events if ev.kind is Ev.PARAM] == ["x", "y"]
+
+
+def test_stream_is_consumed_lazily():
+    spec = cl.ParserSpec(OPTIONS)
+    pulled = []
+
+    def source():
+        for i in range(1_000_000):
+            pulled.append(i)
+            yield f"p{i}"
+    events = spec.iter_events(source())
+    for _ in range(3):
+        next(events)
+    assert len(pulled) < 10
+
+
+@pytest.mark.parametrize("args, eno", [
+    (["--num=x", "after"], "E12"), (["-n", "x", "after"], "E22"), (["-z", "after"], "E23"),
+    (["--zz", "after"], "E14"), (["--num"], "E11"), (["-a", "-b"], "E31"),
+])
+def test_error_ends_stream(args, eno):
+    spec = cl.ParserSpec(OPTIONS, [["a", "b"]])
+    events = list(spec.iter_events(args))
+    assert events[-1].kind is Ev.ERROR and events[-1].name == eno
+    assert "after" not in [ev.value for ev in events]
+    ps = spec.parse(args, emessage_header="")
+    assert events[-1].value == ps.get_errormessage(1)
+
+
+def test_segments():
+    spec = cl.ParserSpec(OPTIONS, [["a", "b"]])
+    events = list(spec.iter_events(["-a", "x", "-b", "y"], smode=cl.Smode.ONEPAIR))
+    assert Ev.SEGMENT in [ev.kind for ev in events]
+    assert events[-1].kind is not Ev.ERROR      # 排他チェックは区切りごと
+
+
+def test_read_args():
+    text = "-a\0x y\0-n\0" + "7\0" + "z" * 100_000
+    args = list(cl.read_args(io.StringIO(text), sep="\0", bufsize=16))
+    assert args == ["-a", "x y", "-n", "7", "z" * 100_000]
+    spec = cl.ParserSpec(OPTIONS)
+    params = [ev.value for ev in spec.iter_events(cl.read_args(io.StringIO(text), bufsize=16))
+              if ev.kind is Ev.PARAM]
+    assert params == ["x y", "z" * 100_000]
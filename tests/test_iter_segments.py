@@ -0,0 +1,80 @@
+""" 区切りごとの解析（iter_segments） """
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a"), ("b", "-b"), ("n", "-n", "", int)]
+
+
+def summary(segments, remain=True):
+    """ 区切りごとの (コマンド引数, 残り, -a, -n, エラー)。remain=False なら残りは比べない """
+    return [(list(ps.params), ps.remain if remain else None, ps.OPT_a.isEnable, ps.OPT_n.value,
+             ps.is_error) for ps in segments]
+
+
+def reparse(args, smode):
+    """ 比較用：ps.remain を新しい Parse で解析し直す """
+    out = []
+    while True:
+        ps = cl.Parse(args, OPTIONS, smode=smode)
+        out.append(ps)
+        if ps.is_error or not ps.remain or ps.remain == args:
+            return out
+        args = ps.remain
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+@pytest.mark.parametrize("smode", [cl.Smode.ONEPAIR, cl.Smode.OPTFIRST, cl.Smode.ARGFIRST])
+@pytest.mark.parametrize("args", [
+    ["-a", "x", "-b", "y", "-n", "3", "z"],
+    ["x", "-a", "y", "-n", "2"],
+    ["-a", "x", "--"],
+    ["--"],
+    ["-a", "x", "-n", "bad"],
+])
+def test_same_as_reparse(args, smode, codegen):
+    spec = cl.ParserSpec(OPTIONS)
+    assert summary(spec.iter_segments(args, smode=smode, codegen=codegen), False) == \
+        summary(reparse(args, smode), False)
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_carry_trailing_double_hyphen_terminates(codegen):
+    spec = cl.ParserSpec(OPTIONS)
+    segments = list(spec.iter_segments(["-a", "x", "--"], carry=True,
+                                       smode=cl.Smode.ONEPAIR, codegen=codegen))
+    assert summary(segments) == [(["x"], [], True, None, False), ([], ["--"], True, None, False)]
+
+
+def test_carry_inherits_and_overrides():
+    spec = cl.ParserSpec(OPTIONS)
+    segments = list(spec.iter_segments(["-a", "-n", "1", "x", "-n", "2", "y", "-b", "z"],
+                                       carry=True, smode=cl.Smode.ONEPAIR))
+    assert [(ps.OPT_a.isEnable, ps.OPT_b.isEnable, ps.OPT_n.value, list(ps.params))
+            for ps in segments] == [(True, False, 1, ["x"]), (True, False, 2, ["y"]),
+                                    (True, True, 2, ["z"])]
+
+
+def test_reset_without_carry():
+    spec = cl.ParserSpec(OPTIONS)
+    segments = list(spec.iter_segments(["-a", "x", "-b", "y"], smode=cl.Smode.ONEPAIR))
+    assert [(ps.OPT_a.isEnable, ps.OPT_b.isEnable) for ps in segments] == \
+        [(True, False), (False, True)]
+
+
+def test_iterator_input_and_static_entry():
+    segments = list(cl.Parse.iter_segments(iter(["-a", "x", "-b", "y"]), OPTIONS,
+                                           smode=cl.Smode.ONEPAIR))
+    assert [list(ps.params) for ps in segments] == [["x"], ["y"]]
+
+
+@pytest.mark.parametrize("args, tokens", [
+    (["-n", "1", "a", "-n", "2", "b"], [3, 3]),
+    (["-a", "x", "--"], [2, 1]),
+    (["-n", "1", "a", "b"], [4]),
+])
+@pytest.mark.parametrize("carry", [False, True])
+def test_stats_tokens_per_segment(args, tokens, carry):
+    spec = cl.ParserSpec(OPTIONS)
+    segments = list(spec.iter_segments(args, carry=carry, smode=cl.Smode.ONEPAIR, stats=True))
+    assert [ps.stats.tokens for ps in segments] == tokens
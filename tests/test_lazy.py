@@ -0,0 +1,64 @@
+""" 遅延変換モード（lazy） """
+import pytest
+
+from lib import cl_parse as cl
+
+calls = []
+
+
+def traced(s):
+    calls.append(s)
+    return int(s)
+
+
+OPTIONS = [("a", "-a"), ("n", "-n, --num", "", traced), ("t", "-t", "", [traced, "APPEND"]),
+           ("s", "-s")]
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def test_converted_on_first_access():
+    ps = cl.Parse(["-n", "3", "-t", "1", "-t", "2", "x"], OPTIONS, lazy=True)
+    assert not ps.is_error and calls == []
+    assert ps.OPT_n.value == 3 and calls == ["3"]
+    assert ps.OPT_n.value == 3 and calls == ["3"]        # 変換結果を覚えている
+    assert ps.OPT_t.value == [1, 2] and calls == ["3", "1", "2"]
+    assert ps.OPT_["t"].value == [1, 2]
+
+
+def test_unused_option_not_converted():
+    ps = cl.Parse(["-n", "3", "-t", "bad"], OPTIONS, lazy=True)
+    assert ps.OPT_n.value == 3 and calls == ["3"]
+    assert not ps.is_error
+
+
+def test_error_on_access():
+    ps = cl.Parse(["--num=x"], OPTIONS, lazy=True, emessage_header="")
+    with pytest.raises(ValueError) as e:
+        ps.OPT_n.value
+    assert str(e.value) == cl.Parse(["--num=x"], OPTIONS, emessage_header="").get_errormessage(1)
+
+
+@pytest.mark.parametrize("args, eno", [(["--num=x"], "E12"), (["-t", "1", "-t", "x"], "E22")])
+def test_validate(args, eno):
+    ps = cl.Parse(args, OPTIONS, lazy=True, emessage_header="")
+    assert not ps.is_error
+    assert not ps.validate()
+    assert ps.is_error and ps.get_errormessage().startswith(eno + ":")
+    eager = cl.Parse(args, OPTIONS, emessage_header="")
+    assert ps.get_errormessage(1) == eager.get_errormessage(1)
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_same_as_eager(codegen):
+    args = ["-a", "-n", "5", "-t", "1", "-t", "2", "p", "q"]
+    lazy = cl.ParserSpec(OPTIONS).parse(args, lazy=True, codegen=codegen)
+    assert lazy.validate()
+    eager = cl.Parse(args, OPTIONS)
+    for name in ("a", "n", "t", "s"):
+        assert (lazy.OPT_[name].isEnable, lazy.OPT_[name].value) == \
+            (eager.OPT_[name].isEnable, eager.OPT_[name].value)
+    assert list(lazy.params) == list(eager.params)
@@ -0,0 +1,49 @@
+""" ワイルドカードの遅延展開（lazy_expand）と、展開数の上限（max_matches、E41） """
+import itertools
+
+import pytest
+
+from lib import cl_parse as cl
+
+
+@pytest.fixture
+def many(tmp_path, monkeypatch):
+    for i in range(50):
+        (tmp_path / f"f{i:02}.txt").write_text("")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_lazy_params(many):
+    ps = cl.Parse(["x", "*.txt", "y"], [], wildcard=True, lazy_expand=True)
+    assert isinstance(ps.params, cl.LazyParams)
+    assert list(itertools.islice(ps.params, 2))[0] == "x"
+    assert len(ps.params) == 52
+    assert ps.params[-1] == "y" and list(ps.params) == list(ps.params)   # 何度でも参照できる
+    eager = cl.Parse(["x", "*.txt", "y"], [], wildcard=True)
+    assert sorted(ps.params) == sorted(eager.params)
+
+
+def test_limit(many):
+    ps = cl.Parse(["*.txt"], [], wildcard=True, max_matches=10, emessage_header="")
+    assert ps.is_error and ps.get_errormessage() == "E41: too many expansions at *.txt"
+    assert not cl.Parse(["*.txt"], [], wildcard=True, max_matches=50).is_error
+
+
+def test_limit_lazy(many):
+    ps = cl.Parse(["*.txt"], [], wildcard=True, max_matches=10, lazy_expand=True,
+                  emessage_header="")
+    assert not ps.is_error
+    assert len(list(itertools.islice(ps.params, 10))) == 10
+    with pytest.raises(cl.WildcardLimitError):
+        list(ps.params)
+    with pytest.raises(cl.WildcardLimitError):          # 以降も同じ
+        ps.params[20]
+    assert ps.is_error and ps.get_errormessage().startswith("E41:")
+
+
+def test_iter_wildcards_limit(many):
+    it = cl.iter_wildcards(["*.txt"], max_matches=3)
+    assert len([next(it) for _ in range(3)]) == 3
+    with pytest.raises(cl.WildcardLimitError):
+        next(it)
@@ -0,0 +1,34 @@
+""" OPT_["option"]、OPT_xxx（解析結果のビュー Opset） """
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a"), ("n", "-n", "", int), ("t", "-t", "", [int, "APPEND"])]
+
+
+def test_same_object():
+    ps = cl.Parse(["-a", "-n", "3"], OPTIONS)
+    assert ps.OPT_a is ps.OPT_a
+    assert ps.OPT_n is ps.OPT_["n"] is ps.OPT_["n"]
+    assert ps.OPT_a is not ps.OPT_n
+    assert dict(ps.OPT_.items())["t"] is ps.OPT_t
+
+
+def test_per_parse():
+    spec = cl.ParserSpec(OPTIONS)
+    ps1, ps2 = spec.parse(["-n", "1"]), spec.parse(["-n", "2"])
+    assert ps1.OPT_n is not ps2.OPT_n
+    assert (ps1.OPT_n.value, ps2.OPT_n.value) == (1, 2)
+
+
+def test_view_follows_reparse():
+    ps = cl.Parse(["-n", "1", "-t", "5"], OPTIONS)
+    opset = ps.OPT_n
+    assert ps._reparse(["-a"]).OPT_n is opset
+    assert opset.value is None and not opset.isEnable and ps.OPT_a.isEnable
+    assert ps.OPT_t.value is None
+
+
+def test_segments_have_own_views():
+    segs = list(cl.Parse.iter_segments(["-n", "1", "x", "-n", "2", "y"], OPTIONS,
+                                       smode=cl.Smode.ONEPAIR))
+    assert [seg.OPT_n.value for seg in segs] == [1, 2]
+    assert segs[0].OPT_n is not segs[1].OPT_n
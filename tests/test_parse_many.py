@@ -0,0 +1,77 @@
+""" 一括解析（parse_many） """
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a"), ("n", "-n", "", int), ("t", "-t", "", [int, "APPEND"])]
+ARGVS = [
+    ["-a", "-n", "3", "x"],
+    ["-a", "-n", "x", "-t", "1", "-t", "y"],
+    ["-t", "1", "-t", "2", "-n", "z"],
+    ["-t", "1", "-t", "bad"],
+    ["-b"],
+    [],
+]
+
+
+def lazy_values(obj):
+    if isinstance(obj, list):
+        return any(lazy_values(item) for item in obj)
+    return type(obj) is cl._LazyValue
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_lazy_bad_input_has_no_lazy_values(workers):
+    results = list(cl.Parse.parse_many(ARGVS, OPTIONS, lazy=True, workers=workers, chunksize=2))
+    assert [r.eno for r in results] == ["N00", "E22", "E22", "E22", "E23", "N00"]
+    for r in results:
+        assert not any(lazy_values(value) for value in r.values.values()), r
+    assert results[0].values == {"n": 3}
+    assert results[2].values == {"t": [1, 2]}      # 変換できたものは残す
+    assert "n" not in results[1].values and "t" not in results[3].values
+
+
+def test_same_as_parse():
+    spec = cl.ParserSpec(OPTIONS)
+    for argv, r in zip(ARGVS, spec.parse_many(ARGVS)):
+        ps = spec.parse(argv, emessage_header="")
+        assert (r.eno != "N00") == ps.is_error
+        if ps.is_error:
+            assert ps.get_errormessage().startswith(r.eno + ":")
+        assert r.params == list(ps.params)
+        if r.eno == "N00":
+            assert r.values == {k: ps.OPT_[k].value for k in "ant" if ps.OPT_[k].value is not None}
+
+
+def numbered_argvs(count):
+    for i in range(count):
+        yield ["-n", str(i), "-t", str(i % 7)] if i % 10 != 3 else ["-n", f"bad{i}"]
+
+
+def test_pool_keeps_input_order():
+    results = list(cl.Parse.parse_many(numbered_argvs(200), OPTIONS, workers=2, chunksize=7))
+    assert len(results) == 200
+    for i, r in enumerate(results):
+        if i % 10 == 3:
+            assert r.eno == "E22" and r.values == {}
+        else:
+            assert r.eno == "N00" and r.values == {"n": i, "t": [i % 7]}
+
+
+def test_pool_failing_item():
+    argvs = [["-n", "1"], ["-n", "x"], ["-b"], ["-n", "2"]]
+    results = list(cl.Parse.parse_many(argvs, OPTIONS, workers=2, chunksize=1))
+    assert [r.eno for r in results] == ["N00", "E22", "E23", "N00"]
+    assert results[0].values == {"n": 1} and results[3].values == {"n": 2}
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_single_process_same_as_pool(workers):
+    spec = cl.ParserSpec(OPTIONS)
+    pooled = list(spec.parse_many(numbered_argvs(50), workers=2, chunksize=4))
+    single = list(spec.parse_many(numbered_argvs(50), workers=workers))
+    assert single == pooled
+
+
+def test_pool_empty_input():
+    assert list(cl.Parse.parse_many([], OPTIONS, workers=2)) == []
@@ -0,0 +1,55 @@
+""" 解析結果クラス（result） """
+import dataclasses
+
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("all", "-a, --all"), ("name", "-n, --name", "", str), ("tag", "-t", "", [str, "APPEND"]),
+           ("verbose", "-v", "", "COUNT"), ("class", "--class", "", int)]
+
+
+def test_default_class():
+    spec = cl.ParserSpec(OPTIONS)
+    ps = spec.parse(["-a", "-n", "x", "-t", "1", "-t", "2", "-vv", "--class=3", "rest"])
+    res = ps.result()
+    assert type(res) is spec.result_class()
+    assert (res.all, res.name, res.tag, res.verbose, res.OPT_class) == (True, "x", ["1", "2"], 2, 3)
+    assert not hasattr(res, "__dict__")
+
+
+def test_default_class_copies_append():
+    ps = cl.ParserSpec(OPTIONS).parse(["-t", "1"])
+    res = ps.result()
+    res.tag.append("2")
+    assert ps.OPT_tag.value == ["1"]
+    assert ps.result().tag == ["1"]
+
+
+def test_frozen_class():
+    spec = cl.ParserSpec(OPTIONS)
+    ps = spec.parse(["-n", "x", "-t", "1", "-t", "2"])
+    res = ps.result(frozen=True)
+    assert type(res) is spec.result_class(frozen=True)
+    assert res.tag == ("1", "2") and res.name == "x" and res.all is False
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        res.name = "y"
+    assert ps.OPT_tag.value == ["1", "2"]
+    assert res == ps.result(frozen=True)
+
+
+def test_class_is_per_spec():
+    spec = cl.ParserSpec(OPTIONS)
+    assert spec.result_class() is spec.result_class()
+    assert spec.result_class(frozen=True) is spec.result_class(frozen=True)
+    assert spec.result_class() is not cl.ParserSpec(OPTIONS).result_class()
+
+
+def test_error_raises():
+    ps = cl.ParserSpec(OPTIONS).parse(["--class=x"], emessage_header="")
+    assert ps.is_error
+    with pytest.raises(ValueError) as e:
+        ps.result()
+    assert str(e.value) == ps.get_errormessage()
+    with pytest.raises(ValueError):
+        ps.result(frozen=True)
@@ -0,0 +1,65 @@
+""" コンパイル結果のキャッシュ（Parse.compile(cache_file=)、ParserSpec.cached） """
+import datetime
+
+from lib import cl_parse as cl
+from lib import cl_parse_functions as cf
+
+OPTIONS = [("a", "-a, --all"), ("n", "-n, --number", "数//<数>", int),
+           ("d", "-d, --date", "", cf.date)]
+ARGS = ["--al", "-n", "3", "-d", "2024/1/2", "x"]
+
+
+def summary(ps):
+    return ps.is_error, [(name, o.isEnable, o.value) for name, o in ps.OPT_.items()], list(ps.params)
+
+
+def test_round_trip(tmp_path):
+    cache = tmp_path / "cmd.spec"
+    first = cl.Parse.compile(OPTIONS, [["a", "n"]], cache_file=cache)
+    assert cache.exists()
+    second = cl.Parse.compile(OPTIONS, [["a", "n"]], cache_file=cache)
+    assert summary(second.parse(ARGS)) == summary(first.parse(ARGS)) == \
+        summary(cl.Parse(ARGS, OPTIONS, [["a", "n"]]))
+    assert second.parse(ARGS).OPT_d.value == datetime.datetime(2024, 1, 2)
+    assert second.parse(["-a", "-n", "1"]).is_error
+
+
+def test_rebuilt_when_options_change(tmp_path):
+    cache = tmp_path / "cmd.spec"
+    cl.Parse.compile(OPTIONS, cache_file=cache)
+    changed = OPTIONS + [("v", "-v, --verbose")]
+    assert cl.ParserSpec.fingerprint(changed) != cl.ParserSpec.fingerprint(OPTIONS)
+    spec = cl.Parse.compile(changed, cache_file=cache)
+    assert spec.parse(["-v"]).OPT_v.isEnable
+    assert cl.Parse.compile(changed, [["a", "v"]], cache_file=cache).parse(["-a", "-v"]).is_error
+
+
+def test_converters_are_taken_from_current_options(tmp_path):
+    cache = tmp_path / "cmd.spec"
+    cl.Parse.compile([("n", "-n", "", lambda s: int(s) * 2)], cache_file=cache)
+    spec = cl.Parse.compile([("n", "-n", "", lambda s: int(s) * 2)], cache_file=cache)
+    assert spec.parse(["-n", "4"]).OPT_n.value == 8
+
+
+def test_broken_cache_file(tmp_path):
+    cache = tmp_path / "cmd.spec"
+    cache.write_bytes(b"not a pickle")
+    assert not cl.Parse.compile(OPTIONS, cache_file=cache).parse(ARGS).is_error
+    directory = tmp_path / "dir.spec"
+    directory.mkdir()                                   # 書けない時も、普通にコンパイルする
+    assert not cl.Parse.compile(OPTIONS, cache_file=directory).parse(ARGS).is_error
+
+
+def test_indexes_not_saved(tmp_path):
+    cache = tmp_path / "cmd.spec"
+    spec = cl.ParserSpec(OPTIONS)
+    for _ in range(20):             # 索引（_refs、_s_dispatch、_l_abbrev）を作らせる
+        spec.parse(ARGS)
+    assert spec._l_abbrev is not None
+    spec.save_cache(cache, cl.ParserSpec.fingerprint(OPTIONS), list(cl._iter_converters(OPTIONS)))
+    loaded = cl.ParserSpec.cached(cache, OPTIONS)
+    assert loaded is not spec
+    assert (loaded._refs, loaded._s_dispatch, loaded._l_abbrev, loaded._l_lookups) == (None, None, None, 0)
+    assert summary(loaded.parse(ARGS)) == summary(spec.parse(ARGS))
+    assert summary(loaded.parse(["--num=4", "--all"])) == summary(spec.parse(["--num=4", "--all"]))
+    assert set(spec.__getstate__()) == set(vars(spec)) - set(cl._SPEC_INDEXES)
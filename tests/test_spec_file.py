@@ -0,0 +1,180 @@
+""" オプション情報ファイル（JSON、TOML）、LazyConverter、emsg の上書き """
+import json
+import sys
+
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a"), ("b", "-b"), ("n", "-n", "", int)]
+EMSG = {"E14": "{eno}: 知らないオプション {arg}", "E31": "{eno}: ({ext0}) と ({ext1})"}
+
+
+def message(ps):
+    return ps.get_errormessage()
+
+
+# -----------------------------------------------------
+# emsg の上書き
+# -----------------------------------------------------
+def test_emsg_override_all_entry_points(tmp_path):
+    specs = [
+        cl.ParserSpec(OPTIONS, [["a", "b"]], emsg=EMSG),
+        cl.Parse.compile(OPTIONS, [["a", "b"]], emsg=EMSG),
+        cl.Parse.compile(OPTIONS, [["a", "b"]], emsg=EMSG, cache_file=tmp_path / "c.spec"),
+        cl.Parse.compile(OPTIONS, [["a", "b"]], emsg=EMSG, cache_file=tmp_path / "c.spec"),
+    ]
+    for spec in specs:
+        assert message(spec.parse(["--zz"], emessage_header="")) == "E14: 知らないオプション --zz"
+        assert message(spec.parse(["-a", "-b"], emessage_header="")) == "E31: (-a) と (-b)"
+    ps = cl.Parse(["--zz"], OPTIONS, emsg=EMSG, emessage_header="")
+    assert message(ps) == "E14: 知らないオプション --zz"
+    # 上書きしていない時は、cl.emsg のまま
+    assert message(cl.Parse(["--zz"], OPTIONS, emessage_header="")) == "E14: illegal option --zz"
+
+
+def test_emsg_in_fingerprint(tmp_path):
+    assert cl.ParserSpec.fingerprint(OPTIONS, emsg=EMSG) != cl.ParserSpec.fingerprint(OPTIONS)
+    cache = tmp_path / "c.spec"
+    cl.ParserSpec.cached(cache, OPTIONS)
+    spec = cl.ParserSpec.cached(cache, OPTIONS, emsg=EMSG)     # 指紋が違うので作り直す
+    assert message(spec.parse(["--zz"], emessage_header="")) == "E14: 知らないオプション --zz"
+
+
+def test_emsg_iter_events():
+    spec = cl.ParserSpec(OPTIONS, [["a", "b"]], emsg=EMSG)
+    events = list(spec.iter_events(["-a", "-b"]))
+    assert events[-1] == cl.Event(cl.Ev.ERROR, "E31", "E31: (-a) と (-b)")
+
+
+def test_emsg_subcommand():
+    spec = cl.ParserSpec([("v", "-v")], emsg={"E14": "{eno}: top {arg}"},
+                         subcommands={"run": lambda: {"options": [("x", "-x")],
+                                                      "emsg": {"E51": "{eno}: sub {arg}"}}})
+    assert message(spec.parse(["run", "--q"], emessage_header="")) == "E14: top --q"
+    assert message(spec.parse(["nosuch"], emessage_header="")) == "E51: unknown subcommand nosuch"
+
+
+def test_emsg_in_parser_option_ignores_parserspec():
+    with pytest.raises(AssertionError):
+        cl.Parse([], cl.ParserSpec(OPTIONS), emsg=EMSG)
+
+
+# -----------------------------------------------------
+# オプション情報ファイル
+# -----------------------------------------------------
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    """ import されたかどうか分かる、変換関数のモジュール """
+    pkg = tmp_path / "clplugin"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    (pkg / "conv.py").write_text(
+        "from enum import Flag, auto\n"
+        "class Color(Flag):\n"
+        "    RED = auto()\n"
+        "    GREEN = auto()\n"
+        "class Ns:\n"
+        "    @staticmethod\n"
+        "    def twice(x):\n"
+        "        return int(x) * 2\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "clplugin.conv"
+    for name in ("clplugin.conv", "clplugin"):
+        sys.modules.pop(name, None)
+
+
+SPEC = {
+    "options": [
+        ["count", "-c, --count", "数量//<数>", "int"],
+        {"opname": "color", "opstrings": "--color", "actions": ["clplugin.conv.Color", "APPEND"]},
+        {"opname": "tw", "opstrings": "-t", "actions": "clplugin.conv:Ns.twice"},
+        ["a", "-a"], ["b", "-b"],
+    ],
+    "exclusive": [["a", "b"]],
+    "emsg": {"E31": "{eno}: 同時に指定できません"},
+}
+
+TOML = '''
+exclusive = [["a", "b"]]
+[emsg]
+E31 = "{eno}: 同時に指定できません"
+[[options]]
+opname = "count"
+opstrings = "-c, --count"
+actions = "int"
+[[options]]
+opname = "color"
+opstrings = "--color"
+actions = ["clplugin.conv.Color", "APPEND"]
+[[options]]
+opname = "tw"
+opstrings = "-t"
+actions = "clplugin.conv:Ns.twice"
+[[options]]
+opname = "a"
+opstrings = "-a"
+[[options]]
+opname = "b"
+opstrings = "-b"
+'''
+
+
+@pytest.fixture(params=["json", "toml"])
+def spec_file(request, tmp_path):
+    path = tmp_path / f"spec.{request.param}"
+    path.write_text(json.dumps(SPEC) if request.param == "json" else TOML, encoding="utf-8")
+    return path
+
+
+def test_from_file_lazy_import(spec_file, plugin):
+    spec = cl.ParserSpec.from_file(spec_file)
+    ps = spec.parse(["-c", "3", "x"])
+    assert ps.OPT_count.value == 3
+    assert plugin not in sys.modules           # 使わないオプションの変換関数は読み込まない
+    ps = spec.parse(["--color", "RED|GREEN", "--color=RED", "-t", "4"])
+    assert plugin in sys.modules
+    Color = sys.modules[plugin].Color
+    assert ps.OPT_color.value == [Color.RED | Color.GREEN, Color.RED]
+    assert ps.OPT_tw.value == 8
+    assert message(spec.parse(["-a", "-b"], emessage_header="")) == "E31: 同時に指定できません"
+
+
+def test_from_file_with_cache(spec_file, plugin, tmp_path):
+    for _ in range(2):
+        spec = cl.ParserSpec.from_file(spec_file, cache_file=tmp_path / "spec.cache")
+        assert spec.parse(["-t", "2"]).OPT_tw.value == 4
+        assert message(spec.parse(["-a", "-b"], emessage_header="")) == "E31: 同時に指定できません"
+
+
+def test_lazy_converter_errors(plugin):
+    with pytest.raises(ImportError):
+        cl.LazyConverter("clplugin.conv.Nope").resolve()
+    with pytest.raises(ImportError):
+        cl.LazyConverter("clplugin_nosuch.x").resolve()
+    spec = cl.ParserSpec([("c", "--color", "", cl.LazyConverter("clplugin.conv.Color"))])
+    ps = spec.parse(["--color", "BLUE"])
+    assert ps.is_error and "E12" in message(ps)
+
+
+@pytest.mark.parametrize("name", ["clplugin_nosuch.conv.f", "clplugin.conv.nosuch", "clplugin.conv:Ns.nope"])
+@pytest.mark.parametrize("kwargs", [{}, {"lazy": True}, {"codegen": True}])
+def test_missing_converter_is_parse_error(tmp_path, plugin, name, kwargs):
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps({"options": [["n", "-n, --num", "", name], ["a", "-a"]]}))
+    spec = cl.ParserSpec.from_file(path)
+    assert spec.parse(["-a", "x"]).OPT_a.isEnable         # 使わなければ、エラーにならない
+    ps = spec.parse(["--num=3"], emessage_header="", **kwargs)
+    ps.validate()
+    assert ps.is_error
+    assert ps.get_errormessage() == "E12: illegal argument specified for option --num=3"
+    assert f"cannot import converter {name!r}" in ps.get_errormessage(1)
+    events = list(spec.iter_events(["-n", "3"]))
+    assert events[-1].kind is cl.Ev.ERROR and events[-1].name == "E22"
+
+
+def test_illegal_spec_file(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"options": [["a", "-a"]], "unknown": 1}))
+    with pytest.raises(AssertionError):
+        cl.load_spec_file(path)
@@ -0,0 +1,66 @@
+""" サブコマンド（グローバルオプションの引き継ぎ、E51） """
+import pytest
+
+from lib import cl_parse as cl
+
+GLOBALS = [("v", "-v, --verbose", "", "COUNT"), ("I", "-I", "", [str, "APPEND"]),
+           ("n", "-n", "", int)]
+SUBS = {"add": lambda: [("f", "-f, --force")],
+        "rm": lambda: {"options": [("r", "-r"), ("q", "-q")], "exclusive": [["r", "q"]]}}
+
+
+class Spec:
+    """ 遅延変換モードでも同じ結果になること """
+    def __init__(self, lazy):
+        self.spec = cl.ParserSpec(GLOBALS, subcommands=SUBS)
+        self.lazy = lazy
+
+    def parse(self, args, **kwargs):
+        return self.spec.parse(args, lazy=self.lazy, **kwargs)
+
+
+@pytest.fixture(params=[False, True], ids=["eager", "lazy"])
+def spec(request):
+    return Spec(request.param)
+
+
+def test_globals_before_and_after(spec):
+    ps = spec.parse(["-n", "1", "add", "-f", "x"])
+    assert ps.subcommand == "add" and not ps.is_error
+    assert ps.sub.OPT_n.value == 1 and ps.sub.OPT_f.isEnable
+    assert ps.sub.params == ["x"] and ps.params == []
+    ps = spec.parse(["-n", "1", "add", "-n", "2"])
+    assert ps.sub.OPT_n.value == 2              # 通常のオプションは、後の指定が優先
+
+
+def test_count_and_append_are_merged(spec):
+    ps = spec.parse(["-v", "-I", "a", "add", "-vv", "-I", "b"])
+    assert ps.sub.OPT_v.value == 3
+    assert ps.sub.OPT_I.value == ["a", "b"]
+    ps = spec.parse(["-v", "-I", "a", "add"])
+    assert ps.sub.OPT_v.value == 1 and ps.sub.OPT_I.value == ["a"]
+    ps = spec.parse(["add", "-v", "-I", "b"])
+    assert ps.sub.OPT_v.value == 1 and ps.sub.OPT_I.value == ["b"]
+
+
+def test_segments_carry_is_not_merged():
+    spec = cl.ParserSpec(GLOBALS)
+    segs = list(spec.iter_segments(["-v", "-I", "a", "x", "-v", "y"], carry=True,
+                                   smode=cl.Smode.ONEPAIR))
+    assert [s.OPT_v.value for s in segs] == [1, 1]
+    assert [s.OPT_I.value for s in segs] == [["a"], ["a"]]
+
+
+def test_unknown_subcommand(spec):
+    ps = spec.parse(["-v", "nosuch"], emessage_header="")
+    assert ps.is_error and ps.get_errormessage() == "E51: unknown subcommand nosuch"
+    ps = spec.parse(["rm", "-r", "-q"], emessage_header="")
+    assert ps.is_error and ps.get_errormessage().startswith("E31:")
+
+
+def test_emsg_order(capsys):
+    eno = [e for e in cl.emsg if e.startswith("E")]
+    assert eno == sorted(eno)
+    cl.Parse.show_errormessage()
+    out = capsys.readouterr().out
+    assert out.index("E41") < out.index("E51")
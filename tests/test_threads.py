@@ -0,0 +1,70 @@
+""" １つの ParserSpec を、複数のスレッドから同時に使う """
+import threading
+
+import pytest
+
+from lib import cl_parse as cl
+
+OPTIONS = [("a", "-a, --all"), ("n", "-n, --number", "", int), ("t", "-t, --tag", "", [str, "APPEND"]),
+           ("v", "-v, --verbose", "", "COUNT"), ("x", "-x"), ("y", "-y")]
+EXCLUSIVE = [["x", "y"]]
+THREADS = 8
+ROUNDS = 200
+
+
+def argv_of(worker, i):
+    """ スレッドごと、回ごとに違うコマンドライン（ロング名の省略形、排他エラーを含む） """
+    if i % 17 == 5:
+        return ["-x", "-y"]
+    return ["--num", str(worker * 1000 + i), "--ta=w%d" % worker] + ["-v"] * (i % 3) + [f"p{worker}.{i}"]
+
+
+def expected(worker, i):
+    if i % 17 == 5:
+        return (True, None, None, None, [])
+    return (False, worker * 1000 + i, [f"w{worker}"], (i % 3) or None, [f"p{worker}.{i}"])
+
+
+def summary(ps):
+    return (ps.is_error, ps.OPT_n.value, ps.OPT_t.value, ps.OPT_v.value, list(ps.params))
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_shared_spec(codegen):
+    spec = cl.ParserSpec(OPTIONS, EXCLUSIVE)      # 索引、生成した解析関数は、スレッドの中で作られる
+    barrier = threading.Barrier(THREADS)
+    errors: list[str] = []
+
+    def work(worker):
+        barrier.wait()
+        for i in range(ROUNDS):
+            ps = spec.parse(argv_of(worker, i), codegen=codegen)
+            if summary(ps) != expected(worker, i):
+                errors.append(f"{worker}/{i}: {summary(ps)}")
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_results_are_independent():
+    spec = cl.ParserSpec(OPTIONS, EXCLUSIVE)
+    barrier = threading.Barrier(THREADS)
+    results: dict[int, cl.Parse] = {}
+
+    def work(worker):
+        barrier.wait()
+        results[worker] = spec.parse(argv_of(worker, 1))
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [summary(results[worker]) for worker in range(THREADS)] == \
+        [expected(worker, 1) for worker in range(THREADS)]
+    results[0].OPT_t.value.append("changed")
+    assert all(results[worker].OPT_t.value == [f"w{worker}"] for worker in range(1, THREADS))
@@ -0,0 +1,54 @@
+""" ワイルドカード展開（expand_wildcards、wildcard=True） """
+import os
+
+import pytest
+
+from lib import cl_parse as cl
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    for name in ("a.txt", "b.txt", "c.log", ".hidden.txt", "sub/d.txt", "sub/deep/e.txt"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def names(args):
+    return sorted(p.replace(os.sep, "/") for p in args)
+
+
+def test_patterns(tree):
+    assert names(cl.expand_wildcards(["*.txt"])) == ["a.txt", "b.txt"]
+    assert names(cl.expand_wildcards(["?.log"])) == ["c.log"]
+    assert names(cl.expand_wildcards(["[ab].txt"])) == ["a.txt", "b.txt"]
+    assert names(cl.expand_wildcards(["sub/*.txt"])) == ["sub/d.txt"]
+    assert names(cl.expand_wildcards(["**/*.txt"])) == \
+        ["a.txt", "b.txt", "sub/d.txt", "sub/deep/e.txt"]
+    assert names(cl.expand_wildcards(["**/*.txt"], recursive=False)) == ["sub/d.txt"]
+
+
+def test_no_match_and_plain(tree):
+    assert cl.expand_wildcards(["*.none", "plain", "["]) == ["*.none", "plain", "["]
+
+
+def test_parse_wildcard(tree):
+    ps = cl.Parse(["-a", "*.txt", "\\*.txt", " *.log"], [("a", "-a")], wildcard=True)
+    assert names(ps.params[:2]) == ["a.txt", "b.txt"]
+    assert list(ps.params[2:]) == ["*.txt", "*.log"]
+    ps = cl.Parse(["*.txt"], [("a", "-a")], winexpand=False)
+    assert list(ps.params) == ["*.txt"]
+
+
+def test_listing_shared(tree, monkeypatch):
+    calls = []
+    scandir = os.scandir
+
+    def counting(path="."):
+        calls.append(path)
+        return scandir(path)
+    monkeypatch.setattr(os, "scandir", counting)
+    cl.expand_wildcards(["*.txt", "*.log", "?.txt"])
+    assert len(calls) == 1